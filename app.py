@@ -1,14 +1,22 @@
 import sys
 import os
-print(f"Python version: {sys.version}")
-print(f"Current working directory: {os.getcwd()}")
-print(f"Python path: {sys.path}")
+import re
+import asyncio
+import hashlib
+import time
+import logging
+import logging.handlers
+import atexit
+import queue
+import json
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import Response, ORJSONResponse
 from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
@@ -31,100 +39,158 @@ from routes import (
 )
 from config import config
 from services.supabase_service import SupabaseService
+from services.audit_service import audit_writer
+
+
+def _install_queue_logging() -> None:
+    """
+    Send root log records through a queue so formatting and stream writes happen
+    on a listener thread instead of the event loop. The handlers installed so far
+    (services/security_logger.py calls basicConfig) move behind the listener.
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, logging.handlers.QueueHandler)]
+    if not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+# Lambda's own root handler tags records with the current request id when they
+# are emitted and must flush before the container freezes, so it stays inline
+if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    _install_queue_logging()
+
+# Interpreter/path diagnostics are only logged when running locally or when asked
+# for, so they stay out of Lambda cold starts
+_PRINT_BANNER = __name__ == "__main__" or bool(os.getenv("PRINT_BANNER"))
+if _PRINT_BANNER:
+    logger.info(
+        "Python version: %s | Current working directory: %s | Python path: %s",
+        sys.version, os.getcwd(), sys.path
+    )
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event for startup and shutdown tasks."""
-    print("\n" + "="*70)
-    print("🚀 Orzion Chat API - Starting Up")
-    print("="*70)
-
-    print("\n📋 Validating environment variables...")
+    logger.info("🚀 Orzion Chat API - Starting Up (validating environment variables)")
     config.validate()
+    SupabaseService.warm_up()
 
-    print("\n🔍 Verifying Supabase schema...")
     try:
         schema_status = await SupabaseService.verify_schema()
 
         if not schema_status["all_tables_exist"]:
-            print("\n" + "="*70)
-            print("⚠️  WARNING: Some Supabase tables are missing!")
-            print("="*70)
-            print(f"Missing tables: {', '.join(schema_status['missing_tables'])}")
-            print("The server will continue, but some features may not work.")
-            print("="*70 + "\n")
+            logger.warning(
+                "⚠️  Some Supabase tables are missing: %s. "
+                "The server will continue, but some features may not work.",
+                ", ".join(schema_status["missing_tables"])
+            )
         else:
-            print("✅ All Supabase tables verified successfully")
+            logger.info("✅ All Supabase tables verified successfully")
     except Exception as e:
-        print(f"\n⚠️  WARNING: Could not verify Supabase schema: {str(e)}")
-        print("The server will continue, but database features may not work.")
+        logger.warning(
+            "⚠️  Could not verify Supabase schema: %s. "
+            "The server will continue, but database features may not work.",
+            e
+        )
 
-    print("\n✅ Startup complete!")
-    print("="*70 + "\n")
+    document_routes.start_cleanup_task()
 
-    yield
+    logger.info("✅ Startup complete!")
 
-    print("\n👋 Shutting down Orzion Chat API...")
+    yield
 
-app = FastAPI(title="Orzion Chat API", version="1.0.0", lifespan=lifespan)
+    logger.info("👋 Shutting down Orzion Chat API...")
+    await document_routes.stop_cleanup_task()
+    await image_routes.close_http_client()
+    await audit_writer.close()
+
+# Route return values are serialized with orjson unless a route picks its own response class
+app = FastAPI(
+    title="Orzion Chat API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+# Security headers are request-invariant, so they are built once at import time
+_IS_PRODUCTION = os.getenv("ENVIRONMENT") == "production"
+
+_CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://accounts.google.com https://cdn.jsdelivr.net https://unpkg.com; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://accounts.google.com https://unpkg.com; "
+    "font-src 'self' https://fonts.gstatic.com; "
+    "img-src 'self' data: https: blob:; "
+    "connect-src 'self' https://orzionbackend.onrender.com https://orzion-pro.pages.dev https://*.replit.dev https://accounts.google.com https://*.openrouter.ai https://www.googleapis.com https://unpkg.com; "
+    "frame-src 'self' https://accounts.google.com; "
+    "object-src 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self'; "
+    "upgrade-insecure-requests;"
+)
 
-        is_production = os.getenv("ENVIRONMENT") == "production"
+_PERMISSIONS_POLICY = (
+    "camera=(), microphone=(), geolocation=(), "
+    "payment=(), usb=(), magnetometer=(), "
+    "gyroscope=(), accelerometer=()"
+)
 
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://accounts.google.com https://cdn.jsdelivr.net https://unpkg.com; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://accounts.google.com https://unpkg.com; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data: https: blob:; "
-            "connect-src 'self' https://orzionbackend.onrender.com https://orzion-pro.pages.dev https://*.replit.dev https://accounts.google.com https://*.openrouter.ai https://www.googleapis.com https://unpkg.com; "
-            "frame-src 'self' https://accounts.google.com; "
-            "object-src 'none'; "
-            "base-uri 'self'; "
-            "form-action 'self'; "
-            "upgrade-insecure-requests;"
-        )
+_HSTS = "max-age=63072000; includeSubDomains; preload"
 
-        if is_production:
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=63072000; includeSubDomains; preload"
-            )
+_STATIC_SECURITY_HEADERS = (
+    ("Content-Security-Policy", _CONTENT_SECURITY_POLICY),
+    ("X-Frame-Options", "DENY"),
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    ("Permissions-Policy", _PERMISSIONS_POLICY),
+)
 
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "camera=(), microphone=(), geolocation=(), "
-            "payment=(), usb=(), magnetometer=(), "
-            "gyroscope=(), accelerometer=()"
-        )
+# Pre-encoded (name, value) pairs added to every response's raw header list
+_SECURITY_RAW_HEADERS = [
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in _STATIC_SECURITY_HEADERS
+]
+if _IS_PRODUCTION:
+    _SECURITY_RAW_HEADERS.append((b"strict-transport-security", _HSTS.encode("latin-1")))
+_SECURITY_RAW_HEADER_NAMES = frozenset(name for name, _ in _SECURITY_RAW_HEADERS)
 
-        return response
+def _with_security_headers(headers) -> list:
+    """Return a new raw header list with the security headers applied (overriding any set by the handler)."""
+    if any(name in _SECURITY_RAW_HEADER_NAMES for name, _ in headers):
+        headers = [h for h in headers if h[0] not in _SECURITY_RAW_HEADER_NAMES]
+    return [*headers, *_SECURITY_RAW_HEADERS]
 
 generated_files_dir = Path("generated_files")
 generated_files_dir.mkdir(exist_ok=True)
 
+# Frontend location is fixed for the life of the process; resolve it once
+_FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend"
+_FRONTEND_DIR_EXISTS = _FRONTEND_DIR.is_dir()
+
 # Get allowed origins from environment or use secure defaults
-allowed_origins = os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else []
+env_origins = os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else []
 
 # Add Replit domains if running on Replit
+replit_origins = []
 replit_dev_domain = os.getenv("REPL_SLUG")
 replit_owner = os.getenv("REPL_OWNER")
 if replit_dev_domain and replit_owner:
     # Agregar ambos formatos de URL de Replit
     replit_url_repl = f"https://{replit_dev_domain}.{replit_owner}.repl.co"
     replit_url_dev = f"https://{replit_dev_domain}-{replit_owner}.replit.dev"
-    
-    if replit_url_repl not in allowed_origins:
-        allowed_origins.append(replit_url_repl)
-    if replit_url_dev not in allowed_origins:
-        allowed_origins.append(replit_url_dev)
-    
-    print(f"✅ Replit domains added to CORS: {replit_url_repl}, {replit_url_dev}")
+    replit_origins = [replit_url_repl, replit_url_dev]
+
+    logger.info("✅ Replit domains added to CORS: %s, %s", replit_url_repl, replit_url_dev)
 
 # Add production frontend URLs
 production_origins = [
@@ -134,33 +200,73 @@ production_origins = [
     "https://orzion-pro.pages.dev",
     "https://orzion.pages.dev",
 ]
-for origin in production_origins:
-    if origin not in allowed_origins:
-        allowed_origins.append(origin)
 
-# Add Replit dev domains pattern
-import re
-replit_dev_pattern = re.compile(r'https://[a-zA-Z0-9-]+\.replit\.dev')
+# dict.fromkeys de-duplicates in one pass while keeping first-seen order
+allowed_origins = list(dict.fromkeys(env_origins + replit_origins + production_origins))
+
+# Replit dev domains patterns (anchored so suffixes like ".replit.dev.evil.com" are rejected)
+_REPLIT_DEV_MATCH = re.compile(r'\Ahttps://[a-zA-Z0-9-]+\.replit\.dev\Z').match
+_REPLIT_REPL_CO_MATCH = re.compile(r'\Ahttps://[a-zA-Z0-9-]+\.[a-zA-Z0-9-]+\.repl\.co\Z').match
 
 # Add localhost for development
 if not allowed_origins or os.getenv("ENVIRONMENT") == "development":
-    allowed_origins.extend([
+    allowed_origins = list(dict.fromkeys(allowed_origins + [
         "http://localhost:5000",
         "http://127.0.0.1:5000",
         "http://0.0.0.0:5000",
-    ])
+    ]))
 
 # Custom CORS middleware to handle Replit dev domains
 from starlette.middleware.cors import CORSMiddleware as _CORSMiddleware
 from starlette.datastructures import Headers
 
 class CustomCORSMiddleware(_CORSMiddleware):
+    """
+    CORS middleware that also adds the security headers.
+    Both concerns share one pure-ASGI layer: the security headers are applied in a
+    send wrapper, so there is no BaseHTTPMiddleware task/queue hop per request.
+    """
+
+    # Origins are client-controlled, so the decision cache is bounded
+    ORIGIN_CACHE_MAX_SIZE = 64
+
+    def __init__(self, app, allow_origins=(), **kwargs):
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        # Starlette checks `origin in self.allow_origins`; a frozenset makes that O(1)
+        self.allow_origins = frozenset(self.allow_origins)
+        self._origin_cache: dict[str, bool] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await super().__call__(scope, receive, send)
+            return
+
+        async def send_with_security_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = _with_security_headers(message.get("headers", ()))
+            await send(message)
+
+        await super().__call__(scope, receive, send_with_security_headers)
+
     def is_allowed_origin(self, origin: str) -> bool:
+        # Most traffic comes from a handful of frontends, so reuse earlier decisions
+        cache = self._origin_cache
+        allowed = cache.get(origin)
+        if allowed is not None:
+            return allowed
+
+        allowed = self._check_origin(origin)
+        if len(cache) >= self.ORIGIN_CACHE_MAX_SIZE:
+            cache.clear()
+        cache[origin] = allowed
+        return allowed
+
+    def _check_origin(self, origin: str) -> bool:
         # Check if it's a Replit dev domain (any formato)
-        if re.match(r'https://[a-zA-Z0-9-]+\.replit\.dev', origin):
+        if _REPLIT_DEV_MATCH(origin):
             return True
         # Check if it's a Replit repl.co domain
-        if re.match(r'https://[a-zA-Z0-9-]+\.[a-zA-Z0-9-]+\.repl\.co', origin):
+        if _REPLIT_REPL_CO_MATCH(origin):
             return True
         # Otherwise use the default logic
         return super().is_allowed_origin(origin)
@@ -175,128 +281,162 @@ app.add_middleware(
     max_age=3600,
 )
 
-app.add_middleware(SecurityHeadersMiddleware)
-
-app.include_router(auth_routes.router, prefix="/api", tags=["auth"])
-app.include_router(chat_routes.router, prefix="/api", tags=["chat"])
-app.include_router(conversation_routes.router, prefix="/api", tags=["conversations"])
-app.include_router(user_routes.router, prefix="/api", tags=["user"])
-app.include_router(image_routes.router, prefix="/api", tags=["image"])
-app.include_router(settings_routes.router, prefix="/api/user", tags=["settings"])
-app.include_router(analytics_routes.router, prefix="/api", tags=["analytics"])
-app.include_router(document_routes.router, prefix="/api", tags=["documents"])
-app.include_router(referral_routes.router, tags=["referrals"])
-app.include_router(usage_routes.router, tags=["usage"])
-app.include_router(feedback_routes.router, tags=["feedback"])
-app.include_router(subscription_routes.router, tags=["subscriptions"])
-app.include_router(payment_routes.router, tags=["payments"])
-app.include_router(email_routes.router)
-app.include_router(memory_routes.router, prefix="/api", tags=["memories"])
-
-frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
-print(f"Frontend directory: {frontend_dir}")
-print(f"Frontend directory exists: {os.path.exists(frontend_dir)}")
-if os.path.exists(frontend_dir):
-    app.mount("/static", StaticFiles(directory=frontend_dir), name="static")
-    print(f"Mounted /static to {frontend_dir}")
+# (module, prefix, tags) for every API router, registered in this order
+_ROUTERS = (
+    (auth_routes, "/api", ["auth"]),
+    (chat_routes, "/api", ["chat"]),
+    (conversation_routes, "/api", ["conversations"]),
+    (user_routes, "/api", ["user"]),
+    (image_routes, "/api", ["image"]),
+    (settings_routes, "/api/user", ["settings"]),
+    (analytics_routes, "/api", ["analytics"]),
+    (document_routes, "/api", ["documents"]),
+    (referral_routes, "", ["referrals"]),
+    (usage_routes, "", ["usage"]),
+    (feedback_routes, "", ["feedback"]),
+    (subscription_routes, "", ["subscriptions"]),
+    (payment_routes, "", ["payments"]),
+    (email_routes, "", None),
+    (memory_routes, "/api", ["memories"]),
+)
+
+for module, prefix, tags in _ROUTERS:
+    app.include_router(module.router, prefix=prefix, tags=tags)
+
+if _PRINT_BANNER:
+    logger.info("Frontend directory: %s (exists: %s)", _FRONTEND_DIR, _FRONTEND_DIR_EXISTS)
+if _FRONTEND_DIR_EXISTS:
+    app.mount("/static", StaticFiles(directory=_FRONTEND_DIR), name="static")
+    if _PRINT_BANNER:
+        logger.info("Mounted /static to %s", _FRONTEND_DIR)
 
 if generated_files_dir.exists():
     app.mount("/downloads", StaticFiles(directory=str(generated_files_dir)), name="downloads")
-    print(f"Mounted /downloads to {generated_files_dir}")
-
-@app.get("/")
-async def serve_frontend():
-    """Serve the main HTML page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "index.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Orzion Chat API", "version": "4.0"}
-
-@app.get("/login.html")
-async def serve_login():
-    """Serve the login page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "login.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Login page not found"}
-
-@app.get("/chat.html")
-async def serve_chat():
-    """Serve the chat page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "chat.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Chat page not found"}
-
-@app.get("/chat/{conversation_id}")
-async def serve_chat_conversation(conversation_id: int):
-    """Serve the chat page for a specific conversation."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "chat.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Chat page not found"}
-
-@app.get("/settings.html")
-async def serve_settings():
-    """Serve the settings page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "settings.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Settings page not found"}
-
-@app.get("/terms.html")
-async def serve_terms():
-    """Serve the terms of use page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "terms.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Terms page not found"}
-
-@app.get("/privacy.html")
-async def serve_privacy():
-    """Serve the privacy policy page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "privacy.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Privacy page not found"}
-
-@app.get("/plans.html")
-async def serve_plans():
-    """Serve the plans page."""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "plans.html")
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path)
-    return {"message": "Plans page not found"}
-
-@app.get("/robots.txt")
-async def serve_robots():
-    """Serve robots.txt for SEO."""
-    robots_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "robots.txt")
-    if os.path.exists(robots_path):
-        return FileResponse(robots_path, media_type="text/plain")
-    return FileResponse(robots_path, media_type="text/plain", status_code=404)
-
-@app.get("/sitemap.xml")
-async def serve_sitemap():
-    """Serve sitemap.xml for SEO."""
-    sitemap_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "sitemap.xml")
-    if os.path.exists(sitemap_path):
-        return FileResponse(sitemap_path, media_type="application/xml")
-    return FileResponse(sitemap_path, media_type="application/xml", status_code=404)
-
-@app.get("/manifest.json")
-async def serve_manifest():
-    """Serve manifest.json for PWA."""
-    manifest_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend", "manifest.json")
-    if os.path.exists(manifest_path):
-        return FileResponse(manifest_path, media_type="application/json")
-    return {"error": "Manifest not found"}
+    if _PRINT_BANNER:
+        logger.info("Mounted /downloads to %s", generated_files_dir)
+
+# Frontend pages: (route, filename, fallback when the file is missing)
+_FRONTEND_PAGES = (
+    ("/", "index.html", {"message": "Orzion Chat API", "version": "4.0"}),
+    ("/login.html", "login.html", {"message": "Login page not found"}),
+    ("/chat.html", "chat.html", {"message": "Chat page not found"}),
+    ("/settings.html", "settings.html", {"message": "Settings page not found"}),
+    ("/terms.html", "terms.html", {"message": "Terms page not found"}),
+    ("/privacy.html", "privacy.html", {"message": "Privacy page not found"}),
+    ("/plans.html", "plans.html", {"message": "Plans page not found"}),
+)
+
+_HTML_CACHE_CONTROL = b"public, max-age=300"
+
+class PreEncodedResponse(Response):
+    """
+    Response built from headers that were encoded to (bytes, bytes) ahead of time,
+    skipping Response.init_headers' per-request str -> bytes work.
+    """
+
+    def __init__(self, body: bytes, raw_headers: list, status_code: int = 200):
+        self.status_code = status_code
+        self.body = body
+        self.background = None
+        # Copied so middlewares appending headers never touch the shared list
+        self.raw_headers = list(raw_headers)
+
+def _frontend_page(filename: str, fallback):
+    """
+    Build a plain Starlette endpoint serving a small frontend HTML file.
+    The file is read once here and served from memory with an ETag,
+    so page hits do no disk I/O and revalidations get a 304.
+    """
+    path = _FRONTEND_DIR / filename
+    if not (_FRONTEND_DIR_EXISTS and path.is_file()):
+        fallback_body = json.dumps(fallback).encode("utf-8")
+        fallback_headers = [
+            (b"content-length", str(len(fallback_body)).encode("latin-1")),
+            (b"content-type", b"application/json"),
+        ]
+
+        async def serve_missing_page(request: Request):
+            return PreEncodedResponse(fallback_body, fallback_headers)
+        return serve_missing_page
+
+    with open(path, "rb") as f:
+        body = f.read()
+    etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+    not_modified_headers = [
+        (b"etag", etag.encode("latin-1")),
+        (b"cache-control", _HTML_CACHE_CONTROL),
+    ]
+    ok_headers = [
+        (b"content-length", str(len(body)).encode("latin-1")),
+        (b"content-type", b"text/html; charset=utf-8"),
+    ] + not_modified_headers
+
+    async def serve_page(request: Request):
+        if request.headers.get("if-none-match") == etag:
+            return PreEncodedResponse(b"", not_modified_headers, status_code=304)
+        return PreEncodedResponse(body, ok_headers)
+
+    return serve_page
+
+# Registered as raw Starlette routes: these endpoints take no parameters, so
+# FastAPI's dependency solving and response serialization would be pure overhead
+for route, filename, fallback in _FRONTEND_PAGES:
+    app.add_route(route, _frontend_page(filename, fallback), methods=["GET"], include_in_schema=False)
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that marks every served file as cacheable by clients and CDNs."""
+
+    def __init__(self, *args, cache_control: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_control_header = (b"cache-control", cache_control.encode("latin-1"))
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.raw_headers.append(self._cache_control_header)
+        return response
+
+# SEO/PWA files are served straight by StaticFiles (no FastAPI handler) with a one-day cache
+if _FRONTEND_DIR_EXISTS:
+    _seo_files = CachedStaticFiles(directory=_FRONTEND_DIR, cache_control="public, max-age=86400")
+    for _seo_route in ("/robots.txt", "/sitemap.xml", "/manifest.json"):
+        app.add_route(_seo_route, _seo_files, include_in_schema=False)
+
+_serve_chat_page = _frontend_page("chat.html", {"message": "Chat page not found"})
+app.add_route("/chat/{conversation_id:int}", _serve_chat_page, methods=["GET"], include_in_schema=False)
+
+# Liveness probe: no I/O, just proves the process is serving requests.
+# Point load balancer / k8s liveness checks here and readiness checks at /ready.
+_LIVE_BODY = b'{"status":"ok"}'
+_LIVE_HEADERS = [
+    (b"content-length", str(len(_LIVE_BODY)).encode("latin-1")),
+    (b"content-type", b"application/json"),
+    (b"cache-control", b"no-store"),
+]
+
+async def live_check(request: Request):
+    """Liveness endpoint that never touches the database."""
+    return PreEncodedResponse(_LIVE_BODY, _LIVE_HEADERS)
+
+app.add_route("/live", live_check, methods=["GET"], include_in_schema=False)
 
 # Health check endpoint
+_HEALTH_PROBE_TIMEOUT = 5.0
+_health_timestamp_cache = [0, ""]
+
+def _health_timestamp() -> str:
+    """Return the current UTC ISO timestamp, formatted at most once per second."""
+    now = int(time.time())
+    cache = _health_timestamp_cache
+    if cache[0] != now:
+        cache[0] = now
+        cache[1] = datetime.utcfromtimestamp(now).isoformat() + "Z"
+    return cache[1]
+
 @app.get("/health")
+@app.get("/ready")
 async def health_check():
     """
-    Comprehensive health check endpoint.
+    Comprehensive health check endpoint (also served as the /ready readiness probe).
     Returns detailed status of all critical components.
     """
     from services.llm_service import LLMService
@@ -304,7 +444,7 @@ async def health_check():
     health_data = {
         "service": "Orzion Chat",
         "version": "1.0.0",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": _health_timestamp(),
         "status": "healthy"
     }
 
@@ -313,21 +453,25 @@ async def health_check():
     health_data["missing_critical_vars"] = env_status["missing_critical"]
     health_data["missing_important_vars"] = env_status["missing_important"]
 
-    try:
-        db_ok = await SupabaseService.check_connection()
-        health_data["database_ok"] = db_ok
+    # The Supabase client is blocking, so both probes run in worker threads concurrently
+    db_result, schema_result = await asyncio.gather(
+        asyncio.wait_for(asyncio.to_thread(SupabaseService.ping), _HEALTH_PROBE_TIMEOUT),
+        asyncio.wait_for(asyncio.to_thread(SupabaseService.get_schema_status), _HEALTH_PROBE_TIMEOUT),
+        return_exceptions=True
+    )
 
-        if db_ok:
-            schema_status = SupabaseService.get_schema_status()
-            health_data["database_tables_ok"] = schema_status["all_tables_exist"]
-            health_data["missing_tables"] = schema_status.get("missing_tables", [])
-        else:
-            health_data["database_tables_ok"] = False
-            health_data["missing_tables"] = []
-    except Exception as e:
+    if isinstance(db_result, BaseException):
         health_data["database_ok"] = False
-        health_data["database_error"] = str(e)
+        health_data["database_error"] = str(db_result) or type(db_result).__name__
+        health_data["database_tables_ok"] = False
+    elif db_result and not isinstance(schema_result, BaseException):
+        health_data["database_ok"] = True
+        health_data["database_tables_ok"] = schema_result["all_tables_exist"]
+        health_data["missing_tables"] = schema_result.get("missing_tables", [])
+    else:
+        health_data["database_ok"] = db_result
         health_data["database_tables_ok"] = False
+        health_data["missing_tables"] = []
 
     circuit_breaker_status = {}
     for api_name, breaker in LLMService.circuit_breakers.items():
@@ -3,12 +3,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Snapshot the environment once (after .env is loaded); plain dict lookups are
+# cheaper than os.getenv's per-call key encoding in the class body below
+_ENV = os.environ.copy()
+
 class Config:
     # Supabase Configuration - NO defaults for security
-    SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-    SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY", "")
-    SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
-    SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+    SUPABASE_URL = _ENV.get("SUPABASE_URL", "")
+    SUPABASE_ANON_KEY = _ENV.get("SUPABASE_ANON_KEY", "")
+    SUPABASE_SERVICE_ROLE_KEY = _ENV.get("SUPABASE_SERVICE_ROLE_KEY", "")
+    SUPABASE_JWT_SECRET = _ENV.get("SUPABASE_JWT_SECRET", "")
 
     # PostgreSQL Database - LEGACY CODE (NOT USED)
     # This project uses ONLY Supabase for database operations
@@ -16,13 +20,13 @@ class Config:
     # DATABASE_URL = f"postgresql://{os.getenv('PGUSER')}:{os.getenv('PGPASSWORD')}@{os.getenv('PGHOST')}:{os.getenv('PGPORT')}/{os.getenv('PGDATABASE')}"
 
     # Google OAuth
-    GOOGLE_OAUTH_CLIENT_ID = os.getenv("GOOGLE_OAUTH_CLIENT_ID", "")
-    GOOGLE_OAUTH_CLIENT_SECRET = os.getenv("GOOGLE_OAUTH_CLIENT_SECRET", "")
-    GOOGLE_OAUTH_REDIRECT_URI = os.getenv("GOOGLE_OAUTH_REDIRECT_URI", "")
+    GOOGLE_OAUTH_CLIENT_ID = _ENV.get("GOOGLE_OAUTH_CLIENT_ID", "")
+    GOOGLE_OAUTH_CLIENT_SECRET = _ENV.get("GOOGLE_OAUTH_CLIENT_SECRET", "")
+    GOOGLE_OAUTH_REDIRECT_URI = _ENV.get("GOOGLE_OAUTH_REDIRECT_URI", "")
 
     # Secret Key - Must be set via environment variable for production
     # Generate a random one for development if not set
-    SECRET_KEY = os.getenv("SECRET_KEY")
+    SECRET_KEY = _ENV.get("SECRET_KEY")
     if not SECRET_KEY:
         import secrets
         SECRET_KEY = secrets.token_hex(32)
@@ -38,86 +42,93 @@ class Config:
     
     # Primary LLM API Keys
     # Configure these in Render for production deployment
-    GOOGLE_AI_STUDIO_KEY_PRO = os.getenv("GOOGLE_AI_STUDIO_KEY_PRO", "")
-    GOOGLE_AI_STUDIO_KEY_TURBO = os.getenv("GOOGLE_AI_STUDIO_KEY_TURBO", "")
-    GOOGLE_AI_STUDIO_KEY_MINI = os.getenv("GOOGLE_AI_STUDIO_KEY_MINI", "")
-    GOOGLE_AI_STUDIO_KEY_IMAGE = os.getenv("GOOGLE_AI_STUDIO_KEY_IMAGE", "")
+    GOOGLE_AI_STUDIO_KEY_PRO = _ENV.get("GOOGLE_AI_STUDIO_KEY_PRO", "")
+    GOOGLE_AI_STUDIO_KEY_TURBO = _ENV.get("GOOGLE_AI_STUDIO_KEY_TURBO", "")
+    GOOGLE_AI_STUDIO_KEY_MINI = _ENV.get("GOOGLE_AI_STUDIO_KEY_MINI", "")
+    GOOGLE_AI_STUDIO_KEY_IMAGE = _ENV.get("GOOGLE_AI_STUDIO_KEY_IMAGE", "")
     
     # Primary LLM Models
-    GOOGLE_AI_STUDIO_PRO_MODEL = os.getenv("GOOGLE_AI_STUDIO_PRO_MODEL", "gemini-3-pro")
-    GOOGLE_AI_STUDIO_TURBO_MODEL = os.getenv("GOOGLE_AI_STUDIO_TURBO_MODEL", "gemini-2.5-flash")
-    GOOGLE_AI_STUDIO_MINI_MODEL = os.getenv("GOOGLE_AI_STUDIO_MINI_MODEL", "gemini-2.0-flash")
-    GOOGLE_AI_STUDIO_IMAGE_MODEL = os.getenv("GOOGLE_AI_STUDIO_IMAGE_MODEL", "imagen-4.0-ultra")
+    GOOGLE_AI_STUDIO_PRO_MODEL = _ENV.get("GOOGLE_AI_STUDIO_PRO_MODEL", "gemini-3-pro")
+    GOOGLE_AI_STUDIO_TURBO_MODEL = _ENV.get("GOOGLE_AI_STUDIO_TURBO_MODEL", "gemini-2.5-flash")
+    GOOGLE_AI_STUDIO_MINI_MODEL = _ENV.get("GOOGLE_AI_STUDIO_MINI_MODEL", "gemini-2.0-flash")
+    GOOGLE_AI_STUDIO_IMAGE_MODEL = _ENV.get("GOOGLE_AI_STUDIO_IMAGE_MODEL", "imagen-4.0-ultra")
     
     # Primary LLM Base URL
     GOOGLE_AI_STUDIO_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
     
     # Per-user daily quotas (to support 100+ concurrent users)
-    QUOTA_PRO_PER_USER_DAY = int(os.getenv("QUOTA_PRO_PER_USER_DAY", "2"))
-    QUOTA_TURBO_PER_USER_DAY = int(os.getenv("QUOTA_TURBO_PER_USER_DAY", "10"))
-    QUOTA_MINI_PER_USER_DAY = int(os.getenv("QUOTA_MINI_PER_USER_DAY", "12"))
-    QUOTA_IMAGE_PER_USER_DAY = int(os.getenv("QUOTA_IMAGE_PER_USER_DAY", "1"))
+    QUOTA_PRO_PER_USER_DAY = int(_ENV.get("QUOTA_PRO_PER_USER_DAY", "2"))
+    QUOTA_TURBO_PER_USER_DAY = int(_ENV.get("QUOTA_TURBO_PER_USER_DAY", "10"))
+    QUOTA_MINI_PER_USER_DAY = int(_ENV.get("QUOTA_MINI_PER_USER_DAY", "12"))
+    QUOTA_IMAGE_PER_USER_DAY = int(_ENV.get("QUOTA_IMAGE_PER_USER_DAY", "1"))
     
     # System-level quotas (daily limits)
-    QUOTA_GOOGLE_PRO_DAILY = int(os.getenv("QUOTA_GOOGLE_PRO_DAILY", "200"))
-    QUOTA_GOOGLE_TURBO_DAILY = int(os.getenv("QUOTA_GOOGLE_TURBO_DAILY", "1000"))
-    QUOTA_GOOGLE_MINI_DAILY = int(os.getenv("QUOTA_GOOGLE_MINI_DAILY", "1500"))
-    QUOTA_GOOGLE_IMAGE_DAILY = int(os.getenv("QUOTA_GOOGLE_IMAGE_DAILY", "50"))
+    QUOTA_GOOGLE_PRO_DAILY = int(_ENV.get("QUOTA_GOOGLE_PRO_DAILY", "200"))
+    QUOTA_GOOGLE_TURBO_DAILY = int(_ENV.get("QUOTA_GOOGLE_TURBO_DAILY", "1000"))
+    QUOTA_GOOGLE_MINI_DAILY = int(_ENV.get("QUOTA_GOOGLE_MINI_DAILY", "1500"))
+    QUOTA_GOOGLE_IMAGE_DAILY = int(_ENV.get("QUOTA_GOOGLE_IMAGE_DAILY", "50"))
     
     # Fallback LLM Configuration (automatic backup when quotas exhausted)
-    ORZION_PRO_URL = os.getenv("ORZION_PRO_URL", "https://openrouter.ai/api/v1/chat/completions")
-    ORZION_PRO_KEY = os.getenv("ORZION_PRO_KEY", "")
-    ORZION_PRO_MODEL = os.getenv('ORZION_PRO_MODEL', 'meta-llama/llama-3.3-70b-instruct')
+    ORZION_PRO_URL = _ENV.get("ORZION_PRO_URL", "https://openrouter.ai/api/v1/chat/completions")
+    ORZION_PRO_KEY = _ENV.get("ORZION_PRO_KEY", "")
+    ORZION_PRO_MODEL = _ENV.get('ORZION_PRO_MODEL', 'meta-llama/llama-3.3-70b-instruct')
     
-    ORZION_TURBO_URL = os.getenv("ORZION_TURBO_URL", "https://openrouter.ai/api/v1/chat/completions")
-    ORZION_TURBO_KEY = os.getenv("ORZION_TURBO_KEY", "")
-    ORZION_TURBO_MODEL = os.getenv("ORZION_TURBO_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
+    ORZION_TURBO_URL = _ENV.get("ORZION_TURBO_URL", "https://openrouter.ai/api/v1/chat/completions")
+    ORZION_TURBO_KEY = _ENV.get("ORZION_TURBO_KEY", "")
+    ORZION_TURBO_MODEL = _ENV.get("ORZION_TURBO_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
     
-    ORZION_MINI_URL = os.getenv("ORZION_MINI_URL", "https://openrouter.ai/api/v1/chat/completions")
-    ORZION_MINI_KEY = os.getenv("ORZION_MINI_KEY", "")
-    ORZION_MINI_MODEL = os.getenv("ORZION_MINI_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
+    ORZION_MINI_URL = _ENV.get("ORZION_MINI_URL", "https://openrouter.ai/api/v1/chat/completions")
+    ORZION_MINI_KEY = _ENV.get("ORZION_MINI_KEY", "")
+    ORZION_MINI_MODEL = _ENV.get("ORZION_MINI_MODEL", "meta-llama/llama-3.1-8b-instruct:free")
     
     # Image Generation Fallback
-    FLUX_IMAGE_URL = os.getenv("FLUX_IMAGE_URL", "https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-schnell")
-    FLUX_IMAGE_KEY = os.getenv("FLUX_IMAGE_KEY", "")
+    FLUX_IMAGE_URL = _ENV.get("FLUX_IMAGE_URL", "https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-schnell")
+    FLUX_IMAGE_KEY = _ENV.get("FLUX_IMAGE_KEY", "")
     
     # Special Models - NO hardcoded keys
-    MODEL_RESEARCH = os.getenv("MODEL_RESEARCH", "")
-    MODEL_RESEARCH_KEY = os.getenv("MODEL_RESEARCH_KEY", "")
+    MODEL_RESEARCH = _ENV.get("MODEL_RESEARCH", "")
+    MODEL_RESEARCH_KEY = _ENV.get("MODEL_RESEARCH_KEY", "")
     
     # Legacy Google Gemini (deprecated, kept for backwards compatibility)
-    GOOGLE_GEMINI_URL = os.getenv("GOOGLE_GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent")
-    GOOGLE_GEMINI_KEY = os.getenv("GOOGLE_GEMINI_KEY", "")
+    GOOGLE_GEMINI_URL = _ENV.get("GOOGLE_GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent")
+    GOOGLE_GEMINI_KEY = _ENV.get("GOOGLE_GEMINI_KEY", "")
 
     # Cache Configuration (24h TTL)
-    RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+    RESPONSE_CACHE_TTL_SECONDS = int(_ENV.get("RESPONSE_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
     
     # Batch Processing Configuration
-    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+    MAX_CONCURRENT_REQUESTS = int(_ENV.get("MAX_CONCURRENT_REQUESTS", "5"))
     
     # Proxy Configuration (optional)
-    HTTP_PROXY = os.getenv("HTTP_PROXY", "")
-    HTTPS_PROXY = os.getenv("HTTPS_PROXY", "")
+    HTTP_PROXY = _ENV.get("HTTP_PROXY", "")
+    HTTPS_PROXY = _ENV.get("HTTPS_PROXY", "")
 
     # Google Custom Search
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-    GOOGLE_CX = os.getenv("GOOGLE_CX", "")
+    GOOGLE_API_KEY = _ENV.get("GOOGLE_API_KEY", "")
+    GOOGLE_CX = _ENV.get("GOOGLE_CX", "")
 
     # Resend Email Service
-    RESEND_API_KEY = os.getenv("RESEND_API", "")
-    RESEND_FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL", "Orzion AI <noreply@orzionai.com>")
+    RESEND_API_KEY = _ENV.get("RESEND_API", "")
+    RESEND_FROM_EMAIL = _ENV.get("RESEND_FROM_EMAIL", "Orzion AI <noreply@orzionai.com>")
 
     # PayPal Payment Configuration
-    PAYPAL_CLIENT_ID = os.getenv("PAYPAL_CLIENT_ID", "")
-    PAYPAL_SECRET = os.getenv("PAYPAL_SECRET", "")
-    PAYPAL_MODE = os.getenv("PAYPAL_MODE", "sandbox")  # sandbox o live
+    PAYPAL_CLIENT_ID = _ENV.get("PAYPAL_CLIENT_ID", "")
+    PAYPAL_SECRET = _ENV.get("PAYPAL_SECRET", "")
+    PAYPAL_MODE = _ENV.get("PAYPAL_MODE", "sandbox")  # sandbox o live
+
+    # Env vars do not change in-process, so the status is computed once
+    _required_vars_status = None
 
     @classmethod
     def check_required_vars(cls) -> dict:
         """
         Check all required and optional environment variables.
         Returns dict with status and lists of missing variables.
+        The result is cached after the first call.
         """
+        if cls._required_vars_status is not None:
+            return cls._required_vars_status
+
         critical_vars = {
             "SUPABASE_URL": cls.SUPABASE_URL,
             "SUPABASE_ANON_KEY": cls.SUPABASE_ANON_KEY,
@@ -150,13 +161,14 @@ class Config:
         missing_important = [var for var, val in important_vars.items() if not val]
         missing_optional = [var for var, val in optional_vars.items() if not val]
 
-        return {
+        cls._required_vars_status = {
             "all_ok": len(missing_critical) == 0 and len(missing_important) == 0,
             "critical_ok": len(missing_critical) == 0,
             "missing_critical": missing_critical,
             "missing_important": missing_important,
             "missing_optional": missing_optional
         }
+        return cls._required_vars_status
 
     @classmethod
     def validate(cls):
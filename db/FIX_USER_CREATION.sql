@@ -54,8 +54,9 @@ BEGIN
         false,  -- orzion_pro_enabled (requires upgrade)
         true,   -- search_enabled
         30,     -- auto_archive_days
-        false,  -- terms_accepted
-        NULL,   -- terms_accepted_at
+        -- terms_accepted comes from the sign-up metadata (AuthService.sign_up)
+        COALESCE((NEW.raw_user_meta_data->>'terms_accepted')::boolean, false),
+        CASE WHEN (NEW.raw_user_meta_data->>'terms_accepted')::boolean THEN NOW() END,
         NOW(),
         NOW()
     );
@@ -0,0 +1,104 @@
+-- ============================================================================
+-- ORZION AI - ANALYTICS AGGREGATION FUNCTIONS
+-- ============================================================================
+-- Server-side aggregations used by routes/analytics_routes.py so analytics
+-- requests do not need one round-trip per conversation.
+-- Run this in Supabase SQL Editor.
+-- ============================================================================
+
+-- ============================================================================
+-- Message counts for a set of conversations (one round-trip)
+-- ============================================================================
+CREATE OR REPLACE FUNCTION count_messages_by_conversation(
+    p_conversation_ids BIGINT[]
+)
+RETURNS TABLE (conversation_id BIGINT, message_count BIGINT)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT m.conversation_id, COUNT(*) AS message_count
+    FROM messages m
+    WHERE m.conversation_id = ANY(p_conversation_ids)
+    GROUP BY m.conversation_id;
+$$;
+
+COMMENT ON FUNCTION count_messages_by_conversation IS 'Returns message counts grouped by conversation for the given conversation ids';
+
+-- Takes arbitrary conversation ids: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION count_messages_by_conversation(BIGINT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION count_messages_by_conversation(BIGINT[]) TO service_role;
+
+-- Supports the ANY(...) lookup above and per-conversation message fetches
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
+
+-- ============================================================================
+-- Full analytics summary for one user (one round-trip, O(1) rows to Python)
+-- ============================================================================
+-- Returns:
+--   {
+--     "total_conversations": int,
+--     "total_messages": int,
+--     "model_stats": {"<model>": {"count": int, "total_messages": int}},
+--     "recent_conversations": [<10 most recently updated conversation rows>]
+--   }
+CREATE OR REPLACE FUNCTION analytics_summary_for_user(
+    p_user_id UUID
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH user_conversations AS (
+        SELECT c.id, COALESCE(c.model, 'Unknown') AS model
+        FROM conversations c
+        WHERE c.user_id = p_user_id
+    ),
+    message_counts AS (
+        SELECT m.conversation_id, COUNT(*) AS message_count
+        FROM messages m
+        JOIN user_conversations uc ON uc.id = m.conversation_id
+        GROUP BY m.conversation_id
+    ),
+    per_model AS (
+        SELECT uc.model,
+               COUNT(*) AS conversation_count,
+               COALESCE(SUM(mc.message_count), 0) AS total_messages
+        FROM user_conversations uc
+        LEFT JOIN message_counts mc ON mc.conversation_id = uc.id
+        GROUP BY uc.model
+    )
+    SELECT jsonb_build_object(
+        'total_conversations', COALESCE((SELECT SUM(conversation_count) FROM per_model), 0),
+        'total_messages', COALESCE((SELECT SUM(total_messages) FROM per_model), 0),
+        'model_stats', COALESCE((
+            SELECT jsonb_object_agg(model, jsonb_build_object(
+                'count', conversation_count,
+                'total_messages', total_messages
+            ))
+            FROM per_model
+        ), '{}'::jsonb),
+        'recent_conversations', COALESCE((
+            SELECT jsonb_agg(to_jsonb(r) ORDER BY r.updated_at DESC)
+            FROM (
+                SELECT *
+                FROM conversations
+                WHERE user_id = p_user_id
+                ORDER BY updated_at DESC
+                LIMIT 10
+            ) r
+        ), '[]'::jsonb)
+    );
+$$;
+
+COMMENT ON FUNCTION analytics_summary_for_user IS 'Returns conversation/message totals, per-model stats and the 10 most recent conversations for a user';
+
+-- Reads any user's conversations: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION analytics_summary_for_user(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION analytics_summary_for_user(UUID) TO service_role;
+
+-- Supports the per-user scan and the "most recent" ordering above
+CREATE INDEX IF NOT EXISTS idx_conversations_user_updated_at ON conversations(user_id, updated_at DESC);
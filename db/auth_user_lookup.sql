@@ -0,0 +1,63 @@
+-- ============================================================================
+-- ORZION AI - AUTH USER LOOKUP BY EMAIL
+-- ============================================================================
+-- Single-row lookup used by services/email_service.py (resend verification,
+-- password reset, magic link) instead of listing every auth user.
+-- Run this in Supabase SQL Editor.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION get_auth_user_by_email(
+    p_email TEXT
+)
+RETURNS TABLE (
+    id UUID,
+    email TEXT,
+    email_confirmed_at TIMESTAMPTZ,
+    user_metadata JSONB
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, auth
+AS $$
+    -- Supabase Auth stores emails lowercased and indexes auth.users(email)
+    SELECT u.id, u.email::TEXT, u.email_confirmed_at, u.raw_user_meta_data
+    FROM auth.users u
+    WHERE u.email = lower(p_email)
+    LIMIT 1;
+$$;
+
+COMMENT ON FUNCTION get_auth_user_by_email IS 'Returns id, email, confirmation time and metadata of the auth user with the given email';
+
+-- Exposes auth data: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION get_auth_user_by_email(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_auth_user_by_email(TEXT) TO service_role;
+
+-- ============================================================================
+-- Account details missing from the session JWT
+-- ============================================================================
+-- Used by AuthService.get_user_from_local_token: a locally verified token has
+-- no confirmation or creation date, so both come from auth.users in one call.
+CREATE OR REPLACE FUNCTION get_auth_user_by_id(
+    p_user_id UUID
+)
+RETURNS TABLE (
+    id UUID,
+    email_confirmed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, auth
+AS $$
+    SELECT u.id, u.email_confirmed_at, u.created_at
+    FROM auth.users u
+    WHERE u.id = p_user_id;
+$$;
+
+COMMENT ON FUNCTION get_auth_user_by_id IS 'Returns confirmation and creation time of the auth user with the given id';
+
+-- Exposes auth data: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION get_auth_user_by_id(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_auth_user_by_id(UUID) TO service_role;
@@ -0,0 +1,34 @@
+-- ============================================================================
+-- ORZION AI - CONVERSATION LIST VIEW
+-- ============================================================================
+-- Conversation rows plus a preview of the latest message and the message
+-- count, so GET /conversations gives the sidebar everything it shows without
+-- one messages request per conversation.
+-- Run this in Supabase SQL Editor.
+-- ============================================================================
+
+CREATE OR REPLACE VIEW conversations_list_v
+WITH (security_invoker = true)
+AS
+SELECT
+    c.*,
+    last_msg.last_message,
+    COALESCE(counts.message_count, 0) AS message_count
+FROM conversations c
+LEFT JOIN LATERAL (
+    SELECT left(m.content, 200) AS last_message
+    FROM messages m
+    WHERE m.conversation_id = c.id
+    ORDER BY m.created_at DESC
+    LIMIT 1
+) last_msg ON true
+LEFT JOIN LATERAL (
+    SELECT COUNT(*) AS message_count
+    FROM messages m
+    WHERE m.conversation_id = c.id
+) counts ON true;
+
+COMMENT ON VIEW conversations_list_v IS 'Conversations with a 200-character preview of the latest message and the message count';
+
+-- Latest-message lookup per conversation
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created_at ON messages(conversation_id, created_at DESC);
@@ -0,0 +1,53 @@
+-- ============================================================================
+-- ORZION AI - CONVERSATION SEARCH
+-- ============================================================================
+-- Server-side search used by GET /conversations/search so the route does not
+-- fetch every conversation's messages (one round-trip per conversation).
+-- Run this in Supabase SQL Editor.
+-- ============================================================================
+
+-- Trigram indexes let ILIKE '%term%' use an index instead of a full scan
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ============================================================================
+-- Conversations whose title or any message contains the query
+-- ============================================================================
+-- Case-insensitive substring match (same semantics as the previous Python
+-- loop); LIKE wildcards in the query are matched literally. Results are
+-- ordered like list_conversations (most recently updated first).
+CREATE OR REPLACE FUNCTION search_user_conversations(
+    p_user_id UUID,
+    p_query TEXT
+)
+RETURNS SETOF conversations
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH pattern AS (
+        SELECT '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS value
+    )
+    SELECT c.*
+    FROM conversations c, pattern p
+    WHERE c.user_id = p_user_id
+      AND (
+          c.title ILIKE p.value
+          OR EXISTS (
+              SELECT 1
+              FROM messages m
+              WHERE m.conversation_id = c.id
+                AND m.content ILIKE p.value
+          )
+      )
+    ORDER BY c.updated_at DESC;
+$$;
+
+COMMENT ON FUNCTION search_user_conversations IS 'Returns the user''s conversations whose title or messages contain the query (case-insensitive)';
+
+-- Reads any user's conversations: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION search_user_conversations(UUID, TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION search_user_conversations(UUID, TEXT) TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_conversations_title_trgm ON conversations USING gin (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_messages_content_trgm ON messages USING gin (content gin_trgm_ops);
@@ -0,0 +1,58 @@
+-- ============================================================================
+-- ORZION AI - FEEDBACK AGGREGATION FUNCTIONS
+-- ============================================================================
+-- Server-side aggregation used by GET /api/feedback/my-stats so the route
+-- does not pull a user's whole feedback history into Python.
+-- Run this in Supabase SQL Editor (after feedback_schema.sql).
+-- ============================================================================
+
+-- Returns:
+--   {
+--     "total_feedback": int,
+--     "average_rating": numeric (2 decimals, 0 when there is no feedback),
+--     "by_category": {"<category>": int},
+--     "recent_feedback": [<10 newest {rating, category, created_at}>]
+--   }
+CREATE OR REPLACE FUNCTION feedback_stats_for_user(
+    p_user_id UUID
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    WITH per_category AS (
+        SELECT category, COUNT(*) AS feedback_count, SUM(rating) AS rating_sum
+        FROM user_feedback
+        WHERE user_id = p_user_id
+        GROUP BY category
+    )
+    SELECT jsonb_build_object(
+        'total_feedback', COALESCE((SELECT SUM(feedback_count) FROM per_category), 0),
+        'average_rating', COALESCE((
+            SELECT ROUND(SUM(rating_sum)::numeric / SUM(feedback_count), 2)
+            FROM per_category
+        ), 0),
+        'by_category', COALESCE((
+            SELECT jsonb_object_agg(category, feedback_count)
+            FROM per_category
+        ), '{}'::jsonb),
+        'recent_feedback', COALESCE((
+            SELECT jsonb_agg(to_jsonb(r) ORDER BY r.created_at DESC)
+            FROM (
+                SELECT rating, category, created_at
+                FROM user_feedback
+                WHERE user_id = p_user_id
+                ORDER BY created_at DESC
+                LIMIT 10
+            ) r
+        ), '[]'::jsonb)
+    );
+$$;
+
+COMMENT ON FUNCTION feedback_stats_for_user IS 'Returns feedback count, average rating, per-category counts and the 10 newest entries for a user';
+
+-- Reads any user's feedback: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION feedback_stats_for_user(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION feedback_stats_for_user(UUID) TO service_role;
@@ -0,0 +1,31 @@
+-- ============================================================================
+-- ORZION AI - HOT PATH INDEXES
+-- ============================================================================
+-- Composite indexes for the most frequent lookups in
+-- middleware/security_middleware.py:
+--   * check_rate_limit:          rate_limits WHERE user_id AND model AND reset_at > now
+--   * check_suspicious_activity: audit_logs WHERE action = 'user_register'
+--                                AND ip_address AND created_at >= now - 1h
+-- and for per-user feedback (routes/feedback_routes.py). Conversations are
+-- covered by idx_conversations_user_updated_at (analytics_functions.sql).
+--
+-- CONCURRENTLY avoids locking these busy tables while the index builds, but it
+-- cannot run inside a transaction: execute each statement on its own
+-- (Supabase SQL Editor, one at a time, or psql).
+-- ============================================================================
+
+-- Rate limit window lookup (supersedes idx_rate_limits_user_model)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rate_limits_user_model_reset
+    ON rate_limits (user_id, model, reset_at DESC);
+
+-- Registrations per IP; partial so only sign-up events are indexed
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_logs_register_ip_created
+    ON audit_logs (action, ip_address, created_at DESC)
+    WHERE action = 'user_register';
+
+-- Per-user feedback, newest first (GET /api/feedback/my-stats)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_feedback_user_created
+    ON user_feedback (user_id, created_at DESC);
+
+-- Optional, once the composite index above is in place:
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_rate_limits_user_model;
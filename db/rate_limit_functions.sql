@@ -0,0 +1,157 @@
+-- ============================================================================
+-- ORZION AI - ATOMIC RATE LIMIT CHECK
+-- ============================================================================
+-- Replaces the SELECT user_settings + SELECT rate_limits + UPDATE/INSERT
+-- sequence in SecurityMiddleware.check_rate_limit with one round-trip.
+-- A per (user, model) transaction-scoped advisory lock serializes concurrent
+-- requests, so two requests can no longer both read the same count.
+-- Run this in Supabase SQL Editor (after SUPABASE_RATE_LIMITS.sql).
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION check_and_increment_rate_limit(
+    p_user_id UUID,
+    p_model VARCHAR(100),
+    p_max_requests INTEGER,
+    p_window_hours INTEGER
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_max_requests INTEGER := p_max_requests;
+    v_created_at TIMESTAMPTZ;
+    v_new_account BOOLEAN := FALSE;
+    v_record_id BIGINT;
+    v_request_count INTEGER;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(p_user_id::TEXT || ':' || p_model));
+
+    -- STRICT SECURITY: accounts younger than 24h get 50% of the limit
+    SELECT created_at INTO v_created_at
+    FROM user_settings
+    WHERE user_id = p_user_id
+    LIMIT 1;
+
+    IF v_created_at IS NOT NULL AND v_created_at > NOW() - INTERVAL '24 hours' THEN
+        v_new_account := TRUE;
+        v_max_requests := GREATEST(1, p_max_requests / 2);
+    END IF;
+
+    SELECT id, request_count INTO v_record_id, v_request_count
+    FROM rate_limits
+    WHERE user_id = p_user_id
+      AND model = p_model
+      AND reset_at > NOW()
+    LIMIT 1;
+
+    IF v_record_id IS NOT NULL THEN
+        IF v_request_count >= v_max_requests THEN
+            RETURN jsonb_build_object(
+                'allowed', FALSE,
+                'max_requests', v_max_requests,
+                'new_account', v_new_account
+            );
+        END IF;
+
+        UPDATE rate_limits
+        SET request_count = request_count + 1,
+            last_request = NOW()
+        WHERE id = v_record_id;
+    ELSE
+        INSERT INTO rate_limits (user_id, model, request_count, last_request, reset_at)
+        VALUES (p_user_id, p_model, 1, NOW(), NOW() + make_interval(hours => p_window_hours));
+    END IF;
+
+    RETURN jsonb_build_object(
+        'allowed', TRUE,
+        'max_requests', v_max_requests,
+        'new_account', v_new_account
+    );
+END;
+$$;
+
+COMMENT ON FUNCTION check_and_increment_rate_limit IS 'Atomically checks and increments the per-model rate limit window for a user';
+
+-- Writes any user's rate-limit window: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION check_and_increment_rate_limit(UUID, VARCHAR, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION check_and_increment_rate_limit(UUID, VARCHAR, INTEGER, INTEGER) TO service_role;
+
+-- ============================================================================
+-- ATOMIC DAILY USAGE CHECK (RateLimitService.check_rate_limit)
+-- ============================================================================
+-- Replaces SELECT model_usage_daily + increment_daily_usage() with one
+-- round-trip: read today's counters, enforce the daily message/token limits
+-- and, when allowed, increment them. -1 means unlimited. The advisory lock
+-- serializes concurrent requests for the same (user, model, day).
+-- Requires model_usage_daily from update_usage_limits_2024.sql.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION check_and_increment_daily_usage(
+    p_user_id UUID,
+    p_model VARCHAR(50),
+    p_date DATE,
+    p_tokens INTEGER,
+    p_messages_limit INTEGER,
+    p_tokens_limit INTEGER
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_messages_used INTEGER := 0;
+    v_tokens_used INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(p_user_id::TEXT || ':' || p_model || ':' || p_date::TEXT));
+
+    SELECT messages_used, tokens_used
+    INTO v_messages_used, v_tokens_used
+    FROM model_usage_daily
+    WHERE user_id = p_user_id AND model = p_model AND date = p_date;
+
+    v_messages_used := COALESCE(v_messages_used, 0);
+    v_tokens_used := COALESCE(v_tokens_used, 0);
+
+    IF p_messages_limit <> -1 AND v_messages_used >= p_messages_limit THEN
+        RETURN jsonb_build_object(
+            'allowed', FALSE,
+            'reason', 'messages_limit',
+            'messages_used', v_messages_used,
+            'tokens_used', v_tokens_used
+        );
+    END IF;
+
+    IF p_tokens_limit <> -1 AND v_tokens_used + p_tokens > p_tokens_limit THEN
+        RETURN jsonb_build_object(
+            'allowed', FALSE,
+            'reason', 'tokens_limit',
+            'messages_used', v_messages_used,
+            'tokens_used', v_tokens_used
+        );
+    END IF;
+
+    INSERT INTO model_usage_daily (user_id, model, date, messages_used, tokens_used, last_request_at)
+    VALUES (p_user_id, p_model, p_date, 1, p_tokens, NOW())
+    ON CONFLICT (user_id, model, date)
+    DO UPDATE SET
+        messages_used = model_usage_daily.messages_used + 1,
+        tokens_used = model_usage_daily.tokens_used + p_tokens,
+        last_request_at = NOW()
+    RETURNING messages_used, tokens_used INTO v_messages_used, v_tokens_used;
+
+    RETURN jsonb_build_object(
+        'allowed', TRUE,
+        'messages_used', v_messages_used,
+        'tokens_used', v_tokens_used
+    );
+END;
+$$;
+
+COMMENT ON FUNCTION check_and_increment_daily_usage IS 'Atomically enforces daily message/token limits and increments usage in one call';
+
+-- Caller supplies the limits and token count: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION check_and_increment_daily_usage(UUID, VARCHAR, DATE, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION check_and_increment_daily_usage(UUID, VARCHAR, DATE, INTEGER, INTEGER, INTEGER) TO service_role;
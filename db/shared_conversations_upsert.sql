@@ -0,0 +1,60 @@
+-- ============================================================================
+-- ORZION AI - IDEMPOTENT SHARE LINKS
+-- ============================================================================
+-- One current share link per conversation: POST /conversations/{id}/share
+-- returns the current token (with its expiry extended) instead of inserting a
+-- new row on every click or client retry.
+-- Run this in Supabase SQL Editor.
+-- ============================================================================
+
+-- Links already handed out must keep working, so duplicate rows are not
+-- deleted: every row stays resolvable by share_token, and only the newest one
+-- per conversation (latest expiry; NULL never expires, so it sorts last) is
+-- flagged is_current. Uniqueness applies to current rows only.
+ALTER TABLE shared_conversations
+    ADD COLUMN IF NOT EXISTS is_current BOOLEAN NOT NULL DEFAULT TRUE;
+
+UPDATE shared_conversations s
+SET is_current = FALSE
+FROM shared_conversations newer
+WHERE newer.conversation_id = s.conversation_id
+  AND s.is_current
+  AND (COALESCE(newer.expires_at, 'infinity'::TIMESTAMPTZ), newer.ctid)
+    > (COALESCE(s.expires_at, 'infinity'::TIMESTAMPTZ), s.ctid);
+
+-- An earlier version of this migration used a table-wide UNIQUE constraint
+ALTER TABLE shared_conversations
+    DROP CONSTRAINT IF EXISTS shared_conversations_conversation_id_key;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_shared_conversations_current
+    ON shared_conversations (conversation_id)
+    WHERE is_current;
+
+-- ============================================================================
+-- Create or refresh a conversation's share link (one round-trip)
+-- ============================================================================
+-- Returns the link's token: p_share_token for a new link, the existing token
+-- otherwise, so links already handed out keep working.
+CREATE OR REPLACE FUNCTION upsert_conversation_share(
+    p_conversation_id BIGINT,
+    p_created_by UUID,
+    p_share_token TEXT,
+    p_expires_at TIMESTAMPTZ
+)
+RETURNS TEXT
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    INSERT INTO shared_conversations (conversation_id, share_token, created_by, expires_at, views)
+    VALUES (p_conversation_id, p_share_token, p_created_by, p_expires_at, 0)
+    ON CONFLICT (conversation_id) WHERE is_current
+    DO UPDATE SET expires_at = EXCLUDED.expires_at
+    RETURNING share_token;
+$$;
+
+COMMENT ON FUNCTION upsert_conversation_share IS 'Creates a conversation share link or extends the existing one, returning its token';
+
+-- Writes share links for any conversation: only the backend (service role) may call it
+REVOKE EXECUTE ON FUNCTION upsert_conversation_share(BIGINT, UUID, TEXT, TIMESTAMPTZ) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION upsert_conversation_share(BIGINT, UUID, TEXT, TIMESTAMPTZ) TO service_role;
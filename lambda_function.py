@@ -1,11 +1,103 @@
-
 """
 AWS Lambda Handler for Orzion Chat Backend
 Adapts FastAPI application to AWS Lambda using Mangum
 """
 
+import os
+import logging
+
 from mangum import Mangum
+
+# The Lambda runtime already attaches a handler to the root logger; only set the
+# level once per container instead of reconfiguring logging per invocation
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+# Imported at module scope so the app is built once per container (during the
+# init phase) and reused by every warm invocation
 from app import app
+from services.supabase_service import SupabaseService
+from services.audit_service import audit_writer
+
+# lifespan="off" skips the app's startup hook, so build the shared Supabase
+# clients here, during the init phase, instead of on the first invocation
+SupabaseService.warm_up()
+
+# API_GATEWAY_BASE_PATH strips a custom-domain base path / stage prefix before routing
+_API_GATEWAY_BASE_PATH = os.getenv("API_GATEWAY_BASE_PATH", "/")
+_mangum_handler = Mangum(
+    app,
+    lifespan="off",
+    api_gateway_base_path=_API_GATEWAY_BASE_PATH
+)
+
+# Idempotent GET routes whose responses only change on deploy. A warm container
+# answers repeats of these from memory without running the ASGI pipeline.
+_CACHEABLE_PATHS = frozenset({
+    "/",
+    "/robots.txt",
+    "/sitemap.xml",
+    "/manifest.json",
+    "/live",
+    "/api/config",
+})
+_RESPONSE_CACHE_MAX_SIZE = 128
+_response_cache: dict = {}
+
+
+def _strip_base_path(path: str) -> str:
+    """Remove API_GATEWAY_BASE_PATH from the event path, as Mangum does before routing."""
+    if not path:
+        return "/"
+    base_path = _API_GATEWAY_BASE_PATH
+    if base_path and base_path != "/":
+        if not base_path.startswith("/"):
+            base_path = f"/{base_path}"
+        if path.startswith(base_path):
+            path = path[len(base_path):]
+    return path or "/"
+
+
+def _cache_key(event: dict):
+    """
+    Return the cache key for a cacheable request, or None.
+    Supports both REST API (v1) and HTTP API (v2) event formats.
+    """
+    http_context = (event.get("requestContext") or {}).get("http") or {}
+    method = event.get("httpMethod") or http_context.get("method")
+    path = _strip_base_path(event.get("path") or event.get("rawPath"))
+
+    if method != "GET" or path not in _CACHEABLE_PATHS:
+        return None
+    if event.get("queryStringParameters") or event.get("rawQueryString"):
+        return None
+
+    # CORS response headers depend on the Origin, so it is part of the key
+    headers = event.get("headers") or {}
+    origin = headers.get("origin") or headers.get("Origin")
+    return (path, origin)
+
+
+def handler(event, context):
+    """Lambda entry point with a per-container cache for idempotent GET routes."""
+    key = _cache_key(event)
+    if key is not None:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = _mangum_handler(event, context)
+
+    # lifespan="off" means the shutdown flush never runs, and the container can
+    # be frozen as soon as we return: write queued audit rows now
+    try:
+        audit_writer.flush_blocking()
+    except Exception as e:
+        logging.getLogger(__name__).warning("⚠️ Audit flush failed (non-critical): %s", e)
+
+    if key is not None and response.get("statusCode") == 200:
+        if len(_response_cache) >= _RESPONSE_CACHE_MAX_SIZE:
+            # FIFO eviction: dicts keep insertion order
+            _response_cache.pop(next(iter(_response_cache)))
+        _response_cache[key] = response
 
-# Create Lambda handler
-handler = Mangum(app, lifespan="off")
+    return response
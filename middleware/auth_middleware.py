@@ -5,8 +5,43 @@ Handles authentication with Supabase Auth
 
 from fastapi import Request, HTTPException, status
 from typing import Optional
+import hashlib
+import logging
+import time
+from cachetools import TTLCache
+from jose import jwt, JWTError
 from services.auth_service import AuthService
 
+logger = logging.getLogger(__name__)
+
+# Verified users keyed by a digest of the access token (the raw token is never stored).
+# A short TTL bounds how long a revoked token can keep working on this instance.
+# Entries are (user, expires_at) so a token never outlives its own `exp` claim.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL_SECONDS)
+
+
+# Locally verified tokens stay valid until they expire, so logged-out tokens are
+# remembered here for the longest default Supabase session lifetime.
+REVOKED_TOKEN_TTL_SECONDS = 3600
+_revoked_tokens = TTLCache(maxsize=10000, ttl=REVOKED_TOKEN_TTL_SECONDS)
+
+
+def _token_cache_key(access_token: str) -> bytes:
+    return hashlib.sha256(access_token.encode()).digest()[:16]
+
+
+def _cache_expiry(access_token: str, now: float) -> float:
+    """Cache deadline: the TTL, or the token's `exp` claim if that comes first.
+    The claim is read without verifying the signature; Supabase already
+    verified the token, this only bounds how long it is remembered."""
+    deadline = now + USER_CACHE_TTL_SECONDS
+    try:
+        exp = jwt.get_unverified_claims(access_token).get("exp")
+    except JWTError:
+        return deadline
+    return min(deadline, float(exp)) if exp else deadline
+
 class AuthMiddleware:
 
     @staticmethod
@@ -14,20 +49,52 @@ class AuthMiddleware:
         """
         Get current user from Supabase access token.
         Returns user dict or None if not authenticated.
+        Verified users are cached briefly so repeat requests skip the Supabase round-trip.
         """
         try:
             access_token = request.cookies.get("access_token")
 
+            # Hash and probe the cache even without a cookie so anonymous and
+            # cached requests cost the same; lookups only ever compare digests
+            cache_key = _token_cache_key(access_token or "")
+            cached = _user_cache.get(cache_key)
+            now = time.time()
+
             if not access_token:
                 return None
 
-            user = await AuthService.get_user_from_token(access_token)
+            if cached is not None:
+                user, expires_at = cached
+                if now < expires_at:
+                    return user
+                _user_cache.pop(cache_key, None)
+
+            if _revoked_tokens.get(cache_key):
+                return None
+
+            # Verify the signature locally when possible; otherwise ask Supabase Auth
+            if AuthService.can_verify_locally(access_token):
+                user = await AuthService.get_user_from_local_token(access_token)
+            else:
+                user = await AuthService.get_user_from_token(access_token)
+            if user:
+                expires_at = _cache_expiry(access_token, now)
+                if now < expires_at:
+                    _user_cache[cache_key] = (user, expires_at)
             return user
 
         except Exception as e:
-            print(f"❌ Error in get_current_user: {e}")
+            logger.error("❌ Error in get_current_user: %s", e)
             return None
 
+    @staticmethod
+    def invalidate_token(access_token: Optional[str]) -> None:
+        """Drop a token's cached user and reject it from now on (e.g. on logout)."""
+        if access_token:
+            cache_key = _token_cache_key(access_token)
+            _user_cache.pop(cache_key, None)
+            _revoked_tokens[cache_key] = True
+
     @staticmethod
     async def require_auth(request: Request) -> dict:
         """
@@ -38,23 +105,13 @@ class AuthMiddleware:
         if request.method == "OPTIONS":
             return {}
 
-        try:
-            user = await AuthMiddleware.get_current_user(request)
+        # get_current_user never raises: lookup failures come back as None
+        user = await AuthMiddleware.get_current_user(request)
 
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="No autenticado. Por favor inicia sesión."
-                )
-
-            return user
-        except HTTPException as e:
-            # Re-raise HTTPException to be handled by FastAPI
-            raise e
-        except Exception as e:
-            # Handle other exceptions, e.g., invalid token format
-            print(f"❌ Error in require_auth: {e}")
+        if not user:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error interno del servidor al autenticar."
-            )
\ No newline at end of file
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="No autenticado. Por favor inicia sesión."
+            )
+
+        return user
@@ -3,10 +3,26 @@ Security middleware for input sanitization and validation
 """
 
 import re
-from typing import Optional
+import string
+import logging
+from typing import Dict, Optional
 from datetime import datetime, timedelta
 import html
+from fastapi import Request
 from services.supabase_service import get_supabase_service
+from services.audit_service import AuditLogService
+
+logger = logging.getLogger(__name__)
+
+# Validation patterns are compiled once at import
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# ASCII character classes for the single-pass password strength scan
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+_ASCII_DIGITS = frozenset(string.digits)
+
+# Characters that sanitize_input strips or HTML-escapes
+_ESCAPE_CHARS = frozenset('<>&"\'\x00')
 
 
 class SecurityMiddleware:
@@ -29,6 +45,10 @@ class SecurityMiddleware:
         # Truncate to max length
         text = text[:max_length]
 
+        # Most input has nothing to strip or escape: return it without copying
+        if _ESCAPE_CHARS.isdisjoint(text):
+            return text
+
         # Remove null bytes
         text = text.replace('\x00', '')
 
@@ -51,10 +71,17 @@ class SecurityMiddleware:
         if not email or len(email) > 255:
             return False
 
-        # Basic email regex pattern
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+        # Cheap structural checks reject most malformed input before the regex:
+        # exactly one '@', a non-empty local part and a dotted domain
+        at = email.find('@')
+        if at <= 0 or email.find('@', at + 1) != -1:
+            return False
+        domain = email[at + 1:]
+        if '.' not in domain or domain.endswith('.'):
+            return False
 
-        return bool(re.match(pattern, email))
+        # Basic email regex pattern
+        return bool(_EMAIL_RE.match(email))
 
     @staticmethod
     def validate_password(password: str) -> tuple[bool, Optional[str]]:
@@ -77,8 +104,18 @@ class SecurityMiddleware:
             return False, "La contraseña es demasiado larga"
 
         # Check for at least one letter and one number
-        has_letter = bool(re.search(r'[a-zA-Z]', password))
-        has_number = bool(re.search(r'[0-9]', password))
+        # Single pass that stops as soon as both a letter and a digit were seen
+        has_letter = False
+        has_number = False
+        for char in password:
+            if char in _ASCII_LETTERS:
+                has_letter = True
+            elif char in _ASCII_DIGITS:
+                has_number = True
+            else:
+                continue
+            if has_letter and has_number:
+                break
 
         if not (has_letter and has_number):
             return False, "La contraseña debe contener al menos una letra y un número"
@@ -107,7 +144,49 @@ class SecurityMiddleware:
         """
         try:
             supabase = get_supabase_service()
-            now = datetime.utcnow().isoformat()
+
+            # Single atomic round-trip (db/rate_limit_functions.sql)
+            try:
+                response = supabase.rpc('check_and_increment_rate_limit', {
+                    'p_user_id': user_id,
+                    'p_model': model,
+                    'p_max_requests': max_requests,
+                    'p_window_hours': time_window_hours
+                }).execute()
+            except Exception as rpc_error:
+                logger.warning("⚠️ Rate limit RPC unavailable, using table queries: %s", rpc_error)
+                return await SecurityMiddleware._check_rate_limit_with_queries(
+                    supabase, user_id, model, max_requests, time_window_hours
+                )
+
+            result = response.data or {}
+
+            if result.get('new_account'):
+                logger.info("🔒 SECURITY: New account detected, reduced limit to %s", result.get('max_requests'))
+
+            if result.get('allowed') is False:
+                return False, f"Rate limit exceeded for {model}. Try again later."
+
+            return True, None
+
+        except Exception as e:
+            logger.warning("⚠️ Rate limit check failed (non-critical): %s", e)
+            # Allow request on error to avoid blocking users
+            return True, None
+
+    @staticmethod
+    async def _check_rate_limit_with_queries(
+        supabase,
+        user_id: str,
+        model: str,
+        max_requests: int,
+        time_window_hours: int
+    ) -> tuple[bool, Optional[str]]:
+        """Multi-query rate limit check, used when the atomic RPC is not deployed."""
+        try:
+            # One clock read per check, reused for every comparison and timestamp
+            now_dt = datetime.utcnow()
+            now = now_dt.isoformat()
 
             # STRICT SECURITY: Check if account is new (< 24 hours)
             try:
@@ -117,15 +196,16 @@ class SecurityMiddleware:
                     .execute()
                 
                 if user_response.data and len(user_response.data) > 0:
-                    created_at = datetime.fromisoformat(user_response.data[0]['created_at'].replace('Z', '+00:00'))
-                    account_age_hours = (datetime.utcnow() - created_at.replace(tzinfo=None)).total_seconds() / 3600
+                    created_at_raw = user_response.data[0]['created_at']
+                    created_at = datetime.fromisoformat(created_at_raw[:-1] if created_at_raw.endswith('Z') else created_at_raw)
+                    account_age_hours = (now_dt - created_at.replace(tzinfo=None)).total_seconds() / 3600
                     
                     # New accounts get 50% reduced limits for first 24 hours
                     if account_age_hours < 24:
                         max_requests = max(1, int(max_requests * 0.5))
-                        print(f"🔒 SECURITY: New account detected ({account_age_hours:.1f}h old), reduced limit to {max_requests}")
+                        logger.info("🔒 SECURITY: New account detected (%.1fh old), reduced limit to %s", account_age_hours, max_requests)
             except Exception as age_check_error:
-                print(f"⚠️ Could not check account age: {age_check_error}")
+                logger.warning("⚠️ Could not check account age: %s", age_check_error)
 
             # Get current rate limit record that hasn't expired
             response = supabase.table('rate_limits')\
@@ -152,7 +232,7 @@ class SecurityMiddleware:
                     .execute()
             else:
                 # Create new rate limit record
-                reset_at = (datetime.utcnow() + timedelta(hours=time_window_hours)).isoformat()
+                reset_at = (now_dt + timedelta(hours=time_window_hours)).isoformat()
 
                 supabase.table('rate_limits')\
                     .insert({
@@ -167,7 +247,7 @@ class SecurityMiddleware:
             return True, None
 
         except Exception as e:
-            print(f"⚠️ Rate limit check failed (non-critical): {e}")
+            logger.warning("⚠️ Rate limit check failed (non-critical): %s", e)
             # Allow request on error to avoid blocking users
             return True, None
     
@@ -197,13 +277,13 @@ class SecurityMiddleware:
                 .execute()
             
             if ip_registrations.data and len(ip_registrations.data) > 3:
-                print(f"⚠️ SECURITY ALERT: Multiple registrations from IP {ip_address}")
+                logger.warning("⚠️ SECURITY ALERT: Multiple registrations from IP %s", ip_address)
                 return False, "Too many accounts created from this IP. Please try again later."
             
             return True, None
             
         except Exception as e:
-            print(f"⚠️ Suspicious activity check failed: {e}")
+            logger.warning("⚠️ Suspicious activity check failed: %s", e)
             return True, None
 
     @staticmethod
@@ -231,8 +311,6 @@ class SecurityMiddleware:
         Returns:
             True if logged successfully
         """
-        from services.audit_service import AuditLogService
-
         return await AuditLogService.log_audit(
             user_id=user_id,
             action=action,
@@ -248,11 +326,22 @@ class SecurityMiddleware:
         """Get client IP address from request."""
         forwarded = request.headers.get("X-Forwarded-For")
         if forwarded:
-            return forwarded.split(",")[0].strip()
+            return forwarded.partition(",")[0].strip()
 
         return request.client.host if request.client else "unknown"
 
     @staticmethod
     def get_user_agent(request) -> str:
         """Get user agent from request."""
-        return request.headers.get("User-Agent", "unknown")
\ No newline at end of file
+        return request.headers.get("User-Agent", "unknown")
+
+    @staticmethod
+    async def audit_context(request: Request) -> Dict[str, str]:
+        """
+        FastAPI dependency: the client IP and user agent, resolved once per
+        request, as keyword arguments for log_audit.
+        """
+        return {
+            "ip_address": SecurityMiddleware.get_client_ip(request),
+            "user_agent": SecurityMiddleware.get_user_agent(request)
+        }
@@ -2,36 +2,35 @@
 Analytics routes for usage statistics
 """
 
+import logging
 from fastapi import APIRouter, Depends
 from middleware.auth_middleware import AuthMiddleware
-from services.conversation_service import ConversationService
+from services.conversation_service import ConversationService, analytics_cache
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/analytics/usage")
 async def get_usage_analytics(user: dict = Depends(AuthMiddleware.require_auth)):
     """Get usage analytics for the current user."""
+    cache_key = (user['id'], 'usage')
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        conversations = await ConversationService.list_conversations(
-            user['id'], 
-            include_archived=True
-        )
-        
-        total_conversations = len(conversations)
-        total_messages = 0
-        models_used = {}
-        
-        for conv in conversations:
-            messages = await ConversationService.get_messages(conv['id'])
-            total_messages += len(messages)
-            
-            model = conv.get('model', 'Unknown')
-            models_used[model] = models_used.get(model, 0) + 1
-        
-        recent_conversations = [c for c in conversations[:10]]
+        summary = await ConversationService.aggregate_for_user(user['id'])
+
+        total_conversations = summary["total_conversations"]
+        total_messages = summary["total_messages"]
+        models_used = {
+            model: stats["count"] for model, stats in summary["model_stats"].items()
+        }
+        recent_conversations = summary["recent_conversations"]
         
-        return {
+        result = {
             "success": True,
             "analytics": {
                 "total_conversations": total_conversations,
@@ -41,8 +40,10 @@ async def get_usage_analytics(user: dict = Depends(AuthMiddleware.require_auth))
                 "recent_conversations": recent_conversations
             }
         }
+        analytics_cache[cache_key] = result
+        return result
     except Exception as e:
-        print(f"❌ Error getting analytics: {e}")
+        logger.exception("❌ Error getting analytics: %s", e)
         return {
             "success": False,
             "error": str(e)
@@ -51,32 +52,23 @@ async def get_usage_analytics(user: dict = Depends(AuthMiddleware.require_auth))
 @router.get("/analytics/models")
 async def get_model_analytics(user: dict = Depends(AuthMiddleware.require_auth)):
     """Get model usage statistics."""
+    cache_key = (user['id'], 'models')
+    cached = analytics_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        conversations = await ConversationService.list_conversations(
-            user['id'],
-            include_archived=True
-        )
+        summary = await ConversationService.aggregate_for_user(user['id'])
+        model_stats = summary["model_stats"]
         
-        model_stats = {}
-        
-        for conv in conversations:
-            model = conv.get('model', 'Unknown')
-            if model not in model_stats:
-                model_stats[model] = {
-                    "count": 0,
-                    "total_messages": 0
-                }
-            
-            model_stats[model]["count"] += 1
-            messages = await ConversationService.get_messages(conv['id'])
-            model_stats[model]["total_messages"] += len(messages)
-        
-        return {
+        result = {
             "success": True,
             "model_stats": model_stats
         }
+        analytics_cache[cache_key] = result
+        return result
     except Exception as e:
-        print(f"❌ Error getting model analytics: {e}")
+        logger.exception("❌ Error getting model analytics: %s", e)
         return {
             "success": False,
             "error": str(e)
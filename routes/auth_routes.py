@@ -3,9 +3,11 @@ Authentication routes for login, register, and Google OAuth using Supabase Auth
 """
 
 from fastapi import APIRouter, HTTPException, Response, Request, status, Depends
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+import re
+import time
+import logging
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from services.auth_service import AuthService
@@ -14,8 +16,78 @@ from middleware.auth_middleware import AuthMiddleware
 from middleware.security_middleware import SecurityMiddleware
 from config import config
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Certs endpoint used by id_token.verify_oauth2_token
+_GOOGLE_OAUTH2_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class _CertCachingGoogleRequest(google_requests.Request):
+    """
+    Google transport that keeps GET responses for the OAuth2 signing certs in
+    memory for their Cache-Control max-age, so token verification is a local
+    signature check instead of a network fetch on every sign-in.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cached_certs = None
+        self._cached_certs_expiry = 0.0
+
+    def __call__(self, url, method="GET", **kwargs):
+        if method != "GET" or url != _GOOGLE_OAUTH2_CERTS_URL:
+            return super().__call__(url, method=method, **kwargs)
+
+        now = time.monotonic()
+        if self._cached_certs is not None and now < self._cached_certs_expiry:
+            return self._cached_certs
+
+        response = super().__call__(url, method=method, **kwargs)
+        if response.status == 200:
+            max_age = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+            self._cached_certs = response
+            self._cached_certs_expiry = now + (int(max_age.group(1)) if max_age else 0)
+        return response
+
+
+# One transport per process: reuses the HTTP session and the cached certs
+_google_request = _CertCachingGoogleRequest()
+
+REFRESH_TOKEN_MAX_AGE = 30 * 24 * 60 * 60
+
+# Characters Starlette would emit unquoted in a cookie value (JWTs and refresh tokens)
+_PLAIN_COOKIE_VALUE_RE = re.compile(r"[A-Za-z0-9._~-]*\Z")
+
+
+def _session_cookie(name: str, value: str, max_age: int) -> str:
+    """Same Set-Cookie value Response.set_cookie writes for these flags, formatted directly."""
+    return f"{name}={value}; HttpOnly; Max-Age={max_age}; Path=/; SameSite=none; Secure"
+
+
+def _set_session_cookies(response: Response, session: dict) -> None:
+    """Set the access and refresh token cookies for a new session."""
+    cookies = (
+        ("access_token", session['access_token'], session['expires_at'] if session.get('expires_at') else 3600),
+        ("refresh_token", session['refresh_token'], REFRESH_TOKEN_MAX_AGE),
+    )
+    for name, value, max_age in cookies:
+        if _PLAIN_COOKIE_VALUE_RE.match(value):
+            response.headers.append("set-cookie", _session_cookie(name, value, max_age))
+        else:
+            # Values that need quoting go through Starlette's cookie encoder
+            response.set_cookie(
+                key=name,
+                value=value,
+                httponly=True,
+                secure=True,
+                samesite="none",
+                max_age=max_age
+            )
+
+
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str
@@ -30,21 +102,15 @@ class GoogleAuthRequest(BaseModel):
     credential: str
 
 @router.post("/auth/register")
-async def register(request: RegisterRequest, req: Request, response: Response):
+async def register(request: RegisterRequest, req: Request):
     """Register a new user with Supabase Auth."""
     try:
         email = SecurityMiddleware.sanitize_input(request.email.lower())
         full_name = SecurityMiddleware.sanitize_input(request.full_name) if request.full_name else None
         client_ip = SecurityMiddleware.get_client_ip(req)
 
-        # STRICT SECURITY: Check for suspicious activity
-        is_safe, warning = await SecurityMiddleware.check_suspicious_activity(None, client_ip)
-        if not is_safe:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=warning
-            )
-
+        # In-memory format checks run before the suspicious-activity query so
+        # malformed requests never cost a database round-trip
         if not SecurityMiddleware.validate_email(email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -58,11 +124,20 @@ async def register(request: RegisterRequest, req: Request, response: Response):
                 detail=error_msg
             )
 
+        # STRICT SECURITY: Check for suspicious activity
+        is_safe, warning = await SecurityMiddleware.check_suspicious_activity(None, client_ip)
+        if not is_safe:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=warning
+            )
+
         try:
             user = await AuthService.sign_up(
                 email=email,
                 password=request.password,
-                full_name=full_name
+                full_name=full_name,
+                terms_accepted=request.terms_accepted
             )
 
             if not user:
@@ -74,7 +149,7 @@ async def register(request: RegisterRequest, req: Request, response: Response):
             raise
         except Exception as signup_error:
             error_message = str(signup_error)
-            print(f"❌ Error capturado en register route: {error_message}")
+            logger.error("❌ Error capturado en register route: %s", error_message)
 
             # Handle specific error messages from AuthService
             if "ya está registrado" in error_message.lower():
@@ -89,11 +164,8 @@ async def register(request: RegisterRequest, req: Request, response: Response):
                 detail=error_message if error_message else "Error al crear la cuenta."
             )
 
-        # Create user settings with STRICT security measures
-        try:
-            await UserService.create_user_settings(user['id'], terms_accepted=request.terms_accepted)
-        except Exception as settings_error:
-            print(f"⚠️ Could not create user settings: {settings_error}")
+        # user_settings (including terms_accepted) is created by the
+        # handle_new_user trigger together with the auth user
 
         # STRICT SECURITY MEASURES (compensating for no email verification)
         client_ip = SecurityMiddleware.get_client_ip(req)
@@ -132,21 +204,18 @@ async def register(request: RegisterRequest, req: Request, response: Response):
                     'reset_at': reset_at
                 }).execute()
                 
-            print(f"✅ Strict rate limits initialized for new user {user['id']}")
+            logger.info("✅ Strict rate limits initialized for new user %s", user['id'])
         except Exception as limit_error:
-            print(f"⚠️ Could not set initial rate limits: {limit_error}")
+            logger.warning("⚠️ Could not set initial rate limits: %s", limit_error)
         
         # 3. Track IP for potential abuse detection
-        try:
-            supabase.table('audit_logs').insert({
-                'user_id': user['id'],
-                'action': 'registration_ip_tracked',
-                'ip_address': client_ip,
-                'user_agent': user_agent,
-                'details': f"First registration from IP: {client_ip}"
-            }).execute()
-        except Exception as ip_error:
-            print(f"⚠️ Could not track registration IP: {ip_error}")
+        await SecurityMiddleware.log_audit(
+            user_id=user['id'],
+            action="registration_ip_tracked",
+            ip_address=client_ip,
+            user_agent=user_agent,
+            details=f"First registration from IP: {client_ip}"
+        )
 
         return {
             "success": True,
@@ -161,7 +230,7 @@ async def register(request: RegisterRequest, req: Request, response: Response):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in register: {e}")
+        logger.exception("❌ Error in register: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -191,23 +260,7 @@ async def login(request: LoginRequest, req: Request, response: Response):
         if not settings:
             await UserService.create_user_settings(user['id'])
 
-        response.set_cookie(
-            key="access_token",
-            value=session['access_token'],
-            httponly=True,
-            secure=True,
-            samesite="none",
-            max_age=session['expires_at'] if session.get('expires_at') else 3600
-        )
-
-        response.set_cookie(
-            key="refresh_token",
-            value=session['refresh_token'],
-            httponly=True,
-            secure=True,
-            samesite="none",
-            max_age=30 * 24 * 60 * 60
-        )
+        _set_session_cookies(response, session)
 
         await SecurityMiddleware.log_audit(
             user_id=user['id'],
@@ -232,7 +285,7 @@ async def login(request: LoginRequest, req: Request, response: Response):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in login: {e}")
+        logger.exception("❌ Error in login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -245,11 +298,11 @@ async def google_auth(request: GoogleAuthRequest, req: Request, response: Respon
         try:
             idinfo = id_token.verify_oauth2_token(
                 request.credential,
-                google_requests.Request(),
+                _google_request,
                 config.GOOGLE_OAUTH_CLIENT_ID
             )
         except Exception as e:
-            print(f"❌ Error verifying Google token: {e}")
+            logger.error("❌ Error verifying Google token: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token de Google inválido"
@@ -270,23 +323,7 @@ async def google_auth(request: GoogleAuthRequest, req: Request, response: Respon
         if not settings:
             await UserService.create_user_settings(user['id'])
 
-        response.set_cookie(
-            key="access_token",
-            value=session['access_token'],
-            httponly=True,
-            secure=True,
-            samesite="none",
-            max_age=session['expires_at'] if session.get('expires_at') else 3600
-        )
-
-        response.set_cookie(
-            key="refresh_token",
-            value=session['refresh_token'],
-            httponly=True,
-            secure=True,
-            samesite="none",
-            max_age=30 * 24 * 60 * 60
-        )
+        _set_session_cookies(response, session)
 
         await SecurityMiddleware.log_audit(
             user_id=user['id'],
@@ -311,16 +348,17 @@ async def google_auth(request: GoogleAuthRequest, req: Request, response: Respon
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in google_auth: {e}")
+        logger.exception("❌ Error in google_auth: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
         )
 
 @router.post("/auth/logout")
-async def logout(response: Response, user: dict = Depends(AuthMiddleware.require_auth)):
+async def logout(request: Request, response: Response, user: dict = Depends(AuthMiddleware.require_auth)):
     """Logout user from Supabase."""
     try:
+        AuthMiddleware.invalidate_token(request.cookies.get("access_token"))
         response.delete_cookie("access_token")
         response.delete_cookie("refresh_token")
 
@@ -337,7 +375,7 @@ async def logout(response: Response, user: dict = Depends(AuthMiddleware.require
         }
 
     except Exception as e:
-        print(f"❌ Error in logout: {e}")
+        logger.exception("❌ Error in logout: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -368,7 +406,7 @@ async def get_current_user_info(user: dict = Depends(AuthMiddleware.require_auth
         }
 
     except Exception as e:
-        print(f"❌ Error getting user info: {e}")
+        logger.exception("❌ Error getting user info: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -394,7 +432,7 @@ async def get_terms_status(user: dict = Depends(AuthMiddleware.require_auth)):
         }
 
     except Exception as e:
-        print(f"❌ Error getting terms status: {e}")
+        logger.exception("❌ Error getting terms status: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -429,7 +467,7 @@ async def accept_terms(user: dict = Depends(AuthMiddleware.require_auth)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error accepting terms: {e}")
+        logger.exception("❌ Error accepting terms: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -3,16 +3,33 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
-import json
+import logging
+import orjson
+from dataclasses import dataclass
 from services.llm_service import LLMService
 from services.search_service import SearchService
 from services.conversation_service import ConversationService
 from services.limit_service import RateLimitService
+from services.memory_service import MemoryService
 from middleware.auth_middleware import AuthMiddleware
 from middleware.security_middleware import SecurityMiddleware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# How long the final stream frame waits for a new conversation's id
+NEW_CONVERSATION_ID_WAIT_SECONDS = 0.5
+
+# Strong references to in-flight chat saves (the event loop only keeps weak ones)
+_pending_saves = set()
+
+# LLM chunks buffered ahead of a slow client before the provider stream pauses
+STREAM_BUFFER_CHUNKS = 32
+
+# Marks the end of the LLM stream in the chunk queue
+_STREAM_END = object()
+
 class Message(BaseModel):
     role: str
     content: str
@@ -26,91 +43,161 @@ class ChatRequest(BaseModel):
     special_mode: Optional[str] = None
     image: Optional[str] = None # Added field for image URL
 
-@router.post("/chat")
-async def chat(
-    request: ChatRequest,
-    req: Request
-):
-    """Handle chat requests with optional authentication."""
-    try:
-        # Get user if authenticated (optional)
-        user = await AuthMiddleware.get_current_user(req)
-        user_id = user['id'] if user else None
 
-        # Sanitize input
-        prompt = SecurityMiddleware.sanitize_input(request.prompt, max_length=10000)
+def _sse(payload: dict) -> bytes:
+    """Encode one Server-Sent Events data frame (orjson emits UTF-8 bytes directly)."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
 
-        if not prompt:
-            raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
 
-        # Check rate limit if user is authenticated
-        if user_id:
-            # Calculate estimated tokens for the message
-            message_tokens = RateLimitService.estimate_tokens(prompt)
+async def _pump(chunks, queue: asyncio.Queue) -> None:
+    """
+    Drain an LLM stream into a bounded queue, then mark its end.
+    
+    The end marker is queued when the stream finishes or fails, never on
+    cancellation: the consumer is gone by then and a full queue would block
+    forever. The provider stream is closed in every case.
+    """
+    try:
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        finally:
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        # The consumer re-raises the error through `await producer`
+        await queue.put(_STREAM_END)
+        raise
+    await queue.put(_STREAM_END)
+
+
+def _flatten_image_message(msg: dict) -> dict:
+    """Reduce a multimodal message to its text part plus an image marker for storage."""
+    if not isinstance(msg.get('content'), list):
+        return msg
+
+    # Extraer solo el texto del mensaje con imagen
+    text_content = ""
+    for content_part in msg['content']:
+        if content_part.get('type') == 'text':
+            text_content = content_part.get('text', '')
+            break
+    return {
+        "role": msg['role'],
+        "content": text_content + " [imagen adjunta]"
+    }
+
+
+def _raise_if_rate_limited(allowed: bool, error_data, usage_info) -> None:
+    """Raise a structured 429 when RateLimitService rejected the request."""
+    if allowed:
+        return
+
+    # Return structured error for better frontend handling
+    if isinstance(error_data, dict):
+        error_detail = {
+            **error_data,
+            "usage_info": usage_info,
+            "status": "limit_exceeded"
+        }
+    else:
+        error_detail = {
+            "message": str(error_data),
+            "usage_info": usage_info,
+            "status": "limit_exceeded"
+        }
+    raise HTTPException(status_code=429, detail=error_detail)
 
-            allowed, error_data, usage_info = await RateLimitService.check_rate_limit(
+
+async def _load_memories(user_id: str) -> Optional[str]:
+    """Get the user's memories for the prompt; failures are non-critical."""
+    try:
+        memories_context = await MemoryService.format_memories_for_prompt(user_id)
+        if memories_context:
+            logger.info("🧠 Injecting %s chars of user memories", len(memories_context))
+        return memories_context
+    except Exception as e:
+        logger.warning("⚠️ Error getting memories (non-critical): %s", e)
+        return None
+
+
+@dataclass
+class ChatPrep:
+    """Everything /chat and /chat/stream need before calling the LLM."""
+    user_id: Optional[str]
+    messages: List[dict]
+    search_context: Optional[str]
+
+
+async def _prepare_chat(request: ChatRequest, req: Request, include_memories: bool) -> ChatPrep:
+    """
+    Shared pre-processing for /chat and /chat/stream: resolve the (optional)
+    user, sanitize the prompt, run rate limit / search / memory lookups and
+    build the LLM message list.
+    """
+    # Get user if authenticated (optional)
+    user = await AuthMiddleware.get_current_user(req)
+    user_id = user['id'] if user else None
+
+    # Sanitize input
+    prompt = SecurityMiddleware.sanitize_input(request.prompt, max_length=10000)
+
+    if not prompt:
+        raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
+
+    # Memories load while the rate limit is checked; the (paid) web search
+    # only starts once the request is allowed
+    load_memories = bool(user_id) and include_memories
+    memories_task = asyncio.create_task(_load_memories(user_id)) if load_memories else None
+    try:
+        if user_id:
+            _raise_if_rate_limited(*await RateLimitService.check_rate_limit(
                 user_id,
                 request.model,
-                message_tokens
-            )
-            if not allowed:
-                # Return structured error for better frontend handling
-                if isinstance(error_data, dict):
-                    error_detail = {
-                        **error_data,
-                        "usage_info": usage_info,
-                        "status": "limit_exceeded"
-                    }
-                else:
-                    error_detail = {
-                        "message": str(error_data),
-                        "usage_info": usage_info,
-                        "status": "limit_exceeded"
-                    }
-                raise HTTPException(status_code=429, detail=error_detail)
-
-        # Get search context if enabled
-        search_context = None
-        if request.enable_search:
-            search_context = await SearchService.search_web(prompt)
-
-        # Get user memories and inject into context (if authenticated)
-        memories_context = None
-        if user_id:
-            try:
-                from services.memory_service import MemoryService
-                memories_context = await MemoryService.format_memories_for_prompt(user_id)
-                if memories_context:
-                    print(f"🧠 Injecting {len(memories_context)} chars of user memories")
-            except Exception as e:
-                print(f"⚠️ Error getting memories (non-critical): {e}")
+                RateLimitService.estimate_tokens(prompt)
+            ))
+
+        search_context = await SearchService.search_web(prompt) if request.enable_search else None
+        memories_context = await memories_task if memories_task else None
+    finally:
+        # Rejected or failed: don't leave the memory lookup running
+        if memories_task and not memories_task.done():
+            memories_task.cancel()
+
+    # Build message list: memories (if any) first, then the history in one pass
+    messages = [{"role": "system", "content": memories_context}] if memories_context else []
+    messages.extend([{"role": msg.role, "content": msg.content} for msg in request.history])
+
+    # Add user message with image if present (an empty prompt was rejected above)
+    if request.image:
+        user_message = {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": request.image}}
+            ]
+        }
+    else:
+        user_message = {"role": "user", "content": prompt}
 
-        # Build message list
-        messages = []
+    messages.append(user_message)
 
-        # Inject memories at the beginning if available
-        if memories_context:
-            messages.append({
-                "role": "system",
-                "content": memories_context
-            })
-
-        for msg in request.history:
-            messages.append({"role": msg.role, "content": msg.content})
-
-        # Add user message with image if present
-        if request.image:
-            user_message = {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt or "Analiza esta imagen"},
-                    {"type": "image_url", "image_url": {"url": request.image}}
-                ]
-            }
-        else:
-            user_message = {"role": "user", "content": prompt}
+    return ChatPrep(user_id=user_id, messages=messages, search_context=search_context)
 
-        messages.append(user_message)
+@router.post("/chat")
+async def chat(
+    request: ChatRequest,
+    req: Request
+):
+    """Handle chat requests with optional authentication."""
+    try:
+        prep = await _prepare_chat(request, req, include_memories=True)
+        user_id = prep.user_id
+        messages = prep.messages
+        search_context = prep.search_context
 
         # Get LLM response (pass user_id for caching)
         full_response = await LLMService.get_chat_completion(
@@ -144,7 +231,7 @@ async def chat(
         raise
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        print(f"🔴 Exception in chat endpoint: {error_msg}")
+        logger.exception("🔴 Exception in chat endpoint: %s", error_msg)
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 @router.get("/chats")
@@ -154,7 +241,7 @@ async def get_chats(user: dict = Depends(AuthMiddleware.require_auth)):
         chats = await ConversationService.list_conversations(user['id'])
         return {"success": True, "chats": chats}
     except Exception as e:
-        print(f"❌ Error retrieving chats: {e}")
+        logger.exception("❌ Error retrieving chats: %s", e)
         raise HTTPException(status_code=500, detail="Error interno del servidor")
 
 
@@ -165,137 +252,93 @@ async def chat_stream(
 ):
     """Handle chat requests with streaming responses."""
     try:
-        # Get user if authenticated (optional)
-        user = await AuthMiddleware.get_current_user(req)
-        user_id = user['id'] if user else None
-
-        # Sanitize input
-        prompt = SecurityMiddleware.sanitize_input(request.prompt, max_length=10000)
-
-        if not prompt:
-            raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
-
-        # Check rate limit if user is authenticated
-        if user_id:
-            # Calculate estimated tokens for the message
-            message_tokens = RateLimitService.estimate_tokens(prompt)
-
-            allowed, error_data, usage_info = await RateLimitService.check_rate_limit(
-                user_id,
-                request.model,
-                message_tokens
-            )
-            if not allowed:
-                # Return structured error for better frontend handling
-                if isinstance(error_data, dict):
-                    error_detail = {
-                        **error_data,
-                        "usage_info": usage_info,
-                        "status": "limit_exceeded"
-                    }
-                else:
-                    error_detail = {
-                        "message": str(error_data),
-                        "usage_info": usage_info,
-                        "status": "limit_exceeded"
-                    }
-                raise HTTPException(status_code=429, detail=error_detail)
-
-        # Get search context if enabled
-        search_context = None
-        if request.enable_search:
-            search_context = await SearchService.search_web(prompt)
-
         # User memories DISABLED - only use conversation context
         # Para evitar que el bot recuerde cosas de chats eliminados
-        memories_context = None
-        # if user:
-        #     try:
-        #         from services.memory_service import MemoryService
-        #         memories_context = await MemoryService.format_memories_for_prompt(user['id'])
-        #         if memories_context:
-        #             print(f"🧠 Injecting user memories into context")
-        #     except Exception as e:
-        #         print(f"⚠️ Error loading memories: {e}")
-
-        # Build message list
-        messages = []
-
-        # Inject memories at the beginning if available
-        if memories_context:
-            messages.append({
-                "role": "system",
-                "content": memories_context
-            })
-
-        for msg in request.history:
-            messages.append({"role": msg.role, "content": msg.content})
-
-        # Add user message with image if present
-        if request.image:
-            user_message = {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt or "Analiza esta imagen"},
-                    {"type": "image_url", "image_url": {"url": request.image}}
-                ]
-            }
-        else:
-            user_message = {"role": "user", "content": prompt}
-
-        messages.append(user_message)
+        prep = await _prepare_chat(request, req, include_memories=False)
+        user_id = prep.user_id
+        messages = prep.messages
+        search_context = prep.search_context
 
         async def generate():
             full_response = ""
             conversation_id = request.conversation_id
+            save_task = None
 
-            try:
-                async for chunk in LLMService.get_chat_completion_stream(
+            # The provider stream is pumped into a bounded queue so a slow client
+            # does not stall it, without buffering the whole response
+            queue = asyncio.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+            producer = asyncio.create_task(_pump(
+                LLMService.get_chat_completion_stream(
                     request.model,
                     messages,
                     search_context,
                     request.special_mode,
                     user_id  # Pass user_id for cache
-                ):
+                ),
+                queue
+            ))
+
+            try:
+                while True:
+                    chunk = await queue.get()
+                    if chunk is _STREAM_END:
+                        break
                     full_response += chunk
-                    yield f"data: {json.dumps({'chunk': chunk})}\n\n"
+                    yield _sse({'chunk': chunk})
+
+                # Re-raise any provider error that ended the stream
+                await producer
 
                 # Save to database if user is authenticated
                 if user_id and full_response:
-                    # Crear una copia de messages para guardar, con content simplificado
-                    messages_to_save = []
-                    for msg in messages:
-                        if isinstance(msg.get('content'), list):
-                            # Extraer solo el texto del mensaje con imagen
-                            text_content = ""
-                            for content_part in msg['content']:
-                                if content_part.get('type') == 'text':
-                                    text_content = content_part.get('text', '')
-                                    break
-                            messages_to_save.append({
-                                "role": msg['role'],
-                                "content": text_content + " [imagen adjunta]"
-                            })
-                        else:
-                            messages_to_save.append(msg)
-
-                    conversation = await ConversationService.save_chat(
+                    # Solo copiar messages si alguno trae imagen (content en lista)
+                    if any(isinstance(msg.get('content'), list) for msg in messages):
+                        messages_to_save = [_flatten_image_message(msg) for msg in messages]
+                    else:
+                        messages_to_save = messages
+
+                    save_task = asyncio.create_task(ConversationService.save_chat(
                         user_id=user_id,
                         model=request.model,
                         messages=messages_to_save,
                         assistant_response=full_response,
                         conversation_id=conversation_id
-                    )
-                    if conversation:
-                        conversation_id = conversation.get('id')
+                    ))
+                    _pending_saves.add(save_task)
+                    save_task.add_done_callback(_pending_saves.discard)
+
+                    # Existing conversations already know their id; new ones wait
+                    # briefly for it so the done frame can usually carry it
+                    if conversation_id is None:
+                        try:
+                            conversation = await asyncio.wait_for(
+                                asyncio.shield(save_task), NEW_CONVERSATION_ID_WAIT_SECONDS
+                            )
+                            save_task = None
+                            if conversation:
+                                conversation_id = conversation.get('id')
+                        except asyncio.TimeoutError:
+                            pass
 
                 # Siempre enviar la respuesta final con conversation_id (si existe)
-                yield f"data: {json.dumps({'conversation_id': conversation_id, 'done': True})}\n\n"
+                yield _sse({'conversation_id': conversation_id, 'done': True})
+
+                # The stream stays open until the save finishes; a new
+                # conversation's id follows in an extra frame. Shielded: a client
+                # disconnect cancels this generator, not the save, which keeps
+                # running (tracked in _pending_saves) while the cancel propagates.
+                if save_task is not None:
+                    conversation = await asyncio.shield(save_task)
+                    if conversation and conversation.get('id') != conversation_id:
+                        yield _sse({'conversation_id': conversation.get('id')})
 
             except Exception as e:
                 error_msg = f"Error: {str(e)}"
-                print(f"🔴 Exception in streaming: {error_msg}")
-                yield f"data: {json.dumps({'error': error_msg})}\n\n"
+                logger.exception("🔴 Exception in streaming: %s", error_msg)
+                yield _sse({'error': error_msg})
+            finally:
+                # Client disconnected or stream failed: stop pulling from the provider
+                producer.cancel()
 
         return StreamingResponse(
             generate(),
@@ -310,5 +353,5 @@ async def chat_stream(
         raise
     except Exception as e:
         error_msg = f"Error: {str(e)}"
-        print(f"🔴 Exception in chat stream endpoint: {error_msg}")
+        logger.exception("🔴 Exception in chat stream endpoint: %s", error_msg)
         raise HTTPException(status_code=500, detail="Error interno del servidor")
\ No newline at end of file
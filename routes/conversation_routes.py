@@ -2,15 +2,23 @@
 Conversation routes for managing chat conversations
 """
 
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+import logging
+import secrets
+from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Query, Request, status, Depends
 from pydantic import BaseModel
-from typing import Optional
-from services.conversation_service import ConversationService
+from typing import Literal, Optional
+from services.conversation_service import ConversationService, decode_list_cursor, encode_list_cursor
+from services.supabase_service import get_supabase_service
 from middleware.auth_middleware import AuthMiddleware
 from middleware.security_middleware import SecurityMiddleware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+FeedbackType = Literal["thumbs_up", "thumbs_down", "love", "laugh"]
+
 class CreateConversationRequest(BaseModel):
     title: str
     model: str = "Orzion Pro"
@@ -19,11 +27,19 @@ class UpdateConversationRequest(BaseModel):
     title: Optional[str] = None
     is_archived: Optional[bool] = None
 
+async def _require_owned_conversation(conversation_id: int, user: dict) -> None:
+    """Raise 404 unless the conversation exists and belongs to the user."""
+    if await ConversationService.get_owner(conversation_id) != user['id']:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversación no encontrada"
+        )
+
 @router.post("/conversations")
 async def create_conversation(
     request: CreateConversationRequest,
-    req: Request,
-    user: dict = Depends(AuthMiddleware.require_auth)
+    user: dict = Depends(AuthMiddleware.require_auth),
+    audit_ctx: dict = Depends(SecurityMiddleware.audit_context)
 ):
     """Create a new conversation."""
     try:
@@ -55,8 +71,7 @@ async def create_conversation(
             action="conversation_created",
             resource_type="conversation",
             resource_id=conversation['id'],
-            ip_address=SecurityMiddleware.get_client_ip(req),
-            user_agent=SecurityMiddleware.get_user_agent(req)
+            **audit_ctx
         )
 
         return {
@@ -67,7 +82,7 @@ async def create_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error creating conversation: {e}")
+        logger.exception("❌ Error creating conversation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -76,22 +91,39 @@ async def create_conversation(
 @router.get("/conversations")
 async def list_conversations(
     include_archived: bool = False,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
     user: dict = Depends(AuthMiddleware.require_auth)
 ):
-    """List all conversations for the current user."""
+    """
+    List conversations for the current user, most recently updated first.
+    With `limit`, results are paged: pass the returned `next_cursor` as `after`.
+    """
+    try:
+        cursor = decode_list_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
     try:
         conversations = await ConversationService.list_conversations(
             user_id=user['id'],
-            include_archived=include_archived
+            include_archived=include_archived,
+            after=cursor,
+            limit=limit
         )
 
+        next_cursor = None
+        if limit and len(conversations) == limit:
+            next_cursor = encode_list_cursor(conversations[-1])
+
         return {
             "success": True,
-            "conversations": conversations
+            "conversations": conversations,
+            "next_cursor": next_cursor
         }
 
     except Exception as e:
-        print(f"❌ Error listing conversations: {e}")
+        logger.exception("❌ Error listing conversations: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -104,22 +136,14 @@ async def get_conversation(
 ):
     """Get a specific conversation with its messages."""
     try:
-        # Get conversation
-        conversation = await ConversationService.get_conversation(conversation_id, user['id'])
+        # Conversation (scoped to the user) and messages are fetched concurrently
+        conversation, messages = await ConversationService.get_conversation_with_messages(
+            conversation_id, user['id']
+        )
 
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversación no encontrada")
 
-        # Check if user owns this conversation
-        if conversation['user_id'] != user['id']:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para acceder a esta conversación"
-            )
-
-        # Get messages
-        messages = await ConversationService.get_messages(conversation_id)
-
         return {
             "success": True,
             "conversation": conversation,
@@ -130,33 +154,18 @@ async def get_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting conversation: {e}")
+        logger.exception("❌ Error getting conversation: %s", e)
         raise HTTPException(status_code=500, detail="Error al obtener la conversación")
 
 @router.patch("/conversations/{conversation_id}")
 async def update_conversation(
     conversation_id: int,
     request: UpdateConversationRequest,
-    req: Request,
-    user: dict = Depends(AuthMiddleware.require_auth)
+    user: dict = Depends(AuthMiddleware.require_auth),
+    audit_ctx: dict = Depends(SecurityMiddleware.audit_context)
 ):
     """Update a conversation (rename or archive)."""
     try:
-        # Get conversation first to verify ownership
-        conversation = await ConversationService.get_conversation(conversation_id, user['id'])
-
-        if not conversation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversación no encontrada"
-            )
-
-        if conversation['user_id'] != user['id']:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para modificar esta conversación"
-            )
-
         # Sanitize title if provided
         title = None
         if request.title is not None:
@@ -167,17 +176,18 @@ async def update_conversation(
                     detail="El título no puede estar vacío"
                 )
 
-        # Update conversation
+        # Update conversation; filtering by user_id doubles as the ownership check
         updated_conversation = await ConversationService.update_conversation(
             conversation_id=conversation_id,
             title=title,
-            is_archived=request.is_archived
+            is_archived=request.is_archived,
+            user_id=user['id']
         )
 
         if not updated_conversation:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error al actualizar la conversación"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversación no encontrada"
             )
 
         # Log audit
@@ -186,8 +196,7 @@ async def update_conversation(
             action="conversation_updated",
             resource_type="conversation",
             resource_id=conversation_id,
-            ip_address=SecurityMiddleware.get_client_ip(req),
-            user_agent=SecurityMiddleware.get_user_agent(req),
+            **audit_ctx,
             details={"title": title, "is_archived": request.is_archived}
         )
 
@@ -199,7 +208,7 @@ async def update_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error updating conversation: {e}")
+        logger.exception("❌ Error updating conversation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -208,42 +217,24 @@ async def update_conversation(
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: int,
-    req: Request,
-    user: dict = Depends(AuthMiddleware.require_auth)
+    user: dict = Depends(AuthMiddleware.require_auth),
+    audit_ctx: dict = Depends(SecurityMiddleware.audit_context)
 ):
     """Delete a conversation and all its messages."""
     try:
-        # Get conversation first to verify ownership
-        conversation = await ConversationService.get_conversation(conversation_id, user['id'])
+        # Delete conversation; filtering by user_id doubles as the ownership check
+        success = await ConversationService.delete_conversation(conversation_id, user_id=user['id'])
 
-        if not conversation:
+        if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversación no encontrada"
             )
 
-        if conversation['user_id'] != user['id']:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para eliminar esta conversación"
-            )
-
-        # Delete conversation
-        success = await ConversationService.delete_conversation(conversation_id)
-
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error al eliminar la conversación"
-            )
-
         # Delete associated memories
         try:
-            from services.memory_service import MemoryService
-            from services.supabase_service import get_supabase_service
-            
             supabase = get_supabase_service()
-            print(f"🗑️ Deleting memories from conversation {conversation_id}")
+            logger.info("🗑️ Deleting memories from conversation %s", conversation_id)
             
             # Deactivate all memories from this conversation
             supabase.table('user_memories')\
@@ -251,9 +242,9 @@ async def delete_conversation(
                 .eq('source_conversation_id', conversation_id)\
                 .execute()
                 
-            print(f"✅ Memories from conversation {conversation_id} deleted")
+            logger.info("✅ Memories from conversation %s deleted", conversation_id)
         except Exception as e:
-            print(f"⚠️ Error deleting memories (non-critical): {e}")
+            logger.warning("⚠️ Error deleting memories (non-critical): %s", e)
 
         # Log audit
         await SecurityMiddleware.log_audit(
@@ -261,8 +252,7 @@ async def delete_conversation(
             action="conversation_deleted",
             resource_type="conversation",
             resource_id=conversation_id,
-            ip_address=SecurityMiddleware.get_client_ip(req),
-            user_agent=SecurityMiddleware.get_user_agent(req)
+            **audit_ctx
         )
 
         return {
@@ -273,7 +263,7 @@ async def delete_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error deleting conversation: {e}")
+        logger.exception("❌ Error deleting conversation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -286,20 +276,8 @@ async def get_conversation_messages(
 ):
     """Get all messages for a conversation."""
     try:
-        # Get conversation first to verify ownership
-        conversation = await ConversationService.get_conversation(conversation_id, user['id'])
-
-        if not conversation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversación no encontrada"
-            )
-
-        if conversation['user_id'] != user['id']:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="No tienes permiso para acceder a esta conversación"
-            )
+        # Verify ownership
+        await _require_owned_conversation(conversation_id, user)
 
         # Get messages
         messages = await ConversationService.get_messages(conversation_id)
@@ -312,7 +290,7 @@ async def get_conversation_messages(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting messages: {e}")
+        logger.exception("❌ Error getting messages: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
@@ -325,24 +303,7 @@ async def search_conversations(
 ):
     """Search conversations by query."""
     try:
-        conversations = await ConversationService.list_conversations(
-            user['id'],
-            include_archived=True
-        )
-
-        results = []
-        query_lower = q.lower()
-
-        for conv in conversations:
-            if query_lower in conv['title'].lower():
-                results.append(conv)
-                continue
-
-            messages = await ConversationService.get_messages(conv['id'])
-            for msg in messages:
-                if query_lower in msg['content'].lower():
-                    results.append(conv)
-                    break
+        results = await ConversationService.search_conversations(user['id'], q)
 
         return {
             "success": True,
@@ -350,7 +311,7 @@ async def search_conversations(
             "count": len(results)
         }
     except Exception as e:
-        print(f"❌ Error searching conversations: {e}")
+        logger.exception("❌ Error searching conversations: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error en la búsqueda"
@@ -364,37 +325,39 @@ async def share_conversation(
 ):
     """Create a shareable link for a conversation."""
     try:
-        conversation = await ConversationService.get_conversation(conversation_id, user['id'])
+        await _require_owned_conversation(conversation_id, user)
 
-        if not conversation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Conversación no encontrada"
-            )
-
-        import secrets
         share_token = secrets.token_urlsafe(32)
-
-        from datetime import datetime, timedelta
-        from services.supabase_service import get_supabase_service
+        expires_at = (datetime.utcnow() + timedelta(days=30)).isoformat()
 
         supabase = get_supabase_service()
-        share_data = {
-            "conversation_id": conversation_id,
-            "share_token": share_token,
-            "created_by": user['id'],
-            "expires_at": (datetime.utcnow() + timedelta(days=30)).isoformat(),
-            "views": 0
-        }
-
-        response = supabase.table("shared_conversations").insert(share_data).execute()
 
-        if response.data:
-            share_url = f"{req.base_url}shared/{share_token}"
+        # One link per conversation: reuse it (extending its expiry) on repeat
+        # clicks and retries (db/shared_conversations_upsert.sql)
+        try:
+            saved_token = supabase.rpc('upsert_conversation_share', {
+                'p_conversation_id': conversation_id,
+                'p_created_by': user['id'],
+                'p_share_token': share_token,
+                'p_expires_at': expires_at
+            }).execute().data
+        except Exception as rpc_error:
+            logger.warning("⚠️ Share upsert RPC unavailable, inserting a new link: %s", rpc_error)
+            response = supabase.table("shared_conversations").insert({
+                "conversation_id": conversation_id,
+                "share_token": share_token,
+                "created_by": user['id'],
+                "expires_at": expires_at,
+                "views": 0
+            }).execute()
+            saved_token = share_token if response.data else None
+
+        if saved_token:
+            share_url = f"{req.base_url}shared/{saved_token}"
             return {
                 "success": True,
                 "share_url": str(share_url),
-                "share_token": share_token
+                "share_token": saved_token
             }
 
         raise HTTPException(status_code=500, detail="Error al crear enlace")
@@ -402,21 +365,17 @@ async def share_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error sharing conversation: {e}")
+        logger.exception("❌ Error sharing conversation: %s", e)
         raise HTTPException(status_code=500, detail="Error interno")
 
 @router.post("/messages/{message_id}/feedback")
 async def add_message_feedback(
     message_id: int,
-    feedback_type: str,
+    feedback_type: FeedbackType,
     user: dict = Depends(AuthMiddleware.require_auth)
 ):
     """Add feedback to a message."""
     try:
-        if feedback_type not in ['thumbs_up', 'thumbs_down', 'love', 'laugh']:
-            raise HTTPException(status_code=400, detail="Tipo de feedback inválido")
-
-        from services.supabase_service import get_supabase_service
         supabase = get_supabase_service()
 
         feedback_data = {
@@ -434,5 +393,5 @@ async def add_message_feedback(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error adding feedback: {e}")
+        logger.exception("❌ Error adding feedback: %s", e)
         raise HTTPException(status_code=500, detail="Error al agregar feedback")
\ No newline at end of file
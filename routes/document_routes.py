@@ -1,15 +1,26 @@
+import logging
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional
+import asyncio
 import os
 import time
-from pathlib import Path
 from middleware.auth_middleware import AuthMiddleware
 from services.sandbox_service import SandboxService
 from services.audit_service import AuditLogService as AuditService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+GENERATED_FILES_DIR = "generated_files"
+GENERATED_FILE_MAX_AGE_SECONDS = 3600
+GENERATED_FILES_CLEANUP_INTERVAL_SECONDS = 300
+
+# Result of the most recent prune, reported by DELETE /documents/cleanup
+_cleanup_state = {'last_deleted_count': 0, 'last_run_at': None}
+_cleanup_task: Optional[asyncio.Task] = None
+
 class DocumentGenerateRequest(BaseModel):
     code: str
     filename: str = "document"
@@ -77,23 +88,69 @@ async def generate_document(
         )
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
+def _delete_files_older_than(directory: str, max_age_seconds: int) -> int:
+    """Delete regular files whose mtime is older than max_age_seconds; return how many."""
+    cutoff = time.time() - max_age_seconds
+    deleted_count = 0
+
+    # DirEntry caches the file type and stat result, so each file costs
+    # one stat and one unlink
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                try:
+                    os.unlink(entry.path)
+                    deleted_count += 1
+                except FileNotFoundError:
+                    pass  # Already removed by a concurrent cleanup
+    return deleted_count
+
+def _prune_generated_files() -> int:
+    """Delete expired generated files and record the result in _cleanup_state."""
+    deleted_count = 0
+    if os.path.isdir(GENERATED_FILES_DIR):
+        deleted_count = _delete_files_older_than(GENERATED_FILES_DIR, GENERATED_FILE_MAX_AGE_SECONDS)
+
+    _cleanup_state['last_deleted_count'] = deleted_count
+    _cleanup_state['last_run_at'] = time.time()
+    return deleted_count
+
+async def _cleanup_loop() -> None:
+    while True:
+        try:
+            # Filesystem calls block, so the scan runs in a worker thread
+            deleted_count = await asyncio.to_thread(_prune_generated_files)
+            if deleted_count:
+                logger.info("🧹 Deleted %s expired generated files", deleted_count)
+        except Exception as e:
+            logger.warning("⚠️ Generated files cleanup failed: %s", e)
+        await asyncio.sleep(GENERATED_FILES_CLEANUP_INTERVAL_SECONDS)
+
+def start_cleanup_task() -> None:
+    """Prune generated files every GENERATED_FILES_CLEANUP_INTERVAL_SECONDS (called from app lifespan)."""
+    global _cleanup_task
+    if _cleanup_task is None or _cleanup_task.done():
+        _cleanup_task = asyncio.create_task(_cleanup_loop())
+
+async def stop_cleanup_task() -> None:
+    global _cleanup_task
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        try:
+            await _cleanup_task
+        except asyncio.CancelledError:
+            pass
+        _cleanup_task = None
+
 @router.delete("/documents/cleanup")
 async def cleanup_old_files(current_user: dict = Depends(AuthMiddleware.require_auth)):
     try:
-        generated_dir = Path("generated_files")
-        if not generated_dir.exists():
-            return {'success': True, 'deleted_count': 0}
-
-        current_time = time.time()
-        one_hour = 3600
-        deleted_count = 0
-
-        for file_path in generated_dir.iterdir():
-            if file_path.is_file():
-                file_age = current_time - file_path.stat().st_mtime
-                if file_age > one_hour:
-                    file_path.unlink()
-                    deleted_count += 1
+        if _cleanup_task is not None and not _cleanup_task.done():
+            # The background task keeps the directory pruned; report its last run
+            deleted_count = _cleanup_state['last_deleted_count']
+        else:
+            # No background task (e.g. on Lambda, where lifespan is off): prune now
+            deleted_count = await asyncio.to_thread(_prune_generated_files)
 
         await AuditService.log_audit(
             user_id=current_user['id'],
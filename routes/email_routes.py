@@ -2,12 +2,15 @@
 """
 Email Routes - Email verification and password reset
 """
+import logging
 from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel, EmailStr
 from services.email_service import EmailService
 from middleware.security_middleware import SecurityMiddleware
 from middleware.auth_middleware import AuthMiddleware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/email", tags=["Email"])
 
 class RequestPasswordResetRequest(BaseModel):
@@ -23,14 +26,14 @@ class ResendVerificationRequest(BaseModel):
 @router.get("/verify")
 async def verify_email(token: str):
     """Verify email with token"""
-    print(f"[EMAIL-VERIFY] 📧 Verifying email with token: {token[:10]}...")
+    logger.info("[EMAIL-VERIFY] 📧 Verifying email with token: %s...", token[:10])
     result = await EmailService.verify_email_token(token)
     
     if not result.get("success"):
-        print(f"[EMAIL-VERIFY] ❌ Verification failed: {result.get('error')}")
+        logger.warning("[EMAIL-VERIFY] ❌ Verification failed: %s", result.get('error'))
         raise HTTPException(status_code=400, detail=result.get("error"))
     
-    print(f"[EMAIL-VERIFY] ✅ Email verified successfully")
+    logger.info("[EMAIL-VERIFY] ✅ Email verified successfully")
     return {
         "success": True,
         "message": "Email verificado exitosamente"
@@ -39,20 +42,15 @@ async def verify_email(token: str):
 @router.post("/resend-verification")
 async def resend_verification_email(request: ResendVerificationRequest):
     """Resend verification email to user"""
-    print(f"[EMAIL-RESEND] 📧 Resending verification email to: {request.email}")
+    logger.info("[EMAIL-RESEND] 📧 Resending verification email to: %s", request.email)
     email = SecurityMiddleware.sanitize_input(request.email.lower())
     
     try:
-        # Get user by email from Supabase
-        from services.supabase_service import get_supabase_service
-        supabase = get_supabase_service()
-        
         # Find user by email
-        users = supabase.auth.admin.list_users()
-        user = next((u for u in users if u.email == email), None)
+        user = EmailService.find_user_by_email(email)
         
         if not user:
-            print(f"[EMAIL-RESEND] ⚠️ User not found, but returning success for security")
+            logger.warning("[EMAIL-RESEND] ⚠️ User not found, but returning success for security")
             # Don't reveal if email exists
             return {
                 "success": True,
@@ -60,8 +58,8 @@ async def resend_verification_email(request: ResendVerificationRequest):
             }
         
         # Check if email is already verified
-        if user.email_confirmed_at:
-            print(f"[EMAIL-RESEND] ℹ️ Email already verified")
+        if user['email_confirmed_at']:
+            logger.info("[EMAIL-RESEND] ℹ️ Email already verified")
             return {
                 "success": True,
                 "message": "Tu email ya está verificado"
@@ -70,14 +68,14 @@ async def resend_verification_email(request: ResendVerificationRequest):
         # Send verification email
         result = await EmailService.send_verification_email(
             email=email,
-            user_id=user.id,
-            user_name=user.user_metadata.get('full_name', '')
+            user_id=user['id'],
+            user_name=user['user_metadata'].get('full_name', '')
         )
         
         if result.get("success"):
-            print(f"[EMAIL-RESEND] ✅ Verification email resent successfully")
+            logger.info("[EMAIL-RESEND] ✅ Verification email resent successfully")
         else:
-            print(f"[EMAIL-RESEND] ⚠️ Failed to send email: {result.get('error')}")
+            logger.warning("[EMAIL-RESEND] ⚠️ Failed to send email: %s", result.get('error'))
         
         return {
             "success": True,
@@ -85,9 +83,7 @@ async def resend_verification_email(request: ResendVerificationRequest):
         }
         
     except Exception as e:
-        print(f"[EMAIL-RESEND] ❌ Error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[EMAIL-RESEND] ❌ Error: %s", e)
         raise HTTPException(status_code=500, detail="Error al enviar email de verificación")
 
 @router.post("/request-password-reset")
@@ -1,23 +1,29 @@
 """
 Feedback Routes - API endpoints for user feedback
 """
+import logging
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
-from datetime import datetime
-from typing import Dict, Any
+from fastapi.responses import ORJSONResponse
+from typing import Dict, Any, Literal
 from pydantic import BaseModel, Field
+from postgrest.types import ReturnMethod
 from middleware.auth_middleware import AuthMiddleware
 from services.supabase_service import get_supabase_service
 from services.security_logger import SecurityLogger
 
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/feedback", tags=["Feedback"])
 
 
 class FeedbackRequest(BaseModel):
     rating: int = Field(..., ge=1, le=5, description="Rating from 1 to 5")
     message: str = Field(..., min_length=1, max_length=1000, description="Feedback message")
-    category: str = Field(default="general", description="Feedback category")
+    category: Literal["general", "bug", "feature", "improvement", "other"] = Field(
+        default="general", description="Feedback category"
+    )
 
 
 @router.post("/submit")
@@ -42,12 +48,17 @@ async def submit_feedback(
             "user_email": user_email,
             "rating": feedback.rating,
             "message": feedback.message,
-            "category": feedback.category,
-            "created_at": datetime.utcnow().isoformat()
+            "category": feedback.category
+            # created_at is filled by the column default (NOW())
         }
 
-        # Insert feedback into database
-        supabase.table('user_feedback').insert(feedback_data).execute()
+        # Insert feedback into database; the client blocks, so keep it off the
+        # event loop, and skip echoing the row back since it is not used
+        await asyncio.to_thread(
+            lambda: supabase.table('user_feedback')
+                .insert(feedback_data, returning=ReturnMethod.minimal)
+                .execute()
+        )
 
         # Log the event (without error handling to avoid issues)
         try:
@@ -63,8 +74,8 @@ async def submit_feedback(
         except:
             pass  # Ignore logging errors
 
-        # Return explicit JSONResponse
-        return JSONResponse(
+        # Return explicit ORJSONResponse
+        return ORJSONResponse(
             status_code=200,
             content={
                 "success": True,
@@ -77,10 +88,10 @@ async def submit_feedback(
     except Exception as e:
         error_msg = str(e)
         # Only log critical errors
-        print(f"Feedback error: {error_msg}")
+        logger.error("Feedback error: %s", error_msg)
         
         # Return generic error without exposing details
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -103,10 +114,28 @@ async def get_my_feedback_stats(
         if not supabase:
             raise HTTPException(status_code=500, detail="Servicio de base de datos no disponible")
 
-        response = supabase.table('user_feedback')\
-            .select('rating, category, created_at')\
-            .eq('user_id', user_id)\
-            .execute()
+        # Aggregate in Postgres (db/feedback_functions.sql) instead of pulling the whole history
+        try:
+            stats = await asyncio.to_thread(
+                lambda: supabase.rpc('feedback_stats_for_user', {'p_user_id': user_id}).execute().data
+            )
+            if stats is not None:
+                return {
+                    "success": True,
+                    "total_feedback": int(stats.get("total_feedback") or 0),
+                    "average_rating": float(stats.get("average_rating") or 0),
+                    "by_category": stats.get("by_category") or {},
+                    "recent_feedback": stats.get("recent_feedback") or []
+                }
+        except Exception as rpc_error:
+            logger.warning("⚠️ Feedback stats RPC unavailable, aggregating in Python: %s", rpc_error)
+
+        response = await asyncio.to_thread(
+            lambda: supabase.table('user_feedback')
+                .select('rating, category, created_at')
+                .eq('user_id', user_id)
+                .execute()
+        )
 
         if not response.data:
             return {
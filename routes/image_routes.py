@@ -7,18 +7,146 @@ Provides image generation using:
 
 Integrated with quota system to track per-user usage.
 """
-from fastapi import APIRouter, HTTPException, Request
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict, deque
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
-from typing import Optional
+from typing import AsyncIterator, Dict, Optional, Tuple
+from cachetools import TTLCache
 import httpx
 import base64
 from config import config
 from middleware.auth_middleware import AuthMiddleware
+from middleware.security_middleware import SecurityMiddleware
 from services.limit_service import RateLimitService
 from services.provider_quota_service import ProviderQuotaService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Keep-alive client shared by the image providers, so repeat requests skip the
+# TCP/TLS handshake. Created lazily because lifespan is off on Lambda.
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    # Connections belong to the loop that opened them
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=60.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+# Successful generations keyed by SHA-256 of (prompt, aspect_ratio, provider).
+# Each entry holds base64 images (~1-2 MB), so the cache stays small.
+IMAGE_CACHE_TTL_SECONDS = 600
+IMAGE_CACHE_MAX_ENTRIES = 128
+_image_cache = TTLCache(maxsize=IMAGE_CACHE_MAX_ENTRIES, ttl=IMAGE_CACHE_TTL_SECONDS)
+IMAGE_PROVIDERS = ("google", "flux")
+
+
+def _image_cache_key(prompt: str, aspect_ratio: Optional[str], provider: str) -> str:
+    return hashlib.sha256(f"{prompt}|{aspect_ratio}|{provider}".encode()).hexdigest()
+
+
+def _cache_image_result(prompt: str, aspect_ratio: Optional[str], result: dict) -> None:
+    """Remember the images and message of a successful generation (no quota data)."""
+    if result.get("success") and result.get("images"):
+        key = _image_cache_key(prompt, aspect_ratio, result["provider"])
+        _image_cache[key] = (result["images"], result["message"])
+
+
+def _get_cached_image_result(prompt: str, aspect_ratio: Optional[str]) -> Optional[dict]:
+    """Return a cached generation for this prompt, preferring providers in fallback order."""
+    for provider in IMAGE_PROVIDERS:
+        cached = _image_cache.get(_image_cache_key(prompt, aspect_ratio, provider))
+        if cached is not None:
+            images, message = cached
+            return {
+                "success": True,
+                "images": images,
+                "prompt": prompt,
+                "message": message,
+                "provider": provider,
+                "cached": True
+            }
+    return None
+
+
+# Per-user limits on /generate-image (per IP when anonymous): every call can
+# hit a paid provider. The window and concurrency cap are tracked per process;
+# the hourly cap goes through the shared rate_limits table.
+IMAGE_RATE_LIMIT_REQUESTS = 5
+IMAGE_RATE_LIMIT_WINDOW_SECONDS = 60
+IMAGE_MAX_CONCURRENT_PER_USER = 2
+IMAGE_RATE_LIMIT_PER_HOUR = 30
+_recent_image_requests = TTLCache(maxsize=10000, ttl=IMAGE_RATE_LIMIT_WINDOW_SECONDS)
+_images_in_flight: Dict[str, int] = defaultdict(int)
+
+
+async def image_rate_limit(req: Request) -> AsyncIterator[Optional[dict]]:
+    """
+    Dependency enforcing the image limits; yields the current user (or None).
+    
+    Raises 429 when the caller is over a limit. The concurrency slot is held
+    until the endpoint returns.
+    """
+    user = None
+    try:
+        user = await AuthMiddleware.get_current_user(req)
+    except Exception as e:
+        logger.warning("⚠️ Could not get user: %s", e)
+    key = user['id'] if user else SecurityMiddleware.get_client_ip(req)
+    
+    # Sliding window of request times; re-assigning the entry refreshes its TTL
+    now = time.monotonic()
+    window = _recent_image_requests.get(key) or deque()
+    while window and now - window[0] >= IMAGE_RATE_LIMIT_WINDOW_SECONDS:
+        window.popleft()
+    if len(window) >= IMAGE_RATE_LIMIT_REQUESTS:
+        raise HTTPException(status_code=429, detail="Demasiadas imágenes solicitadas. Intenta de nuevo en un minuto.")
+    if _images_in_flight[key] >= IMAGE_MAX_CONCURRENT_PER_USER:
+        raise HTTPException(status_code=429, detail="Ya tienes imágenes generándose. Espera a que terminen.")
+    
+    # Claim the slot before awaiting, so concurrent requests see it
+    window.append(now)
+    _recent_image_requests[key] = window
+    _images_in_flight[key] += 1
+    try:
+        if user:
+            allowed, error = await SecurityMiddleware.check_rate_limit(
+                user['id'],
+                "image",
+                max_requests=IMAGE_RATE_LIMIT_PER_HOUR,
+                time_window_hours=1
+            )
+            if not allowed:
+                raise HTTPException(status_code=429, detail=error)
+        yield user
+    finally:
+        _images_in_flight[key] -= 1
+        if _images_in_flight[key] <= 0:
+            del _images_in_flight[key]
+
+
+async def close_http_client() -> None:
+    """Close the shared provider client (called from app lifespan on shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class ImageRequest(BaseModel):
     prompt: str
     aspect_ratio: Optional[str] = "1:1"  # Options: 1:1, 3:4, 4:3, 9:16, 16:9
@@ -28,36 +156,40 @@ class ImageRequest(BaseModel):
 @router.post("/generate-image")
 async def generate_image(
     request: ImageRequest,
-    req: Request
+    user: Optional[dict] = Depends(image_rate_limit)
 ):
     """
     Generate an image using Google Imagen 3.0 (primary) or FLUX (fallback).
     
     Flow:
-    1. Check user quotas (Google AI: 1 img/day)
-    2. Try Google Imagen 3.0 first
-    3. Fallback to FLUX if Google fails or quota exceeded
+    1. Enforce per-user request limits (image_rate_limit dependency)
+    2. Check user quotas (Google AI: 1 img/day)
+    3. Try Google Imagen 3.0 first
+    4. Fallback to FLUX if Google fails or quota exceeded
     """
-    user_id = "anonymous"
+    user_id = user['id'] if user else "anonymous"
     
-    # Get user from cookies
-    try:
-        user = await AuthMiddleware.get_current_user(req)
-        if user:
-            user_id = user['id']
-    except Exception as e:
-        print(f"⚠️ Could not get user: {e}")
-        user_id = "anonymous"
+    # Identical prompts reuse a recent generation without spending any quota
+    cached = _get_cached_image_result(request.prompt, request.aspect_ratio)
+    if cached:
+        logger.info("♻️ Serving cached image for user %s", user_id[:8] if user_id != 'anonymous' else 'anon')
+        return cached
     
-    # Check Google AI quota if user is authenticated
-    google_quota_ok = True
-    if user_id != "anonymous":
-        google_quota_ok, quota_error = await RateLimitService.check_google_ai_quota(user_id, "Image")
+    # Check the user's Google AI quota and the shared provider quota concurrently
+    google_available = False
+    if config.GOOGLE_AI_STUDIO_KEY_IMAGE:
+        (google_quota_ok, quota_error), (provider_ok, provider_reason) = await asyncio.gather(
+            _check_user_google_quota(user_id),
+            ProviderQuotaService.check_provider_available("google", "image")
+        )
         if not google_quota_ok:
-            print(f"⚠️ Google AI image quota exceeded for user {user_id}: {quota_error}")
+            logger.warning("⚠️ Google AI image quota exceeded for user %s: %s", user_id, quota_error)
+        elif not provider_ok:
+            logger.warning("⚠️ Google Imagen quota exhausted: %s", provider_reason)
+        google_available = google_quota_ok and provider_ok
     
     # Try Google Imagen 3.0 first (if quota available and configured)
-    if google_quota_ok and config.GOOGLE_AI_STUDIO_KEY_IMAGE:
+    if google_available:
         try:
             result = await _generate_with_google_imagen(
                 request.prompt,
@@ -69,21 +201,33 @@ async def generate_image(
             if result["success"]:
                 # Increment quota for successful generation
                 if user_id != "anonymous":
-                    await RateLimitService.increment_google_ai_usage(user_id, "Image")
-                    await ProviderQuotaService.increment_usage("google", "image")
+                    await asyncio.gather(
+                        RateLimitService.increment_google_ai_usage(user_id, "Image"),
+                        ProviderQuotaService.increment_usage("google", "image")
+                    )
                 
+                _cache_image_result(request.prompt, request.aspect_ratio, result)
                 return result
             else:
-                print(f"⚠️ Google Imagen failed: {result.get('error')}")
+                logger.warning("⚠️ Google Imagen failed: %s", result.get('error'))
                 # Continue to FLUX fallback
         
         except Exception as e:
-            print(f"⚠️ Google Imagen exception: {str(e)}")
+            logger.warning("⚠️ Google Imagen exception: %s", e)
             # Continue to FLUX fallback
     
     # Fallback to FLUX-schnell
-    print(f"🎨 Falling back to FLUX for image generation...")
-    return await _generate_with_flux(request.prompt, user_id)
+    logger.info("🎨 Falling back to FLUX for image generation...")
+    result = await _generate_with_flux(request.prompt, user_id)
+    _cache_image_result(request.prompt, request.aspect_ratio, result)
+    return result
+
+
+async def _check_user_google_quota(user_id: str) -> Tuple[bool, Optional[str]]:
+    """Per-user Google AI image quota; anonymous users are not tracked."""
+    if user_id == "anonymous":
+        return True, None
+    return await RateLimitService.check_google_ai_quota(user_id, "Image")
 
 
 async def _generate_with_google_imagen(
@@ -95,18 +239,11 @@ async def _generate_with_google_imagen(
     """
     Generate image using Google AI Studio Imagen 3.0.
     
+    The caller checks provider availability beforehand.
+    
     Returns:
         dict with success, images, and optional error
     """
-    # Check provider quota
-    available, reason = await ProviderQuotaService.check_provider_available("google", "image")
-    if not available:
-        return {
-            "success": False,
-            "error": f"Google Imagen quota exhausted: {reason}",
-            "images": []
-        }
-    
     api_key = config.GOOGLE_AI_STUDIO_KEY_IMAGE
     model = config.GOOGLE_AI_STUDIO_IMAGE_MODEL
     
@@ -116,7 +253,7 @@ async def _generate_with_google_imagen(
     
     # Note: Google Imagen only generates ONE image per request
     if number_of_images and number_of_images > 1:
-        print(f"⚠️ Warning: Google Imagen only supports 1 image per request. Requested: {number_of_images}")
+        logger.warning("⚠️ Warning: Google Imagen only supports 1 image per request. Requested: %s", number_of_images)
     
     # Build request payload
     payload = {
@@ -135,56 +272,56 @@ async def _generate_with_google_imagen(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            print(f"🎨 Generating image with Google Imagen 3.0 for user {user_id[:8] if user_id != 'anonymous' else 'anon'}...")
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
+        client = _get_http_client()
+        logger.info("🎨 Generating image with Google Imagen 3.0 for user %s...", user_id[:8] if user_id != 'anonymous' else 'anon')
+        response = await client.post(url, json=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        
+        # Extract images from response
+        if "candidates" in data and len(data["candidates"]) > 0:
+            images = []
             
-            # Extract images from response
-            if "candidates" in data and len(data["candidates"]) > 0:
-                images = []
-                
-                for candidate in data["candidates"]:
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        for part in candidate["content"]["parts"]:
-                            # Check for inline_data (image)
-                            if "inlineData" in part:
-                                mime_type = part["inlineData"].get("mimeType", "image/png")
-                                image_data = part["inlineData"]["data"]
-                                
-                                # Convert to data URL for frontend
-                                image_url = f"data:{mime_type};base64,{image_data}"
-                                images.append({
-                                    "url": image_url,
-                                    "base64": image_data
-                                })
-                
-                if images:
-                    print(f"✅ Generated {len(images)} image(s) with Google Imagen 3.0")
-                    return {
-                        "success": True,
-                        "images": images,
-                        "prompt": prompt,
-                        "message": f"Imagen generada con Google AI Studio (Imagen 3.0)",
-                        "provider": "google"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "No images found in response",
-                        "images": []
-                    }
+            for candidate in data["candidates"]:
+                if "content" in candidate and "parts" in candidate["content"]:
+                    for part in candidate["content"]["parts"]:
+                        # Check for inline_data (image)
+                        if "inlineData" in part:
+                            mime_type = part["inlineData"].get("mimeType", "image/png")
+                            image_data = part["inlineData"]["data"]
+                            
+                            # Convert to data URL for frontend
+                            image_url = f"data:{mime_type};base64,{image_data}"
+                            images.append({
+                                "url": image_url,
+                                "base64": image_data
+                            })
+            
+            if images:
+                logger.info("✅ Generated %s image(s) with Google Imagen 3.0", len(images))
+                return {
+                    "success": True,
+                    "images": images,
+                    "prompt": prompt,
+                    "message": f"Imagen generada con Google AI Studio (Imagen 3.0)",
+                    "provider": "google"
+                }
             else:
                 return {
                     "success": False,
-                    "error": "Unexpected response format from Google Imagen",
+                    "error": "No images found in response",
                     "images": []
                 }
+        else:
+            return {
+                "success": False,
+                "error": "Unexpected response format from Google Imagen",
+                "images": []
+            }
     
     except httpx.HTTPStatusError as e:
         error_detail = e.response.text
-        print(f"❌ Google Imagen API error: {error_detail}")
+        logger.error("❌ Google Imagen API error: %s", error_detail)
         
         # Handle quota exceeded errors
         if e.response.status_code == 429:
@@ -202,7 +339,7 @@ async def _generate_with_google_imagen(
         }
     
     except Exception as e:
-        print(f"❌ Google Imagen error: {str(e)}")
+        logger.exception("❌ Google Imagen error: %s", e)
         return {
             "success": False,
             "error": f"Google Imagen error: {str(e)}",
@@ -210,6 +347,27 @@ async def _generate_with_google_imagen(
         }
 
 
+PNG_DATA_URL_PREFIX = "data:image/png;base64,"
+
+
+async def _read_png_data_url(response: httpx.Response) -> str:
+    """
+    Base64-encode a streamed image body straight into a PNG data URL.
+    
+    Chunks are encoded on 3-byte boundaries as they arrive, so the raw image
+    is never held in full next to its encoded copy.
+    """
+    encoded = bytearray(PNG_DATA_URL_PREFIX.encode("ascii"))
+    pending = b""
+    async for chunk in response.aiter_bytes():
+        chunk = pending + chunk
+        aligned = len(chunk) - len(chunk) % 3
+        encoded += base64.b64encode(chunk[:aligned])
+        pending = chunk[aligned:]
+    encoded += base64.b64encode(pending)
+    return encoded.decode("ascii")
+
+
 async def _generate_with_flux(prompt: str, user_id: str) -> dict:
     """
     Generate image using FLUX-schnell via HuggingFace.
@@ -239,35 +397,36 @@ async def _generate_with_flux(prompt: str, user_id: str) -> dict:
     }
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            print(f"🎨 Generating image with FLUX-schnell for user {user_id[:8] if user_id != 'anonymous' else 'anon'}...")
-            response = await client.post(url, json=payload, headers=headers)
+        client = _get_http_client()
+        logger.info("🎨 Generating image with FLUX-schnell for user %s...", user_id[:8] if user_id != 'anonymous' else 'anon')
+        async with client.stream("POST", url, json=payload, headers=headers) as response:
+            if response.is_error:
+                await response.aread()  # so the error handler can read the body
             response.raise_for_status()
             
             # FLUX returns raw image bytes
-            image_bytes = response.content
-            image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-            image_url = f"data:image/png;base64,{image_base64}"
-            
-            print(f"✅ Generated image with FLUX-schnell")
-            
-            # Increment OpenRouter quota (FLUX is via HuggingFace but counts as fallback)
-            await ProviderQuotaService.increment_usage("openrouter", "image")
-            
-            return {
-                "success": True,
-                "images": [{
-                    "url": image_url,
-                    "base64": image_base64
-                }],
-                "prompt": prompt,
-                "message": "Imagen generada con FLUX-schnell (HuggingFace)",
-                "provider": "flux"
-            }
+            image_url = await _read_png_data_url(response)
+        image_base64 = image_url[len(PNG_DATA_URL_PREFIX):]
+        
+        logger.info("✅ Generated image with FLUX-schnell")
+        
+        # Increment OpenRouter quota (FLUX is via HuggingFace but counts as fallback)
+        await ProviderQuotaService.increment_usage("openrouter", "image")
+        
+        return {
+            "success": True,
+            "images": [{
+                "url": image_url,
+                "base64": image_base64
+            }],
+            "prompt": prompt,
+            "message": "Imagen generada con FLUX-schnell (HuggingFace)",
+            "provider": "flux"
+        }
     
     except httpx.HTTPStatusError as e:
         error_detail = e.response.text
-        print(f"❌ FLUX API error: {error_detail}")
+        logger.error("❌ FLUX API error: %s", error_detail)
         
         return {
             "success": False,
@@ -276,7 +435,7 @@ async def _generate_with_flux(prompt: str, user_id: str) -> dict:
         }
     
     except Exception as e:
-        print(f"❌ FLUX error: {str(e)}")
+        logger.exception("❌ FLUX error: %s", e)
         return {
             "success": False,
             "error": f"FLUX error: {str(e)}",
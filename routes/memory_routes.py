@@ -2,12 +2,17 @@
 Memory routes for managing user memories
 """
 
-from fastapi import APIRouter, HTTPException, Request, Depends
+import asyncio
+import logging
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 from services.memory_service import MemoryService
+from services.supabase_service import get_supabase_service
 from middleware.auth_middleware import AuthMiddleware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class AddMemoryRequest(BaseModel):
@@ -22,12 +27,11 @@ class UpdateMemoryRequest(BaseModel):
 
 @router.get("/memories")
 async def get_memories(
-    req: Request,
+    user: dict = Depends(AuthMiddleware.require_auth),
     include_inactive: bool = False
 ):
     """Get all memories for the authenticated user."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
         memories = await MemoryService.get_all_memories(user_id, include_inactive)
@@ -41,18 +45,17 @@ async def get_memories(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting memories: {e}")
+        logger.exception("❌ Error getting memories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/memories/active")
 async def get_active_memories(
-    req: Request,
+    user: dict = Depends(AuthMiddleware.require_auth),
     limit: int = 10,
     memory_type: Optional[str] = None
 ):
     """Get active memories for the authenticated user."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
         memories = await MemoryService.get_active_memories(user_id, limit, memory_type)
@@ -66,17 +69,16 @@ async def get_active_memories(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting active memories: {e}")
+        logger.exception("❌ Error getting active memories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/memories")
 async def add_memory(
     request: AddMemoryRequest,
-    req: Request
+    user: dict = Depends(AuthMiddleware.require_auth)
 ):
     """Add a new memory for the authenticated user."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
         memory = await MemoryService.add_memory(
@@ -97,41 +99,28 @@ async def add_memory(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error adding memory: {e}")
+        logger.exception("❌ Error adding memory: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/memories/{memory_id}")
 async def update_memory(
     memory_id: int,
     request: UpdateMemoryRequest,
-    req: Request
+    user: dict = Depends(AuthMiddleware.require_auth)
 ):
     """Update a memory (must belong to authenticated user)."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
-        
-        # Verify memory belongs to user
-        supabase = get_supabase_service()
-        from services.supabase_service import get_supabase_service
-        
-        existing = supabase.table('user_memories')\
-            .select('*')\
-            .eq('id', memory_id)\
-            .eq('user_id', user['id'])\
-            .execute()
-        
-        if not existing.data or len(existing.data) == 0:
-            raise HTTPException(status_code=404, detail="Memory not found")
-        
+        # Scoped to the user, so a memory they don't own matches no row
         memory = await MemoryService.update_memory(
             memory_id=memory_id,
             memory_text=request.memory_text,
             importance_score=request.importance_score,
-            is_active=request.is_active
+            is_active=request.is_active,
+            user_id=user['id']
         )
         
         if not memory:
-            raise HTTPException(status_code=500, detail="Failed to update memory")
+            raise HTTPException(status_code=404, detail="Memory not found")
         
         return {
             "success": True,
@@ -141,35 +130,20 @@ async def update_memory(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error updating memory: {e}")
+        logger.exception("❌ Error updating memory: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/memories/{memory_id}")
 async def delete_memory(
     memory_id: int,
-    req: Request
+    user: dict = Depends(AuthMiddleware.require_auth)
 ):
     """Delete (deactivate) a memory."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
-        
-        # Verify memory belongs to user
-        from services.supabase_service import get_supabase_service
-        supabase = get_supabase_service()
-        
-        existing = supabase.table('user_memories')\
-            .select('*')\
-            .eq('id', memory_id)\
-            .eq('user_id', user['id'])\
-            .execute()
-        
-        if not existing.data or len(existing.data) == 0:
-            raise HTTPException(status_code=404, detail="Memory not found")
-        
-        success = await MemoryService.delete_memory(memory_id)
+        success = await MemoryService.delete_memory(memory_id, user_id=user['id'])
         
         if not success:
-            raise HTTPException(status_code=500, detail="Failed to delete memory")
+            raise HTTPException(status_code=404, detail="Memory not found")
         
         return {
             "success": True,
@@ -179,14 +153,13 @@ async def delete_memory(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error deleting memory: {e}")
+        logger.exception("❌ Error deleting memory: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/memories/formatted")
-async def get_formatted_memories(req: Request):
+async def get_formatted_memories(user: dict = Depends(AuthMiddleware.require_auth)):
     """Get memories formatted for LLM context."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
         formatted = await MemoryService.format_memories_for_prompt(user_id)
@@ -199,17 +172,16 @@ async def get_formatted_memories(req: Request):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error formatting memories: {e}")
+        logger.exception("❌ Error formatting memories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/memories/explicit")
 async def get_explicit_memories(
-    req: Request,
+    user: dict = Depends(AuthMiddleware.require_auth),
     limit: int = 20
 ):
     """Get memories that were explicitly requested by the user."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
         memories = await MemoryService.get_active_memories(
@@ -227,24 +199,24 @@ async def get_explicit_memories(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error getting explicit memories: {e}")
+        logger.exception("❌ Error getting explicit memories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/memories/clear")
-async def clear_all_memories(req: Request):
+async def clear_all_memories(user: dict = Depends(AuthMiddleware.require_auth)):
     """Clear all memories for the authenticated user."""
     try:
-        user = await AuthMiddleware.get_current_user(req, required=True)
         user_id = user['id']
         
-        from services.supabase_service import get_supabase_service
         supabase = get_supabase_service()
         
         # Deactivate all memories
-        response = supabase.table('user_memories')\
-            .update({'is_active': False})\
-            .eq('user_id', user_id)\
-            .execute()
+        await asyncio.to_thread(
+            lambda: supabase.table('user_memories')
+                .update({'is_active': False})
+                .eq('user_id', user_id)
+                .execute()
+        )
         
         return {
             "success": True,
@@ -254,5 +226,5 @@ async def clear_all_memories(req: Request):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error clearing memories: {e}")
+        logger.exception("❌ Error clearing memories: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
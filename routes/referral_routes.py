@@ -1,6 +1,7 @@
 """
 Referral Routes - API endpoints for the referral system
 """
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Dict, Any
 from pydantic import BaseModel
@@ -9,6 +10,8 @@ from services.referral_service import ReferralService
 from services.security_logger import SecurityLogger
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/referrals", tags=["Referrals"])
 
 
@@ -24,9 +27,9 @@ async def get_my_referral_stats(current_user: Dict = Depends(AuthMiddleware.requ
     """
     try:
         user_id = current_user["id"]
-        print(f"[REFERRALS] Fetching stats for user: {user_id}")
+        logger.info("[REFERRALS] Fetching stats for user: %s", user_id)
         stats = await ReferralService.get_referral_stats(user_id)
-        print(f"[REFERRALS] Stats retrieved: {stats}")
+        logger.info("[REFERRALS] Stats retrieved: %s", stats)
         
         return {
             "success": True,
@@ -34,7 +37,7 @@ async def get_my_referral_stats(current_user: Dict = Depends(AuthMiddleware.requ
         }
         
     except Exception as e:
-        print(f"[REFERRALS] Error: {str(e)}")
+        logger.exception("[REFERRALS] Error: %s", e)
         SecurityLogger.log_api_error(
             api_name="GET /api/referrals/me",
             error_message=str(e),
@@ -56,25 +59,24 @@ async def redeem_referral_code(
     """
     try:
         user_id = current_user["id"]
-        print(f"[REFERRAL-REDEEM] 🎁 User {user_id} attempting to redeem code: {body.referral_code}")
+        logger.info("[REFERRAL-REDEEM] 🎁 User %s attempting to redeem code: %s", user_id, body.referral_code)
         
         # Get user's IP address
         client_ip = request.client.host if request.client else "0.0.0.0"
-        print(f"[REFERRAL-REDEEM] 📍 Client IP: {client_ip}")
+        logger.info("[REFERRAL-REDEEM] 📍 Client IP: %s", client_ip)
         
-        # Get user creation timestamp from Supabase
-        # Note: current_user should include created_at from the JWT or we fetch it
+        # Account creation time from Supabase Auth (auth.users)
         user_created_at = current_user.get("created_at")
         if not user_created_at:
             # Fallback: assume account is fresh (within 24h)
-            print(f"[REFERRAL-REDEEM] ⚠️ No created_at in JWT, assuming fresh account")
+            logger.warning("[REFERRAL-REDEEM] ⚠️ No created_at for user, assuming fresh account")
             user_created_at = datetime.now(timezone.utc)
         elif isinstance(user_created_at, str):
             user_created_at = datetime.fromisoformat(user_created_at.replace('Z', '+00:00'))
-            print(f"[REFERRAL-REDEEM] 📅 Account created at: {user_created_at}")
+            logger.info("[REFERRAL-REDEEM] 📅 Account created at: %s", user_created_at)
         
         account_age = datetime.now(timezone.utc) - user_created_at
-        print(f"[REFERRAL-REDEEM] ⏰ Account age: {account_age} (limit: 24h)")
+        logger.info("[REFERRAL-REDEEM] ⏰ Account age: %s (limit: 24h)", account_age)
         
         # Redeem the referral code
         result = await ReferralService.redeem_referral_code(
@@ -85,14 +87,14 @@ async def redeem_referral_code(
         )
         
         if result["success"]:
-            print(f"[REFERRAL-REDEEM] ✅ Redemption successful!")
+            logger.info("[REFERRAL-REDEEM] ✅ Redemption successful!")
             return {
                 "success": True,
                 "message": result["message"],
                 "bonus_applied": result["bonus_applied"]
             }
         else:
-            print(f"[REFERRAL-REDEEM] ❌ Redemption failed: {result['message']}")
+            logger.warning("[REFERRAL-REDEEM] ❌ Redemption failed: %s", result['message'])
             return {
                 "success": False,
                 "message": result["message"],
@@ -100,9 +102,7 @@ async def redeem_referral_code(
             }
         
     except Exception as e:
-        print(f"[REFERRAL-REDEEM] ❌ Exception: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[REFERRAL-REDEEM] ❌ Exception: %s", e)
         SecurityLogger.log_api_error(
             api_name="POST /api/referrals/redeem",
             error_message=str(e),
@@ -119,18 +119,18 @@ async def validate_referral_code(referral_code: str) -> Dict[str, Any]:
     This must be public because users aren't logged in yet when validating.
     """
     try:
-        print(f"[REFERRAL-VALIDATE] Validating code: {referral_code}")
+        logger.info("[REFERRAL-VALIDATE] Validating code: %s", referral_code)
         referrer = await ReferralService.validate_referral_code(referral_code)
         
         if referrer:
-            print(f"[REFERRAL-VALIDATE] ✅ Code is valid")
+            logger.info("[REFERRAL-VALIDATE] ✅ Code is valid")
             return {
                 "success": True,
                 "valid": True,
                 "message": "Valid referral code"
             }
         else:
-            print(f"[REFERRAL-VALIDATE] ❌ Code is invalid")
+            logger.warning("[REFERRAL-VALIDATE] ❌ Code is invalid")
             return {
                 "success": True,
                 "valid": False,
@@ -138,7 +138,7 @@ async def validate_referral_code(referral_code: str) -> Dict[str, Any]:
             }
         
     except Exception as e:
-        print(f"[REFERRAL-VALIDATE] ❌ Error: {str(e)}")
+        logger.exception("[REFERRAL-VALIDATE] ❌ Error: %s", e)
         SecurityLogger.log_api_error(
             api_name="GET /api/referrals/validate/{referral_code}",
             error_message=str(e),
@@ -2,7 +2,8 @@
 Settings routes for managing user settings and data
 """
 
-from fastapi import APIRouter, HTTPException, Request, Depends
+import logging
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 from services.user_service import UserService
@@ -14,6 +15,8 @@ import csv
 from io import StringIO
 from fastapi.responses import StreamingResponse
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 class UpdateSettingsRequest(BaseModel):
@@ -55,14 +58,14 @@ async def get_settings(user: dict = Depends(AuthMiddleware.require_auth)):
             "settings": settings
         }
     except Exception as e:
-        print(f"❌ Error getting settings: {e}")
+        logger.exception("❌ Error getting settings: %s", e)
         raise HTTPException(status_code=500, detail="Error al obtener configuración")
 
 @router.patch("/settings")
 async def update_settings(
     request: UpdateSettingsRequest,
-    req: Request,
-    user: dict = Depends(AuthMiddleware.require_auth)
+    user: dict = Depends(AuthMiddleware.require_auth),
+    audit_ctx: dict = Depends(SecurityMiddleware.audit_context)
 ):
     """Update user settings."""
     try:
@@ -86,8 +89,7 @@ async def update_settings(
             action="settings_updated",
             resource_type="user_settings",
             resource_id=settings['id'],
-            ip_address=SecurityMiddleware.get_client_ip(req),
-            user_agent=SecurityMiddleware.get_user_agent(req)
+            **audit_ctx
         )
         
         return {
@@ -97,7 +99,7 @@ async def update_settings(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error updating settings: {e}")
+        logger.exception("❌ Error updating settings: %s", e)
         raise HTTPException(status_code=500, detail="Error al actualizar configuración")
 
 @router.post("/settings/export/json")
@@ -133,7 +135,7 @@ async def export_data_json(user: dict = Depends(AuthMiddleware.require_auth)):
             }
         )
     except Exception as e:
-        print(f"❌ Error exporting JSON: {e}")
+        logger.exception("❌ Error exporting JSON: %s", e)
         raise HTTPException(status_code=500, detail="Error al exportar datos")
 
 @router.post("/settings/export/csv")
@@ -168,13 +170,13 @@ async def export_data_csv(user: dict = Depends(AuthMiddleware.require_auth)):
             }
         )
     except Exception as e:
-        print(f"❌ Error exporting CSV: {e}")
+        logger.exception("❌ Error exporting CSV: %s", e)
         raise HTTPException(status_code=500, detail="Error al exportar datos")
 
 @router.delete("/settings/conversations")
 async def delete_all_conversations(
-    req: Request,
-    user: dict = Depends(AuthMiddleware.require_auth)
+    user: dict = Depends(AuthMiddleware.require_auth),
+    audit_ctx: dict = Depends(SecurityMiddleware.audit_context)
 ):
     """Delete all conversations for the current user."""
     try:
@@ -190,8 +192,7 @@ async def delete_all_conversations(
             user_id=user['id'],
             action="all_conversations_deleted",
             resource_type="conversations",
-            ip_address=SecurityMiddleware.get_client_ip(req),
-            user_agent=SecurityMiddleware.get_user_agent(req),
+            **audit_ctx,
             details={"deleted_count": deleted_count}
         )
         
@@ -200,5 +201,5 @@ async def delete_all_conversations(
             "deleted_count": deleted_count
         }
     except Exception as e:
-        print(f"❌ Error deleting conversations: {e}")
+        logger.exception("❌ Error deleting conversations: %s", e)
         raise HTTPException(status_code=500, detail="Error al eliminar conversaciones")
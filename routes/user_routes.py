@@ -3,9 +3,12 @@ User routes for managing user profile
 Note: User settings endpoints are in settings_routes.py to avoid conflicts
 """
 
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends
 from middleware.auth_middleware import AuthMiddleware
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/user/profile")
@@ -26,7 +29,7 @@ async def get_profile(user: dict = Depends(AuthMiddleware.require_auth)):
         }
         
     except Exception as e:
-        print(f"❌ Error getting profile: {e}")
+        logger.exception("❌ Error getting profile: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error interno del servidor"
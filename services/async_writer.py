@@ -0,0 +1,140 @@
+"""
+Async Writer - Batches fire-and-forget Supabase inserts off the request path
+
+Rows are queued without awaiting the database; a background task drains the
+queue and writes up to `max_batch` rows per insert call.
+
+- Bounded queue: when full, the oldest row is dropped (backpressure)
+- The drain task starts lazily on the first enqueue (works with lifespan="off")
+- Blocking Supabase calls run in a worker thread
+- A failed batch is retried row by row, so one bad row only loses itself
+- On Lambda, where close() never runs, the handler calls flush_blocking()
+  after each invocation, before the container can be frozen
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional
+from services.supabase_service import get_supabase_service
+
+
+class BatchedWriter:
+    """Queue rows for one table and insert them in batches from a background task."""
+
+    def __init__(
+        self,
+        table: str,
+        max_batch: int = 100,
+        max_delay_seconds: float = 0.05,
+        max_queue_size: int = 10000
+    ):
+        self.table = table
+        self.max_batch = max_batch
+        self.max_delay_seconds = max_delay_seconds
+        self._rows: Deque[Dict[str, Any]] = deque(maxlen=max_queue_size)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.dropped_rows = 0
+
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        """Queue a row for insertion. Never blocks; drops the oldest row when full."""
+        if len(self._rows) == self._rows.maxlen:
+            self.dropped_rows += 1
+        self._rows.append(row)
+        self._ensure_started()
+        self._wakeup.set()
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+            self._task = loop.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Give concurrent requests a moment to add rows to the same batch
+            if len(self._rows) < self.max_batch:
+                await asyncio.sleep(self.max_delay_seconds)
+
+            while self._rows:
+                await self._write_next_batch()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        rows = self._rows
+        return [rows.popleft() for _ in range(min(self.max_batch, len(rows)))]
+
+    async def _write_next_batch(self) -> None:
+        # One batch at a time, so flush() also waits for a batch already in flight
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            if self._rows:
+                await self._write_batch(self._take_batch())
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        supabase_service = get_supabase_service()
+        if not supabase_service:
+            return
+        await asyncio.to_thread(
+            lambda: supabase_service.table(self.table).insert(rows).execute()
+        )
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            await self._insert(batch)
+            return
+        except Exception as e:
+            # Silently fail to avoid breaking main flow
+            print(f"⚠️ Batched insert into {self.table} failed ({len(batch)} rows, non-critical): {e}")
+            if len(batch) == 1:
+                return
+
+        # The insert is all-or-nothing: retry row by row so only bad rows are lost
+        failed = 0
+        for row in batch:
+            try:
+                await self._insert([row])
+            except Exception:
+                failed += 1
+        if failed:
+            print(f"⚠️ Dropped {failed} of {len(batch)} rows for {self.table} after row-by-row retry")
+
+    async def flush(self) -> None:
+        """Write every queued row now, and wait for a batch already being written."""
+        while self._rows:
+            await self._write_next_batch()
+        if self._write_lock is not None:
+            async with self._write_lock:
+                pass
+
+    def flush_blocking(self) -> None:
+        """
+        Flush from synchronous code, between invocations (Lambda handler after
+        Mangum returns). Runs on the loop the drain task belongs to, which is
+        idle by then.
+        """
+        if not self._rows and (self._write_lock is None or not self._write_lock.locked()):
+            return
+        loop = self._task.get_loop() if self._task is not None else None
+        if loop is None or loop.is_closed():
+            # The old loop is gone: its task and lock go with it
+            self._task = None
+            self._write_lock = None
+            asyncio.run(self.flush())
+            return
+        loop.run_until_complete(self.flush())
+
+    async def close(self) -> None:
+        """Stop the drain task and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -4,9 +4,20 @@ Audit logging service using Supabase
 
 from typing import Optional
 from datetime import datetime
-from services.supabase_service import get_supabase_service
+from services.async_writer import BatchedWriter
 import os
 
+# Audit rows are written in batches by a background task, off the request path.
+# Each batch is one multi-row INSERT, i.e. one statement and one commit.
+AUDIT_BATCH_SIZE = 128
+AUDIT_FLUSH_SECONDS = 0.1
+
+audit_writer = BatchedWriter(
+    "audit_logs",
+    max_batch=AUDIT_BATCH_SIZE,
+    max_delay_seconds=AUDIT_FLUSH_SECONDS
+)
+
 class AuditLogService:
     
     @staticmethod
@@ -19,14 +30,15 @@ class AuditLogService:
         user_agent: Optional[str] = None,
         details: Optional[str] = None
     ) -> bool:
-        """Log an audit event to Supabase."""
+        """Queue an audit event for a batched insert into Supabase."""
         # Check if audit logging is disabled
         if os.getenv("DISABLE_AUDIT_LOGS", "false").lower() == "true":
             return True
         
-        supabase_service = get_supabase_service()
         try:
-            audit_data = {
+            # None values are kept (as NULL) so every queued row has the same
+            # columns, which a multi-row insert requires
+            audit_writer.enqueue({
                 "user_id": user_id,
                 "action": action,
                 "resource_type": resource_type,
@@ -35,16 +47,8 @@ class AuditLogService:
                 "user_agent": user_agent,
                 "details": details,
                 "created_at": datetime.utcnow().isoformat()
-            }
-            
-            # Remove None values
-            audit_data = {k: v for k, v in audit_data.items() if v is not None}
-            
-            response = supabase_service.table("audit_logs").insert(audit_data).execute()
-            
-            if response.data:
-                return True
-            return False
+            })
+            return True
             
         except Exception as e:
             # Silently fail to avoid breaking main flow
@@ -1,7 +1,14 @@
+import asyncio
 from typing import Optional, Dict
+from jose import jwt, JWTError
 from services.supabase_service import get_supabase_client, get_supabase_service
+from config import config
 import os
 
+# Supabase signs session tokens with the project JWT secret for this audience
+_SUPABASE_JWT_ALGORITHM = "HS256"
+_SUPABASE_JWT_AUDIENCE = "authenticated"
+
 # gotrue will be imported via supabase client when needed
 try:
     from gotrue.errors import AuthApiError
@@ -11,12 +18,22 @@ except ImportError:
 
 class AuthService:
     @staticmethod
-    async def sign_up(email: str, password: str, full_name: Optional[str] = None) -> Optional[Dict]:
-        """Register a new user with Supabase Auth."""
+    async def sign_up(
+        email: str,
+        password: str,
+        full_name: Optional[str] = None,
+        terms_accepted: bool = False
+    ) -> Optional[Dict]:
+        """Register a new user with Supabase Auth.
+
+        terms_accepted travels in the user metadata; the handle_new_user trigger
+        (db/create_auth_triggers.sql) writes it to user_settings in the same
+        transaction that creates the auth user.
+        """
         supabase_client = get_supabase_client()
         supabase_service = get_supabase_service()
         try:
-            user_metadata = {}
+            user_metadata = {"terms_accepted": terms_accepted}
             if full_name:
                 user_metadata["full_name"] = full_name
 
@@ -156,6 +173,79 @@ class AuthService:
             print(f"❌ Error during Google sign in: {e}")
             return None
 
+    @staticmethod
+    def can_verify_locally(access_token: str) -> bool:
+        """True when the token is HS256-signed and the project JWT secret is configured."""
+        if not config.SUPABASE_JWT_SECRET:
+            return False
+        try:
+            return jwt.get_unverified_header(access_token).get("alg") == _SUPABASE_JWT_ALGORITHM
+        except JWTError:
+            return False
+
+    @staticmethod
+    def verify_access_token(access_token: str) -> Optional[Dict]:
+        """
+        Verify a Supabase access token locally (signature, expiry, audience) and
+        build the user from its claims, without a round-trip to Supabase Auth.
+        The token carries no confirmation or creation date: email_verified and
+        created_at are filled in by get_user_from_local_token.
+        """
+        try:
+            claims = jwt.decode(
+                access_token,
+                config.SUPABASE_JWT_SECRET,
+                algorithms=[_SUPABASE_JWT_ALGORITHM],
+                audience=_SUPABASE_JWT_AUDIENCE
+            )
+        except JWTError as e:
+            print(f"❌ Invalid access token: {e}")
+            return None
+
+        if not claims.get("sub"):
+            return None
+
+        user_metadata = claims.get("user_metadata") or {}
+        return {
+            "id": claims["sub"],
+            "email": claims.get("email"),
+            "full_name": user_metadata.get("full_name"),
+            "avatar_url": user_metadata.get("avatar_url"),
+            "email_verified": None,
+            "created_at": None
+        }
+
+    @staticmethod
+    async def get_user_from_local_token(access_token: str) -> Optional[Dict]:
+        """
+        Get user data from a locally verifiable access token.
+
+        Same shape and values as get_user_from_token: email_verified and
+        created_at come from auth.users through one service-role RPC
+        (db/auth_user_lookup.sql). Falls back to Supabase Auth if the RPC fails.
+        """
+        user = AuthService.verify_access_token(access_token)
+        if not user:
+            return None
+
+        try:
+            supabase_service = get_supabase_service()
+            response = await asyncio.to_thread(
+                supabase_service.rpc('get_auth_user_by_id', {'p_user_id': user["id"]}).execute
+            )
+        except Exception as e:
+            print(f"⚠️ Auth user lookup unavailable, asking Supabase Auth: {e}")
+            return await AuthService.get_user_from_token(access_token)
+
+        if not response.data:
+            # Valid signature but the account no longer exists
+            return None
+
+        account = response.data[0]
+        user["email_verified"] = account.get("email_confirmed_at") is not None
+        user["created_at"] = account.get("created_at")
+        return user
+
     @staticmethod
     async def get_user_from_token(access_token: str) -> Optional[Dict]:
         """Get user data from access token."""
@@ -2,11 +2,67 @@
 Conversation service for managing chat conversations using Supabase
 """
 
-from typing import Optional, List, Dict
+import asyncio
+import base64
+import json
+from collections import defaultdict
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
+from cachetools import TTLCache
 from services.supabase_service import get_supabase_service
 from services.llm_service import LLMService
 
+# Upper bound on concurrent per-conversation queries in the analytics fallback
+MESSAGE_COUNT_CONCURRENCY = 16
+
+# Per-user analytics responses keyed by (user_id, report); dropped on conversation writes
+ANALYTICS_CACHE_TTL_SECONDS = 30
+analytics_cache = TTLCache(maxsize=2000, ttl=ANALYTICS_CACHE_TTL_SECONDS)
+ANALYTICS_REPORTS = ("usage", "models")
+
+
+def invalidate_analytics(user_id: Optional[str]) -> None:
+    """Forget cached analytics for a user after their conversations change."""
+    if not user_id:
+        return
+    for report in ANALYTICS_REPORTS:
+        analytics_cache.pop((user_id, report), None)
+
+
+def _invalidate_analytics_for_rows(rows: Optional[List[Dict]]) -> None:
+    for row in rows or []:
+        invalidate_analytics(row.get("user_id"))
+
+# Conversation id -> owner user_id, for ownership checks; dropped on delete
+OWNER_CACHE_TTL_SECONDS = 30
+_owner_cache = TTLCache(maxsize=4096, ttl=OWNER_CACHE_TTL_SECONDS)
+
+
+def encode_list_cursor(row: Dict) -> str:
+    """Opaque keyset cursor for list_conversations: (updated_at, id) of the last row, URL-safe."""
+    raw = json.dumps([row["updated_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_list_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    Inverse of encode_list_cursor; raises ValueError on a malformed cursor.
+
+    The cursor comes from the client and ends up inside a PostgREST filter, so
+    updated_at is parsed and re-serialized (nothing but a timestamp survives)
+    and id must be a positive integer.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, row_id = json.loads(raw)
+        timestamp = datetime.fromisoformat(updated_at.replace("Z", "+00:00"))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    if type(row_id) is not int or row_id <= 0:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return timestamp.isoformat(), row_id
+
+
 class ConversationService:
 
     @staticmethod
@@ -28,8 +84,10 @@ class ConversationService:
             }
 
             response = supabase_service.table("conversations").insert(conversation_data).execute()
+            invalidate_analytics(user_id)
 
             if response.data and len(response.data) > 0:
+                _owner_cache[response.data[0]['id']] = user_id
                 return response.data[0]
             return None
 
@@ -59,33 +117,126 @@ class ConversationService:
             print(f"❌ Error getting conversation: {e}")
             return None
 
+    @staticmethod
+    async def get_owner(conversation_id: int) -> Optional[str]:
+        """Get the user_id that owns a conversation (cached briefly), or None if it does not exist."""
+        owner = _owner_cache.get(conversation_id)
+        if owner is not None:
+            return owner
+
+        try:
+            supabase = get_supabase_service()
+            response = supabase.table('conversations').select('user_id').eq('id', conversation_id).execute()
+
+            if not response or not response.data:
+                return None
+
+            owner = response.data[0]['user_id']
+            _owner_cache[conversation_id] = owner
+            return owner
+        except Exception as e:
+            print(f"❌ Error getting conversation owner: {e}")
+            return None
+
     @staticmethod
     async def list_conversations(
         user_id: str,
-        include_archived: bool = False
+        include_archived: bool = False,
+        after: Optional[Tuple[str, int]] = None,
+        limit: Optional[int] = None
     ) -> List[Dict]:
-        """List all conversations for a user."""
+        """
+        List a user's conversations, most recently updated first, each with
+        last_message (a preview) and message_count from the conversations_list_v
+        view (db/conversation_list_view.sql). Falls back to plain conversation
+        rows if the view is unavailable.
+
+        Keyset pagination: pass the (updated_at, id) of the last row seen as
+        `after` (see decode_list_cursor) and a page size as `limit`; without
+        them every conversation is returned. id breaks ties, so rows sharing a
+        timestamp are neither skipped nor repeated across pages.
+        """
         supabase_service = get_supabase_service()
-        try:
-            query = supabase_service.table("conversations").select("*").eq("user_id", user_id)
+
+        def fetch(source: str) -> List[Dict]:
+            query = supabase_service.table(source).select("*").eq("user_id", user_id)
 
             if not include_archived:
                 query = query.eq("is_archived", False)
 
-            response = query.order("updated_at", desc=True).execute()
+            if after:
+                updated_at, row_id = after
+                query = query.or_(
+                    f'updated_at.lt."{updated_at}",'
+                    f'and(updated_at.eq."{updated_at}",id.lt.{row_id})'
+                )
+
+            query = query.order("updated_at", desc=True).order("id", desc=True)
+
+            if limit:
+                query = query.limit(limit)
+
+            response = query.execute()
             return response.data if response.data else []
 
+        try:
+            return fetch("conversations_list_v")
+        except Exception as e:
+            print(f"⚠️ Conversation list view unavailable, using conversations table: {e}")
+
+        try:
+            return fetch("conversations")
         except Exception as e:
             print(f"❌ Error listing conversations: {e}")
             return []
 
+    @staticmethod
+    async def search_conversations(user_id: str, query: str) -> List[Dict]:
+        """
+        Find a user's conversations (archived included) whose title or messages
+        contain the query, case-insensitively. Uses the search_user_conversations
+        RPC (db/conversation_search.sql); falls back to scanning each conversation.
+        """
+        supabase_service = get_supabase_service()
+        try:
+            response = supabase_service.rpc('search_user_conversations', {
+                'p_user_id': user_id,
+                'p_query': query
+            }).execute()
+            return response.data or []
+
+        except Exception as e:
+            print(f"⚠️ Conversation search RPC unavailable, scanning conversations: {e}")
+
+        conversations = await ConversationService.list_conversations(user_id, include_archived=True)
+
+        results = []
+        query_lower = query.lower()
+
+        for conv in conversations:
+            if query_lower in conv['title'].lower():
+                results.append(conv)
+                continue
+
+            messages = await ConversationService.get_messages(conv['id'])
+            for msg in messages:
+                if query_lower in msg['content'].lower():
+                    results.append(conv)
+                    break
+
+        return results
+
     @staticmethod
     async def update_conversation(
         conversation_id: int,
         title: Optional[str] = None,
-        is_archived: Optional[bool] = None
+        is_archived: Optional[bool] = None,
+        user_id: Optional[str] = None
     ) -> Optional[Dict]:
-        """Update conversation details."""
+        """
+        Update conversation details. With user_id, only that user's conversation
+        is updated (None if it is not theirs), so no separate ownership query is needed.
+        """
         supabase_service = get_supabase_service()
         try:
             update_data = {"updated_at": datetime.utcnow().isoformat()}
@@ -96,7 +247,13 @@ class ConversationService:
             if is_archived is not None:
                 update_data["is_archived"] = is_archived
 
-            response = supabase_service.table("conversations").update(update_data).eq("id", conversation_id).execute()
+            query = supabase_service.table("conversations").update(update_data).eq("id", conversation_id)
+
+            if user_id:
+                query = query.eq("user_id", user_id)
+
+            response = query.execute()
+            _invalidate_analytics_for_rows(response.data)
 
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -107,12 +264,23 @@ class ConversationService:
             return None
 
     @staticmethod
-    async def delete_conversation(conversation_id: int) -> bool:
-        """Delete a conversation and all its messages."""
+    async def delete_conversation(conversation_id: int, user_id: Optional[str] = None) -> bool:
+        """
+        Delete a conversation and all its messages. Returns False if nothing was
+        deleted; with user_id, only that user's conversation is deleted.
+        """
         supabase_service = get_supabase_service()
         try:
-            response = supabase_service.table("conversations").delete().eq("id", conversation_id).execute()
-            return response.data is not None
+            query = supabase_service.table("conversations").delete().eq("id", conversation_id)
+
+            if user_id:
+                query = query.eq("user_id", user_id)
+
+            response = query.execute()
+            if response.data:
+                _owner_cache.pop(conversation_id, None)
+            _invalidate_analytics_for_rows(response.data)
+            return bool(response.data)
 
         except Exception as e:
             print(f"❌ Error deleting conversation: {e}")
@@ -139,9 +307,10 @@ class ConversationService:
             response = supabase_service.table("messages").insert(message_data).execute()
 
             if response.data and len(response.data) > 0:
-                supabase_service.table("conversations").update({
+                conversation_response = supabase_service.table("conversations").update({
                     "updated_at": datetime.utcnow().isoformat()
                 }).eq("id", conversation_id).execute()
+                _invalidate_analytics_for_rows(conversation_response.data)
 
                 return response.data[0]
             return None
@@ -162,6 +331,131 @@ class ConversationService:
             print(f"❌ Error getting messages: {e}")
             return []
 
+    @staticmethod
+    async def get_conversation_with_messages(
+        conversation_id: int,
+        user_id: str
+    ) -> Tuple[Optional[Dict], List[Dict]]:
+        """
+        Get a user's conversation and its messages, querying both concurrently.
+        Returns (None, []) if the conversation does not exist or is not the user's.
+        """
+        supabase_service = get_supabase_service()
+
+        def fetch_conversation() -> List[Dict]:
+            return supabase_service.table("conversations").select("*")\
+                .eq("id", conversation_id).eq("user_id", user_id).execute().data
+
+        def fetch_messages() -> List[Dict]:
+            return supabase_service.table("messages").select("*")\
+                .eq("conversation_id", conversation_id).order("created_at", desc=False).execute().data
+
+        try:
+            # The Supabase client blocks, so each query runs in a worker thread
+            conversation_rows, messages = await asyncio.gather(
+                asyncio.to_thread(fetch_conversation),
+                asyncio.to_thread(fetch_messages)
+            )
+        except Exception as e:
+            print(f"❌ Error getting conversation with messages: {e}")
+            return None, []
+
+        # Messages were fetched before ownership was known; drop them if it failed
+        if not conversation_rows:
+            return None, []
+        return conversation_rows[0], messages or []
+
+    @staticmethod
+    async def get_message_counts(conversation_ids: List[int]) -> Dict[int, int]:
+        """
+        Get message counts for several conversations in one round-trip.
+        Uses the count_messages_by_conversation RPC (db/analytics_functions.sql);
+        falls back to concurrent per-conversation count queries if it is unavailable.
+        """
+        if not conversation_ids:
+            return {}
+
+        supabase_service = get_supabase_service()
+        try:
+            response = supabase_service.rpc('count_messages_by_conversation', {
+                'p_conversation_ids': conversation_ids
+            }).execute()
+            counts = {row['conversation_id']: row['message_count'] for row in (response.data or [])}
+            return {conv_id: counts.get(conv_id, 0) for conv_id in conversation_ids}
+
+        except Exception as e:
+            print(f"⚠️ Message count RPC unavailable, falling back to per-conversation fetch: {e}")
+
+        def count_messages(conv_id: int) -> int:
+            try:
+                response = supabase_service.table("messages").select("id", count="exact").eq("conversation_id", conv_id).limit(0).execute()
+                return response.count or 0
+            except Exception as e:
+                print(f"❌ Error counting messages: {e}")
+                return 0
+
+        # The Supabase client blocks, so each query runs in a worker thread
+        semaphore = asyncio.Semaphore(MESSAGE_COUNT_CONCURRENCY)
+
+        async def fetch(conv_id: int) -> int:
+            async with semaphore:
+                return await asyncio.to_thread(count_messages, conv_id)
+
+        all_counts = await asyncio.gather(*(fetch(conv_id) for conv_id in conversation_ids))
+        return dict(zip(conversation_ids, all_counts))
+
+    @staticmethod
+    async def aggregate_for_user(user_id: str) -> Dict:
+        """
+        Get a user's analytics summary: totals, per-model stats and the 10 most
+        recent conversations. Uses the analytics_summary_for_user RPC
+        (db/analytics_functions.sql); falls back to aggregating in Python.
+        """
+        supabase_service = get_supabase_service()
+        try:
+            response = supabase_service.rpc('analytics_summary_for_user', {
+                'p_user_id': user_id
+            }).execute()
+            if response.data is not None:
+                summary = response.data
+                return {
+                    "total_conversations": int(summary.get("total_conversations") or 0),
+                    "total_messages": int(summary.get("total_messages") or 0),
+                    "model_stats": {
+                        model: {
+                            "count": int(stats["count"]),
+                            "total_messages": int(stats["total_messages"])
+                        }
+                        for model, stats in (summary.get("model_stats") or {}).items()
+                    },
+                    "recent_conversations": summary.get("recent_conversations") or []
+                }
+
+        except Exception as e:
+            print(f"⚠️ Analytics summary RPC unavailable, aggregating in Python: {e}")
+
+        conversations = await ConversationService.list_conversations(user_id, include_archived=True)
+        message_counts = await ConversationService.get_message_counts(
+            [conv['id'] for conv in conversations]
+        )
+
+        total_messages = 0
+        model_stats = defaultdict(lambda: {"count": 0, "total_messages": 0})
+        for conv in conversations:
+            message_count = message_counts.get(conv['id'], 0)
+            total_messages += message_count
+
+            stats = model_stats[conv.get('model') or 'Unknown']
+            stats["count"] += 1
+            stats["total_messages"] += message_count
+
+        return {
+            "total_conversations": len(conversations),
+            "total_messages": total_messages,
+            "model_stats": dict(model_stats),
+            "recent_conversations": conversations[:10]
+        }
+
     @staticmethod
     async def generate_smart_title(user_message: str, assistant_response: str) -> str:
         """Generate a smart title for the conversation using LLM."""
@@ -287,13 +581,9 @@ Título:"""
             # Extract memories from this conversation (DISABLED - solo recuerdos del chat actual)
             # Los recuerdos se extraen solo si el usuario lo solicita explícitamente
             # Para evitar recordar información de chats eliminados
-            try:
-                from services.memory_service import MemoryService
-                # MEMORY EXTRACTION DISABLED BY DEFAULT
-                # Solo se activa si el usuario pide "recuerda esto" o similar
-                print(f"ℹ️ Memory extraction disabled (only per-conversation context)")
-            except Exception as e:
-                print(f"⚠️ Error in memory service: {e}")
+            # MEMORY EXTRACTION DISABLED BY DEFAULT
+            # Solo se activa si el usuario pide "recuerda esto" o similar
+            print(f"ℹ️ Memory extraction disabled (only per-conversation context)")
 
             print(f"✅ Chat saved successfully to conversation {conversation_id}")
             return {'id': conversation_id}
@@ -2,7 +2,6 @@
 """
 Email Service - Email verification and password reset using Resend
 """
-import resend
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
@@ -10,7 +9,14 @@ from services.supabase_service import get_supabase_service
 from services.security_logger import SecurityLogger
 import os
 
-resend.api_key = os.getenv("RESEND_API", "")
+RESEND_API_KEY = os.getenv("RESEND_API", "")
+
+
+def _resend():
+    """Import and configure the Resend SDK on first use, keeping it out of cold start."""
+    import resend
+    resend.api_key = RESEND_API_KEY
+    return resend
 
 class EmailTemplates:
     """HTML Email Templates"""
@@ -295,7 +301,36 @@ class EmailService:
     @staticmethod
     def is_configured() -> bool:
         """Check if Resend is configured"""
-        return bool(resend.api_key)
+        return bool(RESEND_API_KEY)
+    
+    @staticmethod
+    def find_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+        """
+        Find an auth user by email (id, email, email_confirmed_at, user_metadata).
+        Uses the get_auth_user_by_email RPC (db/auth_user_lookup.sql); falls back
+        to scanning the admin user list.
+        """
+        supabase = get_supabase_service()
+        try:
+            response = supabase.rpc('get_auth_user_by_email', {'p_email': email}).execute()
+            if response.data:
+                user = response.data[0]
+                user['user_metadata'] = user.get('user_metadata') or {}
+                return user
+            return None
+        
+        except Exception as e:
+            print(f"⚠️ Auth user lookup RPC unavailable, scanning user list: {e}")
+        
+        user = next((u for u in supabase.auth.admin.list_users() if u.email == email), None)
+        if not user:
+            return None
+        return {
+            "id": user.id,
+            "email": user.email,
+            "email_confirmed_at": user.email_confirmed_at,
+            "user_metadata": user.user_metadata or {}
+        }
     
     @staticmethod
     async def send_verification_email(email: str, user_id: str, user_name: str = "") -> Dict[str, Any]:
@@ -332,7 +367,7 @@ class EmailService:
             }
             
             try:
-                resend.Emails.send(params)
+                _resend().Emails.send(params)
                 print(f"✅ Verification email sent to {email}")
             except Exception as email_error:
                 print(f"⚠️ Could not send verification email: {email_error}")
@@ -418,9 +453,7 @@ class EmailService:
         try:
             supabase = get_supabase_service()
             
-            # Find user by email
-            user_result = supabase.auth.admin.list_users()
-            user = next((u for u in user_result if u.email == email), None)
+            user = EmailService.find_user_by_email(email)
             
             if not user:
                 # Don't reveal if email exists
@@ -431,7 +464,7 @@ class EmailService:
             
             # Store reset token
             supabase.table('password_reset_tokens').insert({
-                'user_id': user.id,
+                'user_id': user['id'],
                 'token': token,
                 'email': email,
                 'expires_at': expires_at.isoformat()
@@ -447,11 +480,11 @@ class EmailService:
                 "html": EmailTemplates.password_reset_email(reset_url, user_name)
             }
             
-            resend.Emails.send(params)
+            _resend().Emails.send(params)
             
             SecurityLogger.log_security_event(
                 event_type="PASSWORD_RESET_REQUESTED",
-                user_id=user.id,
+                user_id=user['id'],
                 details={"email": email},
                 correlation_id=SecurityLogger.generate_correlation_id()
             )
@@ -526,9 +559,7 @@ class EmailService:
         try:
             supabase = get_supabase_service()
             
-            # Find user by email
-            user_result = supabase.auth.admin.list_users()
-            user = next((u for u in user_result if u.email == email), None)
+            user = EmailService.find_user_by_email(email)
             
             if not user:
                 return {"success": False, "error": "Usuario no encontrado"}
@@ -538,7 +569,7 @@ class EmailService:
             
             # Store magic link token
             supabase.table('magic_link_tokens').insert({
-                'user_id': user.id,
+                'user_id': user['id'],
                 'token': token,
                 'email': email,
                 'expires_at': expires_at.isoformat()
@@ -554,11 +585,11 @@ class EmailService:
                 "html": EmailTemplates.magic_link_email(magic_url, user_name)
             }
             
-            resend.Emails.send(params)
+            _resend().Emails.send(params)
             
             SecurityLogger.log_security_event(
                 event_type="MAGIC_LINK_SENT",
-                user_id=user.id,
+                user_id=user['id'],
                 details={"email": email},
                 correlation_id=SecurityLogger.generate_correlation_id()
             )
@@ -604,7 +635,7 @@ class EmailService:
                 "html": EmailTemplates.reauthentication_email(reauth_url, user_name, ip_address)
             }
             
-            resend.Emails.send(params)
+            _resend().Emails.send(params)
             
             SecurityLogger.log_security_event(
                 event_type="REAUTH_EMAIL_SENT",
@@ -637,7 +668,7 @@ class EmailService:
                 "html": EmailTemplates.welcome_email(user_name)
             }
             
-            resend.Emails.send(params)
+            _resend().Emails.send(params)
             
             return {"success": True}
             
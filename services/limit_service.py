@@ -2,6 +2,7 @@
 Rate Limit Service - Manages usage limits with Supabase persistence
 Implements daily message and token limits per plan
 """
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 from services.supabase_service import get_supabase_service
@@ -201,6 +202,31 @@ class RateLimitService:
                 
             today = datetime.utcnow().date()
             
+            # Check and increment in one atomic round-trip (db/rate_limit_functions.sql)
+            try:
+                result = supabase.rpc('check_and_increment_daily_usage', {
+                    'p_user_id': user_id,
+                    'p_model': model,
+                    'p_date': today.isoformat(),
+                    'p_tokens': message_tokens,
+                    'p_messages_limit': messages_daily_limit,
+                    'p_tokens_limit': tokens_daily_limit
+                }).execute().data
+            except Exception as rpc_error:
+                print(f"⚠️ Daily usage RPC unavailable, using table queries: {rpc_error}")
+                result = None
+            
+            if result:
+                usage_info = RateLimitService._build_usage_info(
+                    model, result['messages_used'], result['tokens_used'],
+                    messages_daily_limit, tokens_daily_limit, tokens_per_message_limit
+                )
+                if result.get('allowed') is False:
+                    limit = messages_daily_limit if result['reason'] == "messages_limit" else tokens_daily_limit
+                    used = result['messages_used'] if result['reason'] == "messages_limit" else result['tokens_used']
+                    return (False, RateLimitService._limit_error(result['reason'], model, limit, used), usage_info)
+                return (True, None, usage_info)
+            
             try:
                 response = supabase.table('model_usage_daily')\
                     .select('messages_used, tokens_used')\
@@ -216,42 +242,20 @@ class RateLimitService:
                 messages_used = 0
                 tokens_used = 0
             
-            usage_info = {
-                "messages": {
-                    "current": messages_used,
-                    "limit": messages_daily_limit,
-                    "unlimited": messages_daily_limit == -1
-                },
-                "tokens": {
-                    "current": tokens_used,
-                    "limit": tokens_daily_limit,
-                    "unlimited": tokens_daily_limit == -1,
-                    "per_message_limit": tokens_per_message_limit
-                },
-                "model": model
-            }
+            usage_info = RateLimitService._build_usage_info(
+                model, messages_used, tokens_used,
+                messages_daily_limit, tokens_daily_limit, tokens_per_message_limit
+            )
             
             if messages_daily_limit != -1 and messages_used >= messages_daily_limit:
-                time_until_reset = RateLimitService._get_time_until_reset()
-                return (False, {
-                    "type": "messages_limit",
-                    "model": model,
-                    "limit": messages_daily_limit,
-                    "used": messages_used,
-                    "reset_time": time_until_reset,
-                    "message": f"Has alcanzado el límite diario de {messages_daily_limit} mensajes para {model}."
-                }, usage_info)
+                return (False, RateLimitService._limit_error(
+                    "messages_limit", model, messages_daily_limit, messages_used
+                ), usage_info)
             
             if tokens_daily_limit != -1 and (tokens_used + message_tokens) > tokens_daily_limit:
-                time_until_reset = RateLimitService._get_time_until_reset()
-                return (False, {
-                    "type": "tokens_limit",
-                    "model": model,
-                    "limit": tokens_daily_limit,
-                    "used": tokens_used,
-                    "reset_time": time_until_reset,
-                    "message": f"Has alcanzado el límite diario de {tokens_daily_limit} tokens para {model}."
-                }, usage_info)
+                return (False, RateLimitService._limit_error(
+                    "tokens_limit", model, tokens_daily_limit, tokens_used
+                ), usage_info)
             
             try:
                 # Increment daily usage - using synchronous execute() from Supabase client
@@ -268,20 +272,10 @@ class RateLimitService:
                     new_messages = increment_response.data.get('messages_used', messages_used + 1)
                     new_tokens = increment_response.data.get('tokens_used', tokens_used + message_tokens)
                     
-                    usage_info = {
-                        "messages": {
-                            "current": new_messages,
-                            "limit": messages_daily_limit,
-                            "unlimited": messages_daily_limit == -1
-                        },
-                        "tokens": {
-                            "current": new_tokens,
-                            "limit": tokens_daily_limit,
-                            "unlimited": tokens_daily_limit == -1,
-                            "per_message_limit": tokens_per_message_limit
-                        },
-                        "model": model
-                    }
+                    usage_info = RateLimitService._build_usage_info(
+                        model, new_messages, new_tokens,
+                        messages_daily_limit, tokens_daily_limit, tokens_per_message_limit
+                    )
             except Exception as increment_error:
                 print(f"⚠️ Error incrementando uso diario: {increment_error}")
                 # Continuar con los valores actuales si falla el incremento
@@ -296,6 +290,44 @@ class RateLimitService:
             )
             return True, None, None
     
+    @staticmethod
+    def _build_usage_info(
+        model: str,
+        messages_used: int,
+        tokens_used: int,
+        messages_daily_limit: int,
+        tokens_daily_limit: int,
+        tokens_per_message_limit: int
+    ) -> Dict:
+        """Usage payload returned alongside rate limit decisions."""
+        return {
+            "messages": {
+                "current": messages_used,
+                "limit": messages_daily_limit,
+                "unlimited": messages_daily_limit == -1
+            },
+            "tokens": {
+                "current": tokens_used,
+                "limit": tokens_daily_limit,
+                "unlimited": tokens_daily_limit == -1,
+                "per_message_limit": tokens_per_message_limit
+            },
+            "model": model
+        }
+    
+    @staticmethod
+    def _limit_error(limit_type: str, model: str, limit: int, used: int) -> Dict:
+        """Structured error for an exhausted daily message or token limit."""
+        unit = "mensajes" if limit_type == "messages_limit" else "tokens"
+        return {
+            "type": limit_type,
+            "model": model,
+            "limit": limit,
+            "used": used,
+            "reset_time": RateLimitService._get_time_until_reset(),
+            "message": f"Has alcanzado el límite diario de {limit} {unit} para {model}."
+        }
+    
     @staticmethod
     def _get_time_until_reset() -> str:
         """Get human-readable time until daily limits reset (midnight UTC)"""
@@ -423,13 +455,15 @@ class RateLimitService:
             today = datetime.utcnow().date()
             
             try:
-                # Check usage in google_ai_usage table
-                response = supabase.table('google_ai_usage')\
-                    .select('requests_used')\
-                    .eq('user_id', user_id)\
-                    .eq('model', model)\
-                    .eq('date', today.isoformat())\
-                    .execute()
+                # Check usage in google_ai_usage table (blocking client call, so in a worker thread)
+                response = await asyncio.to_thread(
+                    supabase.table('google_ai_usage')
+                        .select('requests_used')
+                        .eq('user_id', user_id)
+                        .eq('model', model)
+                        .eq('date', today.isoformat())
+                        .execute
+                )
                 
                 requests_used = response.data[0]['requests_used'] if response.data and len(response.data) > 0 else 0
                 
@@ -470,11 +504,13 @@ class RateLimitService:
             
             try:
                 # Use RPC function to increment (upsert if not exists)
-                supabase.rpc('increment_google_ai_usage', {
-                    'p_user_id': user_id,
-                    'p_model': model,
-                    'p_date': today.isoformat()
-                }).execute()
+                await asyncio.to_thread(
+                    supabase.rpc('increment_google_ai_usage', {
+                        'p_user_id': user_id,
+                        'p_model': model,
+                        'p_date': today.isoformat()
+                    }).execute
+                )
                 
                 print(f"📊 Google AI usage incremented for {user_id[:8]}.../{model}")
                 
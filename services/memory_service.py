@@ -2,6 +2,7 @@
 Memory service for managing user memories across conversations
 """
 
+import asyncio
 from typing import Optional, List, Dict
 from datetime import datetime
 from services.supabase_service import get_supabase_service
@@ -319,9 +320,10 @@ Si no hay nada importante que recordar, responde: []
         memory_id: int,
         memory_text: str = None,
         importance_score: float = None,
-        is_active: bool = None
+        is_active: bool = None,
+        user_id: Optional[str] = None
     ) -> Optional[Dict]:
-        """Update a memory."""
+        """Update a memory; with user_id, only if it belongs to that user (None otherwise)."""
         try:
             supabase = get_supabase_service()
             
@@ -334,10 +336,12 @@ Si no hay nada importante que recordar, responde: []
             if is_active is not None:
                 update_data['is_active'] = is_active
             
-            response = supabase.table('user_memories')\
+            query = supabase.table('user_memories')\
                 .update(update_data)\
-                .eq('id', memory_id)\
-                .execute()
+                .eq('id', memory_id)
+            if user_id is not None:
+                query = query.eq('user_id', user_id)
+            response = await asyncio.to_thread(query.execute)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -348,9 +352,9 @@ Si no hay nada importante que recordar, responde: []
             return None
     
     @staticmethod
-    async def delete_memory(memory_id: int) -> bool:
+    async def delete_memory(memory_id: int, user_id: Optional[str] = None) -> bool:
         """Delete a memory (actually just deactivate)."""
-        return await MemoryService.update_memory(memory_id, is_active=False) is not None
+        return await MemoryService.update_memory(memory_id, is_active=False, user_id=user_id) is not None
     
     @staticmethod
     async def format_memories_for_prompt(user_id: str) -> str:
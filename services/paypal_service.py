@@ -5,7 +5,6 @@ PayPal Service - Full integration with PayPal SDK for payment processing
 from typing import Dict, Any, Optional
 from services.security_logger import SecurityLogger
 from services.subscription_service import SubscriptionService
-import paypalrestsdk
 import os
 
 class PayPalService:
@@ -26,6 +25,7 @@ class PayPalService:
         if not client_id or not client_secret:
             return
         
+        import paypalrestsdk
         paypalrestsdk.configure({
             "mode": mode,
             "client_id": client_id,
@@ -91,6 +91,7 @@ class PayPalService:
                 }
             
             # Create PayPal payment
+            import paypalrestsdk
             payment = paypalrestsdk.Payment({
                 "intent": "sale",
                 "payer": {
@@ -168,6 +169,7 @@ class PayPalService:
             }
         
         try:
+            import paypalrestsdk
             payment = paypalrestsdk.Payment.find(payment_id)
             
             if payment.execute({"payer_id": payer_id}):
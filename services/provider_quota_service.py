@@ -65,12 +65,15 @@ class ProviderQuotaService:
         try:
             supabase = get_supabase_service()
             if supabase:
-                response = supabase.table('provider_quotas')\
-                    .select('*')\
-                    .eq('provider', provider)\
-                    .eq('model', model)\
-                    .eq('date', today)\
-                    .execute()
+                # Blocking client calls run in a worker thread
+                response = await asyncio.to_thread(
+                    supabase.table('provider_quotas')
+                        .select('*')
+                        .eq('provider', provider)
+                        .eq('model', model)
+                        .eq('date', today)
+                        .execute
+                )
                 
                 if response.data and len(response.data) > 0:
                     return response.data[0]
@@ -84,7 +87,9 @@ class ProviderQuotaService:
                         'is_exhausted': False,
                         'last_error_time': None
                     }
-                    insert_response = supabase.table('provider_quotas').insert(new_record).execute()
+                    insert_response = await asyncio.to_thread(
+                        supabase.table('provider_quotas').insert(new_record).execute
+                    )
                     if insert_response.data and len(insert_response.data) > 0:
                         return insert_response.data[0]
         except Exception as e:
@@ -123,12 +128,14 @@ class ProviderQuotaService:
         try:
             supabase = get_supabase_service()
             if supabase:
-                supabase.table('provider_quotas')\
-                    .update(data)\
-                    .eq('provider', provider)\
-                    .eq('model', model)\
-                    .eq('date', today)\
-                    .execute()
+                await asyncio.to_thread(
+                    supabase.table('provider_quotas')
+                        .update(data)
+                        .eq('provider', provider)
+                        .eq('model', model)
+                        .eq('date', today)
+                        .execute
+                )
                 return
         except Exception as e:
             print(f"⚠️ Supabase unavailable for quota update, using memory: {e}")
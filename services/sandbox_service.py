@@ -86,6 +86,10 @@ class SandboxService:
         r'import\s+Pillow\b',
     ]
 
+    # One alternation scans the code once instead of once per pattern
+    BLACKLIST_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in BLACKLIST_PATTERNS), re.IGNORECASE)
+    IMPORT_RE = re.compile(r'(?:from|import)\s+([a-zA-Z_][a-zA-Z0-9_\.]*)')
+
     @staticmethod
     def validate_code(code: str) -> Dict[str, Any]:
         if not code or not code.strip():
@@ -100,15 +104,13 @@ class SandboxService:
                 'error': f'El código excede el límite de {SandboxService.MAX_CODE_LENGTH} caracteres'
             }
 
-        for pattern in SandboxService.BLACKLIST_PATTERNS:
-            if re.search(pattern, code, re.IGNORECASE):
-                return {
-                    'valid': False,
-                    'error': f'Código rechazado: contiene operaciones no permitidas (patrón de seguridad detectado)'
-                }
+        if SandboxService.BLACKLIST_RE.search(code):
+            return {
+                'valid': False,
+                'error': f'Código rechazado: contiene operaciones no permitidas (patrón de seguridad detectado)'
+            }
 
-        import_pattern = r'(?:from|import)\s+([a-zA-Z_][a-zA-Z0-9_\.]*)'
-        imports = re.findall(import_pattern, code)
+        imports = SandboxService.IMPORT_RE.findall(code)
 
         for imp in imports:
             base_import = imp.split('.')[0]
@@ -6,11 +6,16 @@ from typing import Dict, Any, Optional, List
 from services.security_logger import SecurityLogger, SecurityEventType
 from services.subscription_service import SubscriptionService
 from config import Config
-import stripe
 import os
 from datetime import datetime
 
 
+def _stripe():
+    """Import the Stripe SDK on first use, keeping it out of cold start."""
+    import stripe
+    return stripe
+
+
 class StripeService:
     """Service for handling Stripe payment integration"""
     
@@ -32,7 +37,7 @@ class StripeService:
             )
             return
         
-        stripe.api_key = api_key
+        _stripe().api_key = api_key
         StripeService._configured = True
     
     @staticmethod
@@ -99,7 +104,7 @@ class StripeService:
             if name:
                 customer_data["name"] = name
             
-            customer = stripe.Customer.create(**customer_data)
+            customer = _stripe().Customer.create(**customer_data)
             
             # Save to database
             supabase.table('stripe_customers').insert({
@@ -176,7 +181,7 @@ class StripeService:
                 }
             
             # Create checkout session
-            session = stripe.checkout.Session.create(
+            session = _stripe().checkout.Session.create(
                 customer=customer_id,
                 payment_method_types=['card'],
                 line_items=[{
@@ -261,7 +266,7 @@ class StripeService:
             customer_id = result.data['stripe_customer_id']
             
             # Create portal session
-            session = stripe.billing_portal.Session.create(
+            session = _stripe().billing_portal.Session.create(
                 customer=customer_id,
                 return_url=return_url
             )
@@ -297,7 +302,7 @@ class StripeService:
         
         try:
             # Cancel at period end (don't cancel immediately)
-            subscription = stripe.Subscription.modify(
+            subscription = _stripe().Subscription.modify(
                 subscription_id,
                 cancel_at_period_end=True
             )
@@ -440,7 +445,7 @@ class StripeService:
         
         try:
             # Verify webhook signature
-            event = stripe.Webhook.construct_event(
+            event = _stripe().Webhook.construct_event(
                 payload, signature, webhook_secret
             )
             
@@ -469,7 +474,7 @@ class StripeService:
                     "message": f"Unhandled event type: {event_type}"
                 }
             
-        except stripe.error.SignatureVerificationError as e:
+        except _stripe().error.SignatureVerificationError as e:
             SecurityLogger.log_api_error(
                 api_name="StripeService.handle_webhook",
                 error_message=f"Invalid signature: {str(e)}",
@@ -640,7 +645,7 @@ class StripeService:
                 }
             
             # Get subscription details from Stripe
-            subscription = stripe.Subscription.retrieve(subscription_id)
+            subscription = _stripe().Subscription.retrieve(subscription_id)
             
             # Save subscription to database
             supabase.table('stripe_subscriptions').insert({
@@ -733,7 +738,7 @@ class StripeService:
             
             # Update subscription period end
             if subscription_id:
-                subscription = stripe.Subscription.retrieve(subscription_id)
+                subscription = _stripe().Subscription.retrieve(subscription_id)
                 
                 supabase.table('stripe_subscriptions')\
                     .update({
@@ -51,6 +51,16 @@ class SupabaseService:
         
         return cls._service_client
     
+    @classmethod
+    def warm_up(cls) -> None:
+        """
+        Build the shared anon and service clients ahead of the first request.
+        Both are process-wide singletons reused by every service, so each
+        container pays client construction once, at startup.
+        """
+        get_supabase_client()
+        get_supabase_service()
+
     @classmethod
     def reset_clients(cls):
         cls._anon_client = None
@@ -156,9 +166,9 @@ class SupabaseService:
             }
     
     @classmethod
-    async def check_connection(cls) -> bool:
+    def ping(cls) -> bool:
         """
-        Check if Supabase connection is working.
+        Check if Supabase connection is working (blocking).
         Returns True if connection is OK, False otherwise.
         """
         try:
@@ -172,6 +182,14 @@ class SupabaseService:
         except Exception as e:
             logger.error(f"❌ Supabase connection check failed: {str(e)}")
             return False
+    
+    @classmethod
+    async def check_connection(cls) -> bool:
+        """
+        Check if Supabase connection is working.
+        Returns True if connection is OK, False otherwise.
+        """
+        return cls.ping()
 
 # Lazy initialization - clients are created when first accessed
 # This prevents crashes if SUPABASE_* secrets are not set
@@ -1,17 +1,28 @@
 from typing import Optional, Dict
+from cachetools import TTLCache
 from services.supabase_service import get_supabase_service
 
+# Settings rows by user_id. Every write goes through UserService, which drops
+# the entry, so the TTL only bounds staleness across instances.
+SETTINGS_CACHE_TTL_SECONDS = 60
+_settings_cache = TTLCache(maxsize=10000, ttl=SETTINGS_CACHE_TTL_SECONDS)
+
 class UserService:
     
     @staticmethod
     async def get_user_settings(user_id: str) -> Optional[Dict]:
-        """Get user settings from Supabase."""
+        """Get user settings from Supabase (cached per user for a short TTL)."""
+        cached = _settings_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+
         try:
             supabase_service = get_supabase_service()
             response = supabase_service.table("user_settings").select("*").eq("user_id", user_id).maybe_single().execute()
             
             if response.data:
-                return response.data
+                _settings_cache[user_id] = response.data
+                return dict(response.data)
             return None
             
         except Exception as e:
@@ -37,6 +48,7 @@ class UserService:
                 settings_data["terms_accepted_at"] = datetime.utcnow().isoformat()
             
             response = supabase_service.table("user_settings").insert(settings_data).execute()
+            _settings_cache.pop(user_id, None)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -71,6 +83,7 @@ class UserService:
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             response = supabase_service.table("user_settings").update(update_data).eq("user_id", user_id).execute()
+            _settings_cache.pop(user_id, None)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -95,6 +108,7 @@ class UserService:
             }
             
             response = supabase_service.table("user_settings").update(update_data).eq("user_id", user_id).execute()
+            _settings_cache.pop(user_id, None)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
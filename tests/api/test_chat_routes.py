@@ -19,6 +19,13 @@ class TestChatAPI:
         assert data["status"] == "healthy"
         assert data["service"] == "Orzion Chat"
     
+    def test_live_endpoint(self, test_client):
+        """Test liveness endpoint."""
+        response = test_client.get("/live")
+        
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+    
     def test_config_endpoint(self, test_client):
         """Test config endpoint."""
         response = test_client.get("/api/config")
@@ -0,0 +1,134 @@
+"""
+Unit tests for BatchedWriter (services/async_writer.py)
+"""
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from services.async_writer import BatchedWriter
+
+
+class RecordingSupabaseClient:
+    """Mock Supabase client that records every batch it writes.
+
+    Like a real insert, a batch containing a row marked "bad" fails as a whole.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.failed_calls = 0
+
+    def table(self, table_name):
+        self.table_name = table_name
+        return self
+
+    def insert(self, rows):
+        self._pending = list(rows)
+        return self
+
+    def execute(self):
+        if any(row.get("bad") for row in self._pending):
+            self.failed_calls += 1
+            raise RuntimeError("invalid row")
+        self.batches.append(self._pending)
+
+        class MockResult:
+            data = []
+        return MockResult()
+
+
+@pytest.fixture
+def recording_client():
+    client = RecordingSupabaseClient()
+    with patch('services.async_writer.get_supabase_service', return_value=client):
+        yield client
+
+
+class TestBatchedWriter:
+    """Test batching, backpressure and shutdown flushing."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_written_in_batches(self, recording_client):
+        """Test queued rows are inserted in batches of at most max_batch."""
+        writer = BatchedWriter("audit_logs", max_batch=3, max_delay_seconds=0.01)
+
+        for i in range(7):
+            writer.enqueue({"n": i})
+        await asyncio.sleep(0.1)
+
+        assert recording_client.table_name == "audit_logs"
+        assert [len(batch) for batch in recording_client.batches] == [3, 3, 1]
+        assert [row["n"] for batch in recording_client.batches for row in batch] == list(range(7))
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_oldest_rows(self, recording_client):
+        """Test a full queue drops the oldest rows and counts them."""
+        writer = BatchedWriter("audit_logs", max_batch=10, max_delay_seconds=0.01, max_queue_size=3)
+
+        # Enqueue synchronously, so the drain task cannot run in between
+        for i in range(5):
+            writer.enqueue({"n": i})
+
+        assert writer.dropped_rows == 2
+        await writer.close()
+        assert [row["n"] for batch in recording_client.batches for row in batch] == [2, 3, 4]
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_rows(self, recording_client):
+        """Test close() writes rows still waiting for the batch delay."""
+        writer = BatchedWriter("audit_logs", max_batch=100, max_delay_seconds=60)
+
+        writer.enqueue({"n": 1})
+        writer.enqueue({"n": 2})
+        await writer.close()
+
+        assert recording_client.batches == [[{"n": 1}, {"n": 2}]]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_row_by_row(self, recording_client):
+        """Test one bad row only loses itself: the rest of its batch is still written."""
+        writer = BatchedWriter("audit_logs", max_batch=3, max_delay_seconds=0.01)
+
+        writer.enqueue({"n": 1})
+        writer.enqueue({"n": 2, "bad": True})
+        writer.enqueue({"n": 3})
+        writer.enqueue({"n": 4})
+        await writer.close()
+
+        written = [row["n"] for batch in recording_client.batches for row in batch]
+        assert written == [1, 3, 4]
+        # The 3-row batch and then the bad row on its own
+        assert recording_client.failed_calls == 2
+
+
+class TestBatchedWriterBlockingFlush:
+    """Test flush_blocking, used by the Lambda handler between invocations."""
+
+    def test_flush_blocking_writes_rows_left_after_the_loop_stops(self, recording_client):
+        """Test rows queued during an invocation are written once it returns."""
+        writer = BatchedWriter("audit_logs", max_batch=100, max_delay_seconds=60)
+        loop = asyncio.new_event_loop()
+        try:
+            async def invocation():
+                writer.enqueue({"n": 1})
+                writer.enqueue({"n": 2})
+
+            # Like Mangum: the loop stops with the drain task still sleeping
+            loop.run_until_complete(invocation())
+            assert recording_client.batches == []
+
+            writer.flush_blocking()
+            assert recording_client.batches == [[{"n": 1}, {"n": 2}]]
+        finally:
+            loop.run_until_complete(writer.close())
+            loop.close()
+
+    def test_flush_blocking_without_rows_is_a_no_op(self, recording_client):
+        """Test nothing runs when the writer has never been used."""
+        writer = BatchedWriter("audit_logs")
+        writer.flush_blocking()
+        assert recording_client.batches == []
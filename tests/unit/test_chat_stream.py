@@ -0,0 +1,72 @@
+"""
+Unit tests for the chat stream pump (routes/chat_routes.py)
+"""
+import pytest
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from routes.chat_routes import _pump, _STREAM_END
+
+
+class TestStreamPump:
+    """Test _pump, which moves provider chunks into the bounded stream queue."""
+
+    @pytest.mark.asyncio
+    async def test_pump_forwards_chunks_then_end_marker(self):
+        """Test all chunks arrive in order followed by the end marker."""
+        async def chunks():
+            for chunk in ("Hola", " ", "mundo"):
+                yield chunk
+
+        queue = asyncio.Queue(maxsize=2)
+        producer = asyncio.create_task(_pump(chunks(), queue))
+
+        received = []
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            received.append(item)
+
+        await producer
+        assert received == ["Hola", " ", "mundo"]
+
+    @pytest.mark.asyncio
+    async def test_pump_cancel_with_full_queue_finishes(self):
+        """Test cancelling while blocked on a full queue ends the task and closes the stream."""
+        closed = asyncio.Event()
+
+        async def endless():
+            try:
+                while True:
+                    yield "x"
+            finally:
+                closed.set()
+
+        queue = asyncio.Queue(maxsize=2)
+        producer = asyncio.create_task(_pump(endless(), queue))
+        await asyncio.sleep(0.01)
+        assert queue.full()
+
+        producer.cancel()
+        await asyncio.wait_for(asyncio.gather(producer, return_exceptions=True), timeout=1)
+
+        assert producer.cancelled()
+        assert closed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_pump_error_marks_end_and_reraises(self):
+        """Test a provider error still ends the stream and surfaces through the task."""
+        async def failing():
+            yield "parcial"
+            raise RuntimeError("provider down")
+
+        queue = asyncio.Queue(maxsize=4)
+        producer = asyncio.create_task(_pump(failing(), queue))
+
+        assert await queue.get() == "parcial"
+        assert await queue.get() is _STREAM_END
+        with pytest.raises(RuntimeError):
+            await producer
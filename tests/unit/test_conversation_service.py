@@ -0,0 +1,146 @@
+"""
+Unit tests for ConversationService keyset pagination
+"""
+import pytest
+import re
+import sys
+from datetime import datetime
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from services.conversation_service import (
+    ConversationService,
+    decode_list_cursor,
+    encode_list_cursor,
+)
+
+
+def _ts(row):
+    return datetime.fromisoformat(row["updated_at"])
+
+
+class FakeConversationsTable:
+    """In-memory stand-in for the Supabase query builder used by list_conversations."""
+
+    _KEYSET_RE = re.compile(
+        r'^updated_at\.lt\."(?P<ts>[^"]+)",and\(updated_at\.eq\."(?P=ts)",id\.lt\.(?P<id>\d+)\)$'
+    )
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def table(self, name):
+        self._result = list(self._rows)
+        self._order = []
+        self._limit = None
+        return self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self._result = [row for row in self._result if row[column] == value]
+        return self
+
+    def or_(self, filters):
+        match = self._KEYSET_RE.match(filters)
+        assert match, f"unexpected filter: {filters}"
+        # Compare as timestamps, like Postgres, not as strings
+        ts, row_id = datetime.fromisoformat(match.group("ts")), int(match.group("id"))
+        self._result = [
+            row for row in self._result
+            if _ts(row) < ts or (_ts(row) == ts and row["id"] < row_id)
+        ]
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        rows = self._result
+        for column, desc in reversed(self._order):
+            key = _ts if column == "updated_at" else (lambda row, column=column: row[column])
+            rows = sorted(rows, key=key, reverse=desc)
+        if self._limit is not None:
+            rows = rows[:self._limit]
+
+        class MockResult:
+            data = rows
+        return MockResult()
+
+
+def _rows():
+    # Three conversations share one timestamp, straddling a page boundary
+    same = "2024-05-01T10:00:00.000000+00:00"
+    return [
+        {"id": 1, "user_id": "u1", "is_archived": False, "updated_at": "2024-04-30T09:00:00+00:00"},
+        {"id": 2, "user_id": "u1", "is_archived": False, "updated_at": same},
+        {"id": 3, "user_id": "u1", "is_archived": False, "updated_at": same},
+        {"id": 4, "user_id": "u1", "is_archived": False, "updated_at": same},
+        {"id": 5, "user_id": "u1", "is_archived": False, "updated_at": "2024-05-02T08:00:00+00:00"},
+        {"id": 6, "user_id": "u2", "is_archived": False, "updated_at": same},
+    ]
+
+
+class TestListCursor:
+    """Test the opaque (updated_at, id) cursor."""
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the row's (updated_at, id)."""
+        row = {"id": 42, "updated_at": "2024-05-01T10:00:00+00:00"}
+        cursor = encode_list_cursor(row)
+        assert decode_list_cursor(cursor) == ("2024-05-01T10:00:00+00:00", 42)
+
+    def test_cursor_is_query_string_safe(self):
+        """Test the cursor has no characters that change meaning in a URL."""
+        cursor = encode_list_cursor({"id": 7, "updated_at": "2024-05-01T10:00:00+00:00"})
+        assert re.fullmatch(r"[A-Za-z0-9_-]+", cursor)
+
+    def test_cursor_timestamp_is_normalized(self):
+        """Test the decoded timestamp is re-serialized, not passed through."""
+        cursor = encode_list_cursor({"id": 3, "updated_at": "2024-05-01T10:00:00Z"})
+        assert decode_list_cursor(cursor) == ("2024-05-01T10:00:00+00:00", 3)
+
+    @pytest.mark.parametrize("cursor", [
+        "not-base64!",
+        "e30",
+        encode_list_cursor({"id": "7", "updated_at": "2024-05-01T10:00:00+00:00"}),
+        encode_list_cursor({"id": 0, "updated_at": "2024-05-01T10:00:00+00:00"}),
+        encode_list_cursor({"id": True, "updated_at": "2024-05-01T10:00:00+00:00"}),
+        encode_list_cursor({"id": 7, "updated_at": "x"}),
+        # Filter syntax smuggled in the timestamp
+        encode_list_cursor({"id": 7, "updated_at": '2024-05-01",user_id.neq."x'}),
+    ])
+    def test_invalid_cursor_raises(self, cursor):
+        """Test malformed cursors are rejected with ValueError."""
+        with pytest.raises(ValueError):
+            decode_list_cursor(cursor)
+
+
+class TestListConversationsPaging:
+    """Test keyset paging over conversations that share a timestamp."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_every_row_once(self):
+        """Test paging with ties neither skips nor repeats conversations."""
+        fake = FakeConversationsTable(_rows())
+        seen = []
+        cursor = None
+
+        with patch('services.conversation_service.get_supabase_service', return_value=fake):
+            while True:
+                page = await ConversationService.list_conversations(
+                    user_id="u1", after=cursor, limit=2
+                )
+                seen.extend(row["id"] for row in page)
+                if len(page) < 2:
+                    break
+                cursor = decode_list_cursor(encode_list_cursor(page[-1]))
+
+        assert seen == [5, 4, 3, 2, 1]
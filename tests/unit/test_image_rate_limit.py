@@ -0,0 +1,118 @@
+"""
+Unit tests for the /generate-image rate limiter (routes/image_routes.py)
+"""
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from routes import image_routes
+from routes.image_routes import (
+    IMAGE_MAX_CONCURRENT_PER_USER,
+    IMAGE_RATE_LIMIT_REQUESTS,
+    IMAGE_RATE_LIMIT_WINDOW_SECONDS,
+    image_rate_limit,
+)
+
+
+def _request(ip="203.0.113.7"):
+    return SimpleNamespace(headers={}, client=SimpleNamespace(host=ip))
+
+
+@pytest.fixture(autouse=True)
+def reset_limiter_state():
+    image_routes._recent_image_requests.clear()
+    image_routes._images_in_flight.clear()
+    yield
+    image_routes._recent_image_requests.clear()
+    image_routes._images_in_flight.clear()
+
+
+@pytest.fixture
+def mock_user_limits():
+    """Authenticated user whose hourly cap (rate_limits table) always allows."""
+    with patch('routes.image_routes.AuthMiddleware.get_current_user',
+               new=AsyncMock(return_value={"id": "user-1"})), \
+         patch('routes.image_routes.SecurityMiddleware.check_rate_limit',
+               new=AsyncMock(return_value=(True, None))) as hourly:
+        yield hourly
+
+
+async def _acquire():
+    """Enter the dependency; returns (user, generator) so the caller can release it."""
+    gen = image_rate_limit(_request())
+    user = await gen.__anext__()
+    return user, gen
+
+
+class TestImageRateLimit:
+    """Test the per-user window, concurrency cap and hourly cap."""
+
+    @pytest.mark.asyncio
+    async def test_window_rejects_requests_over_the_limit(self, mock_user_limits):
+        """Test the request after IMAGE_RATE_LIMIT_REQUESTS in one window gets 429."""
+        for _ in range(IMAGE_RATE_LIMIT_REQUESTS):
+            user, gen = await _acquire()
+            assert user == {"id": "user-1"}
+            await gen.aclose()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await _acquire()
+        assert exc_info.value.status_code == 429
+
+    @pytest.mark.asyncio
+    async def test_window_slides(self, mock_user_limits):
+        """Test requests are allowed again once the oldest leave the window."""
+        with patch('routes.image_routes.time.monotonic', return_value=1000.0):
+            for _ in range(IMAGE_RATE_LIMIT_REQUESTS):
+                _, gen = await _acquire()
+                await gen.aclose()
+
+        with patch('routes.image_routes.time.monotonic',
+                   return_value=1000.0 + IMAGE_RATE_LIMIT_WINDOW_SECONDS):
+            _, gen = await _acquire()
+            await gen.aclose()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap_until_a_slot_is_released(self, mock_user_limits):
+        """Test only IMAGE_MAX_CONCURRENT_PER_USER generations run at once."""
+        held = [(await _acquire())[1] for _ in range(IMAGE_MAX_CONCURRENT_PER_USER)]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await _acquire()
+        assert exc_info.value.status_code == 429
+
+        await held.pop().aclose()
+        _, gen = await _acquire()
+        await gen.aclose()
+        for gen in held:
+            await gen.aclose()
+        assert not image_routes._images_in_flight
+
+    @pytest.mark.asyncio
+    async def test_hourly_cap_rejection_releases_the_slot(self, mock_user_limits):
+        """Test a 429 from the shared hourly cap frees the concurrency slot."""
+        mock_user_limits.return_value = (False, "Rate limit exceeded for image. Try again later.")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await _acquire()
+
+        assert exc_info.value.status_code == 429
+        assert not image_routes._images_in_flight
+
+    @pytest.mark.asyncio
+    async def test_anonymous_callers_are_limited_by_ip(self):
+        """Test anonymous requests are keyed by client IP and skip the hourly cap."""
+        with patch('routes.image_routes.AuthMiddleware.get_current_user',
+                   new=AsyncMock(return_value=None)), \
+             patch('routes.image_routes.SecurityMiddleware.check_rate_limit',
+                   new=AsyncMock()) as hourly:
+            gen = image_rate_limit(_request(ip="198.51.100.1"))
+            assert await gen.__anext__() is None
+            assert "198.51.100.1" in image_routes._images_in_flight
+            await gen.aclose()
+
+        hourly.assert_not_called()
@@ -65,6 +65,33 @@ class TestSecurityMiddleware:
         assert "&amp;" in result
         assert "class=" in result or "class=&quot;" in result
 
+    
+    def test_validate_password_valid(self):
+        """Test password with letters and digits."""
+        is_valid, error = SecurityMiddleware.validate_password("abcdefg1")
+        assert is_valid is True
+        assert error is None
+    
+    def test_validate_password_missing_digit(self):
+        """Test password without digits is rejected."""
+        is_valid, error = SecurityMiddleware.validate_password("abcdefgh")
+        assert is_valid is False
+        assert error is not None
+    
+    def test_validate_password_non_ascii_letters(self):
+        """Test that only ASCII letters count as letters."""
+        is_valid, _ = SecurityMiddleware.validate_password("ñññññññ1")
+        assert is_valid is False
+    
+    def test_validate_email_valid(self):
+        """Test a well-formed email address."""
+        assert SecurityMiddleware.validate_email("user.name+tag@example.com") is True
+    
+    def test_validate_email_malformed(self):
+        """Test that structurally broken addresses are rejected."""
+        for email in ["", "@example.com", "user@@example.com", "a@b@example.com", "user@example", "user@example."]:
+            assert SecurityMiddleware.validate_email(email) is False
+
 
 class TestRateLimiting:
     """Test rate limiting functionality."""